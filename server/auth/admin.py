@@ -16,3 +16,4 @@ class PhoneVerificationAdmin(admin.ModelAdmin):
     list_filter = ("role",)
     search_fields = ("phone",)
     readonly_fields = ("created_at",)
+    exclude = ("credential",)
@@ -0,0 +1,150 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from sakayhub_admin.memo import TTLCache
+
+from .models import MobileProfile
+
+
+# Entries in this process go stale for at most this long after another
+# process changes the account; changes made here are dropped at once
+LOCAL_SECONDS = 5
+LOCAL_SIZE = 10_000
+SHARED_SECONDS = 5 * 60
+# Versioned with the cached columns, so workers never read another layout
+SHARED_PREFIX = "auth:token:v2:"
+# Only the user columns authentication and permission checks read; the
+# password hash in particular stays in the database. The rest are left
+# deferred and load on first access.
+USER_FIELDS = ("id", "username", "email", "first_name", "last_name", "is_active", "is_staff", "is_superuser")
+
+
+def _names(model, fields=None) -> list:
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if fields is None or field.attname in fields
+    ]
+
+
+class TokenCache:
+    """``Token`` key to the token, its user and their mobile profile, as plain field values.
+
+    Looked up in a per-process ``TTLCache`` first, then in the ``shared``
+    cache every worker sees (``default`` is per-process, and dropping an
+    entry there would leave the other workers trusting a revoked token),
+    then with one joined query. Instances are rebuilt from the values on
+    every request, so no model object is shared between threads, and
+    ``request.user.mobile_profile`` needs no query.
+    """
+
+    def __init__(self, shared=None, timer=time.monotonic):
+        self._local = TTLCache(LOCAL_SIZE, LOCAL_SECONDS, timer=timer)
+        self._shared = shared
+        self._lock = threading.Lock()
+        self.shared_hits = 0
+        self.shared_misses = 0
+
+    @property
+    def shared(self):
+        return self._shared if self._shared is not None else caches["shared"]
+
+    def _entry(self, key: str):
+        entry = self._local.get(key)
+        if entry is not None:
+            return entry
+        entry = self.shared.get(SHARED_PREFIX + key)
+        with self._lock:
+            if entry is None:
+                self.shared_misses += 1
+            else:
+                self.shared_hits += 1
+        if entry is None:
+            token = Token.objects.select_related("user", "user__mobile_profile").filter(key=key).first()
+            if token is None:
+                return None
+            try:
+                profile = token.user.mobile_profile
+            except MobileProfile.DoesNotExist:
+                profile = None
+            entry = (
+                [getattr(token, name) for name in _names(Token)],
+                [getattr(token.user, name) for name in _names(get_user_model(), USER_FIELDS)],
+                [getattr(profile, name) for name in _names(MobileProfile)] if profile is not None else None,
+            )
+            self.shared.set(SHARED_PREFIX + key, entry, SHARED_SECONDS)
+        self._local.set(key, entry)
+        return entry
+
+    def get(self, key: str):
+        """The ``Token`` for ``key`` with its user and profile attached, or ``None``."""
+        entry = self._entry(key)
+        if entry is None:
+            return None
+        token_values, user_values, profile_values = entry
+        UserModel = get_user_model()
+        token = Token.from_db(DEFAULT_DB_ALIAS, _names(Token), token_values)
+        user = UserModel.from_db(DEFAULT_DB_ALIAS, _names(UserModel, USER_FIELDS), user_values)
+        token.user = user
+        if profile_values is None:
+            UserModel.mobile_profile.related.set_cached_value(user, None)
+        else:
+            user.mobile_profile = MobileProfile.from_db(DEFAULT_DB_ALIAS, _names(MobileProfile), profile_values)
+        return token
+
+    def invalidate(self, *keys):
+        for key in keys:
+            self._local.delete(key)
+        if keys:
+            self.shared.delete_many([SHARED_PREFIX + key for key in keys])
+
+    def invalidate_user(self, user_id, using=None):
+        """Drop every cached token of ``user_id`` once the current transaction commits.
+
+        Before the commit, a concurrent request could cache the old rows again.
+        """
+        keys = list(Token.objects.using(using).filter(user_id=user_id).values_list("key", flat=True))
+        if keys:
+            transaction.on_commit(lambda: self.invalidate(*keys), using=using)
+
+    def stats(self) -> dict:
+        local = self._local.stats()
+        return {
+            "local": local,
+            "shared": {"hits": self.shared_hits, "misses": self.shared_misses},
+            # Requests answered without touching the database
+            "hit_rate": round(
+                (local["hits"] + self.shared_hits) / (local["hits"] + local["misses"]), 4
+            ) if local["hits"] + local["misses"] else None,
+        }
+
+    def clear(self):
+        self._local.clear()
+        with self._lock:
+            self.shared_hits = self.shared_misses = 0
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` served from ``token_cache``.
+
+    Tokens, users and profiles are dropped from the cache by the receivers
+    in ``auth.signals`` when they change or are deleted.
+    """
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        return token.user, token
@@ -0,0 +1,59 @@
+import base64
+from datetime import timedelta
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from django.conf import settings
+from django.core import signing
+
+
+# Marks a sealed password; rows written before sealing hold a Django hash instead
+PREFIX = "fernet$"
+# Sealed by an earlier scheme; such signups are asked for a new code
+LEGACY_PREFIX = "sealed$"
+# HKDF context, so this key is used for nothing but pending signup passwords
+INFO = b"auth.credentials"
+
+
+def _fernet(secret: str) -> Fernet:
+    key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=INFO).derive(secret.encode())
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+def _keys() -> MultiFernet:
+    # Values sealed before a SECRET_KEY rotation open while the old key is a fallback
+    secrets = [settings.SECRET_KEY, *getattr(settings, "SECRET_KEY_FALLBACKS", [])]
+    return MultiFernet([_fernet(secret) for secret in secrets])
+
+
+def seal(raw_password: str) -> str:
+    """Encrypt ``raw_password`` for a pending signup.
+
+    Costs microseconds where ``make_password()`` costs a full PBKDF2 run,
+    so signups that are never verified, and resends, hash nothing. The
+    value is a Fernet token (AES-CBC with HMAC-SHA256, a random IV and a
+    timestamp) under a key derived from ``SECRET_KEY`` with HKDF, so a
+    database leak reveals no password and a sealed value cannot be altered
+    or used after ``unseal()``'s ``max_age``.
+    """
+    return PREFIX + _keys().encrypt(raw_password.encode()).decode()
+
+
+def unseal(sealed: str, max_age) -> str:
+    """The password ``seal()`` protected; raises ``signing.BadSignature`` if it was
+    tampered with, is older than ``max_age`` (seconds or a ``timedelta``), or
+    was sealed by the earlier scheme.
+    """
+    if not sealed.startswith(PREFIX):
+        raise signing.BadSignature("Not a sealed credential.")
+    if isinstance(max_age, timedelta):
+        max_age = max_age.total_seconds()
+    try:
+        return _keys().decrypt(sealed[len(PREFIX):].encode(), ttl=int(max_age)).decode()
+    except InvalidToken:
+        raise signing.BadSignature("Sealed credential is invalid or expired.")
+
+
+def is_sealed(value: str) -> bool:
+    return value.startswith((PREFIX, LEGACY_PREFIX))
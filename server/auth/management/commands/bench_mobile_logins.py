@@ -0,0 +1,120 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Max
+from django.test import AsyncRequestFactory, RequestFactory, override_settings
+from rest_framework.authtoken.models import Token
+
+from auth.models import MobileProfile
+from auth.views import UserLoginView, UserMeView, _start_login
+from sakayhub_admin.hashing import hashing_pool
+from system.models import RateLimitCounter
+
+
+PASSWORD = "benchpass123"
+PHONE_PREFIX = "+63 900 "
+UNLIMITED = {"ip": (10**9, 60), "account": (10**9, 60), "global": (10**9, 60)}
+
+
+class Command(BaseCommand):
+    help = "Benchmark a burst of concurrent mobile logins: sync workers against the async views"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=24, help="Logins fired at once")
+        parser.add_argument("--workers", type=int, default=4, help="Sync workers in the baseline")
+
+    def handle(self, *args, **options):
+        # The baseline's worker threads use their own connections and cannot see
+        # an open transaction, so the accounts are committed and deleted afterwards
+        last_counter = RateLimitCounter.objects.aggregate(last=Max("id"))["last"] or 0
+        phones = self._seed(options["logins"])
+        try:
+            with override_settings(LOGIN_RATE_LIMITS=UNLIMITED):
+                self._report("sync, %d workers" % options["workers"], *self._sync(phones, options["workers"]))
+                self._report("async, hashing pool", *async_to_sync(self._async)(phones))
+        finally:
+            get_user_model().objects.filter(username__startswith=PHONE_PREFIX).delete()
+            RateLimitCounter.objects.filter(id__gt=last_counter).delete()
+            hashing_pool.shutdown()
+
+    def _seed(self, count: int) -> list:
+        UserModel = get_user_model()
+        encoded = make_password(PASSWORD)
+        phones = [f"{PHONE_PREFIX}{index:07d}" for index in range(count)]
+        users = UserModel.objects.bulk_create(UserModel(username=phone, password=encoded) for phone in phones)
+        MobileProfile.objects.bulk_create(
+            MobileProfile(user=user, role=MobileProfile.ROLE_USER, name="Bench Rider", phone=user.username)
+            for user in users
+        )
+        self.me_token = Token.objects.create(user=users[0]).key
+        return phones
+
+    def _sync(self, phones, workers: int):
+        """The login as the sync view did it, on a fixed set of worker threads."""
+        factory = RequestFactory()
+
+        def login(phone, index):
+            try:
+                request = factory.post("/api/auth/users/login/", REMOTE_ADDR=f"198.51.100.{index % 250}")
+                throttle = _start_login(request, phone)
+                user = authenticate(request, username=phone, password=PASSWORD)
+                throttle.succeeded()
+                Token.objects.get_or_create(user=user)
+                return time.perf_counter()
+            finally:
+                connections.close_all()
+
+        def me():
+            try:
+                request = factory.get("/api/auth/users/me/", HTTP_AUTHORIZATION=f"Token {self.me_token}")
+                UserMeView.as_view()(request)
+                return time.perf_counter()
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            started = time.perf_counter()
+            logins = [executor.submit(login, phone, index) for index, phone in enumerate(phones)]
+            # A cheap request arriving just after the burst
+            cheap = executor.submit(me)
+            finished = [future.result() - started for future in logins]
+            return finished, cheap.result() - started
+
+    async def _async(self, phones):
+        factory = AsyncRequestFactory()
+        login_view = UserLoginView.as_view()
+        # Sync views run on the thread Django reserves for sync code under ASGI
+        me_view = sync_to_async(UserMeView.as_view())
+
+        async def timed(call):
+            await call
+            return time.perf_counter()
+
+        started = time.perf_counter()
+        logins = [
+            timed(login_view(factory.post(
+                "/api/auth/users/login/", {"phone": phone, "password": PASSWORD},
+                content_type="application/json", REMOTE_ADDR=f"198.51.100.{index % 250}",
+            )))
+            for index, phone in enumerate(phones)
+        ]
+        cheap = timed(me_view(factory.get("/api/auth/users/me/", HTTP_AUTHORIZATION=f"Token {self.me_token}")))
+        *finished, cheap_finished = await asyncio.gather(*logins, cheap)
+        return [moment - started for moment in finished], cheap_finished - started
+
+    def _report(self, label: str, latencies: list, cheap: float):
+        latencies = sorted(latencies)
+        total = latencies[-1]
+        self.stdout.write(
+            f"{label:>20}: {len(latencies) / total:6.1f} logins/s, "
+            f"p50 {statistics.median(latencies) * 1000:7.0f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.0f} ms, "
+            f"cheap request answered after {cheap * 1000:7.0f} ms"
+        )
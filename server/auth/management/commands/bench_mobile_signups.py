@@ -0,0 +1,67 @@
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import AsyncRequestFactory
+
+from auth.models import MobileProfile
+from auth.otp import otp_store
+from auth.serializers import UserSignupSerializer
+from auth.views import UserSignupView
+
+
+class Command(BaseCommand):
+    help = "Benchmark signup throughput with the password hashed at signup and sealed instead (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--signups", type=int, default=20)
+
+    def handle(self, *args, **options):
+        count = options["signups"]
+        payloads = [
+            {
+                "name": f"Bench Signup {index}",
+                "email": f"bench.signup.{index}@example.com",
+                "phone": f"+63 901 {index:07d}",
+                "password": "benchpass123",
+            }
+            for index in range(count)
+        ]
+        with transaction.atomic():
+            try:
+                self._report("hashed at signup (before)", count, lambda: [self._hashed(p) for p in payloads])
+                self._report("sealed at signup (after)", count, lambda: [self._sealed(p) for p in payloads])
+                self._report("resends, sealed", count, lambda: [self._sealed(p) for p in payloads])
+                view = UserSignupView.as_view()
+                factory = AsyncRequestFactory()
+                fresh = [{**p, "phone": p["phone"].replace("901", "902"), "email": "view." + p["email"]} for p in payloads]
+                self._report("signup view, sealed", count, lambda: [
+                    async_to_sync(view)(factory.post("/api/auth/users/signup/", p, content_type="application/json"))
+                    for p in fresh
+                ])
+            finally:
+                transaction.set_rollback(True)
+
+    def _validated(self, payload) -> UserSignupSerializer:
+        serializer = UserSignupSerializer(data=payload)
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def _hashed(self, payload):
+        # The pipeline as it was: a full PBKDF2 run for every signup and resend
+        prepared = self._validated(payload).create_verification_payload()
+        otp_store.issue(
+            prepared["phone"], MobileProfile.ROLE_USER, make_password(payload["password"]), prepared["payload"]
+        )
+
+    def _sealed(self, payload):
+        prepared = self._validated(payload).create_verification_payload()
+        otp_store.issue(prepared["phone"], MobileProfile.ROLE_USER, prepared["credential"], prepared["payload"])
+
+    def _report(self, label: str, count: int, func):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:>28}: {count / elapsed:9.1f} signups/s, {elapsed / count * 1000:8.2f} ms each")
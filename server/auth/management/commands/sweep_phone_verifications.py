@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from auth.otp import SWEEP_CHUNK, otp_store
+
+
+class Command(BaseCommand):
+    help = "Delete expired phone verification codes in small batches (run periodically)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=SWEEP_CHUNK, help="Rows deleted per transaction")
+
+    def handle(self, *args, **options):
+        deleted = otp_store.sweep(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired verifications."))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mobile_auth', '0002_rename_mobile_prof_phone_idx_mobile_auth_phone_453826_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='phoneverification',
+            index=models.Index(fields=['expires_at'], name='mobile_auth_otp_expires_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mobile_auth', '0003_phoneverification_expires_idx'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='phoneverification',
+            old_name='hashed_password',
+            new_name='credential',
+        ),
+        migrations.AlterField(
+            model_name='phoneverification',
+            name='credential',
+            field=models.CharField(max_length=1024),
+        ),
+    ]
@@ -41,7 +41,8 @@ class PhoneVerification(models.Model):
     phone = models.CharField(max_length=20)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
     code = models.CharField(max_length=6)
-    hashed_password = models.CharField(max_length=128)
+    # The password sealed by auth.credentials; hashed only once the phone is verified
+    credential = models.CharField(max_length=1024)
     payload = models.JSONField(default=dict)
     attempts = models.PositiveSmallIntegerField(default=0)
     expires_at = models.DateTimeField()
@@ -49,6 +50,10 @@ class PhoneVerification(models.Model):
 
     class Meta:
         unique_together = ("phone", "role")
+        indexes = [
+            # Lets the expiry sweep find old rows without scanning the table
+            models.Index(fields=["expires_at"], name="mobile_auth_otp_expires_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"OTP {self.phone} ({self.role})"
@@ -0,0 +1,121 @@
+import secrets
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import PhoneVerification
+
+
+VERIFICATION_TTL_MINUTES = 10
+MAX_VERIFICATION_ATTEMPTS = 5
+# Every this many codes issued, a process sweeps one chunk of expired rows
+SWEEP_EVERY = 200
+SWEEP_CHUNK = 1000
+
+
+def generate_code() -> str:
+    return f"{secrets.randbelow(1_000_000):06d}"
+
+
+class OTPStore:
+    """Pending phone verifications, one per ``(phone, role)``, that expire on their own.
+
+    Nothing waits for a verify request to clean up: ``sweep()`` deletes
+    expired rows in chunks along the ``expires_at`` index, both from
+    ``manage.py sweep_phone_verifications`` and now and then as codes are
+    issued, so signup spam cannot grow the table without bound. Attempts
+    are counted with a conditional ``UPDATE ... SET attempts = attempts + 1``,
+    so parallel guesses cannot share one attempt between them.
+
+    The ``a``-prefixed methods are for async views; like Django's own async
+    ORM methods, those that need a transaction run the sync one in a thread.
+    """
+
+    def __init__(self, ttl: timedelta = timedelta(minutes=VERIFICATION_TTL_MINUTES),
+                 max_attempts: int = MAX_VERIFICATION_ATTEMPTS):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self._issued = 0
+
+    def issue(self, phone: str, role: str, credential: str, payload: dict) -> str:
+        """Store a fresh code for ``phone``, replacing any pending one; returns the code."""
+        code = generate_code()
+        values = {
+            "code": code,
+            "credential": credential,
+            "payload": payload,
+            "expires_at": timezone.now() + self.ttl,
+            "attempts": 0,
+        }
+        manager = PhoneVerification.objects
+        if not manager.filter(phone=phone, role=role).update(**values):
+            try:
+                with transaction.atomic():
+                    manager.create(phone=phone, role=role, **values)
+            except IntegrityError:
+                manager.filter(phone=phone, role=role).update(**values)
+        self._issued += 1
+        if self._issued % SWEEP_EVERY == 0:
+            self.sweep(max_chunks=1)
+        return code
+
+    async def aissue(self, *args, **kwargs) -> str:
+        return await sync_to_async(self.issue)(*args, **kwargs)
+
+    def get(self, phone: str, role: str):
+        """The verification for ``phone``, or ``None``; check ``is_expired`` before trusting it."""
+        return PhoneVerification.objects.filter(phone=phone, role=role).first()
+
+    async def aget(self, phone: str, role: str):
+        return await PhoneVerification.objects.filter(phone=phone, role=role).afirst()
+
+    def fail(self, verification) -> int:
+        """Count one wrong code; returns the attempts left, 0 once the verification is dropped."""
+        row = PhoneVerification.objects.filter(pk=verification.pk)
+        if row.filter(attempts__lt=self.max_attempts - 1).update(attempts=F("attempts") + 1):
+            attempts = row.values_list("attempts", flat=True).first()
+            if attempts is not None:
+                return self.max_attempts - attempts
+        row.delete()
+        return 0
+
+    async def afail(self, verification) -> int:
+        return await sync_to_async(self.fail)(verification)
+
+    def consume(self, verification) -> bool:
+        """Delete ``verification`` if its code is still the one checked; ``False`` if another request got there first.
+
+        Call inside the transaction that creates the account, so only one
+        request can turn a code into an account.
+        """
+        deleted, _ = PhoneVerification.objects.filter(pk=verification.pk, code=verification.code).delete()
+        return bool(deleted)
+
+    def discard(self, verification):
+        PhoneVerification.objects.filter(pk=verification.pk).delete()
+
+    async def adiscard(self, verification):
+        await PhoneVerification.objects.filter(pk=verification.pk).adelete()
+
+    def sweep(self, chunk_size: int = SWEEP_CHUNK, max_chunks=None, now=None) -> int:
+        """Delete expired verifications ``chunk_size`` rows at a time; returns how many.
+
+        Short transactions keep signups from queueing behind one large DELETE.
+        """
+        now = now or timezone.now()
+        expired = PhoneVerification.objects.filter(expires_at__lte=now).order_by("expires_at")
+        deleted = chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            pks = list(expired.values_list("pk", flat=True)[:chunk_size])
+            if not pks:
+                break
+            count, _ = PhoneVerification.objects.filter(pk__in=pks).delete()
+            deleted += count
+            chunks += 1
+        return deleted
+
+
+otp_store = OTPStore()
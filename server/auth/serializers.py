@@ -1,14 +1,14 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.hashers import make_password
 from rest_framework import serializers
 
-from .models import MobileProfile, PhoneVerification
+from .credentials import seal
+from .models import MobileProfile
 
 class UserSignupSerializer(serializers.Serializer):
     name = serializers.CharField(max_length=255)
     email = serializers.EmailField()
     phone = serializers.CharField(max_length=20)
-    password = serializers.CharField(write_only=True, min_length=8)
+    password = serializers.CharField(write_only=True, min_length=8, max_length=128)
     date_of_birth = serializers.DateField(required=False, allow_null=True)
     favorite_locations = serializers.ListField(
         child=serializers.CharField(max_length=255),
@@ -16,20 +16,22 @@ class UserSignupSerializer(serializers.Serializer):
         allow_empty=True,
     )
 
-    def validate_phone(self, value: str) -> str:
-        if MobileProfile.objects.filter(phone=value).exists():
-            raise serializers.ValidationError("Phone number already registered.")
-        return value
+    async def acheck_available(self):
+        """Raise ``ValidationError`` if the phone or email is taken; call after ``is_valid()``.
 
-    def validate_email(self, value: str) -> str:
+        Kept out of field validation so async views can run it on the async ORM.
+        """
+        errors = {}
+        if await MobileProfile.objects.filter(phone=self.validated_data["phone"]).aexists():
+            errors["phone"] = ["Phone number already registered."]
         UserModel = get_user_model()
-        if UserModel.objects.filter(email=value).exists():
-            raise serializers.ValidationError("Email already in use.")
-        return value
+        if await UserModel.objects.filter(email=self.validated_data["email"]).aexists():
+            errors["email"] = ["Email already in use."]
+        if errors:
+            raise serializers.ValidationError(errors)
 
     def create_verification_payload(self) -> dict:
         validated = self.validated_data
-        hashed_password = make_password(validated["password"])
         date_of_birth = validated.get("date_of_birth")
         favorite_locations = validated.get("favorite_locations", [])
         if favorite_locations in (None, ""):
@@ -43,7 +45,8 @@ class UserSignupSerializer(serializers.Serializer):
         }
         return {
             "phone": validated["phone"],
-            "hashed_password": hashed_password,
+            # Hashed on account creation, not for every signup and resend
+            "credential": seal(validated["password"]),
             "payload": payload,
         }
 
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .models import MobileProfile
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, using=None, **kwargs):
+    # Read now: delete() clears the primary key, which for tokens is the key itself
+    key = instance.key
+    transaction.on_commit(lambda: token_cache.invalidate(key), using=using)
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_user_tokens(sender, instance, using=None, **kwargs):
+    token_cache.invalidate_user(instance.pk, using=using)
+
+
+@receiver(post_save, sender=MobileProfile)
+@receiver(post_delete, sender=MobileProfile)
+def forget_profile_tokens(sender, instance, using=None, **kwargs):
+    token_cache.invalidate_user(instance.user_id, using=using)
@@ -12,17 +12,42 @@ import django
 
 django.setup()
 
+import asyncio
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core import signing
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
 from django.urls import reverse
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
 try:
+    from .authentication import LOCAL_SECONDS, SHARED_PREFIX, TokenCache, token_cache
+    from .credentials import seal, unseal
     from .models import MobileProfile, PhoneVerification
 except ImportError:  # pragma: no cover - fallback when executed as script
+    from auth.authentication import LOCAL_SECONDS, SHARED_PREFIX, TokenCache, token_cache
+    from auth.credentials import seal, unseal
     from auth.models import MobileProfile, PhoneVerification
 
 
+# Keep test runs out of the development cache directory
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "auth-tests"},
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "auth-tests-shared"},
+})
 class AuthAPITestCase(APITestCase):
     def _create_mobile_account(self, *, phone: str, password: str, role: str, name: str = "Test User"):
         """Helper to seed a phone/password pair backed by a mobile profile."""
@@ -86,6 +111,80 @@ class AuthAPITestCase(APITestCase):
             PhoneVerification.objects.filter(phone=signup_payload["phone"]).exists()
         )
 
+    def test_signup_password_is_hashed_only_when_the_account_is_created(self):
+        phone = "+63 917 000 0009"
+        payload = {"name": "Lazy Hash", "email": "lazy@example.com", "phone": phone, "password": "secretpass123"}
+        with mock.patch("sakayhub_admin.hashing.make_password", wraps=make_password) as hashed:
+            self.client.post(reverse("user-signup"), payload, format="json")
+            response = self.client.post(reverse("user-signup"), payload, format="json")
+            self.assertEqual(hashed.call_count, 0)
+
+            verification = PhoneVerification.objects.get(phone=phone)
+            self.assertNotIn("secretpass123", verification.credential)
+            self.assertEqual(unseal(verification.credential, max_age=60), "secretpass123")
+            sealed = verification.credential
+            with self.assertRaises(signing.BadSignature):
+                unseal(sealed[:10] + ("B" if sealed[10] == "A" else "A") + sealed[11:], max_age=60)
+
+            code = response.data["verification_code"]
+            response = self.client.post(reverse("user-verify"), {"phone": phone, "code": code}, format="json")
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(hashed.call_count, 1)
+        self.assertTrue(get_user_model().objects.get(username=phone).check_password("secretpass123"))
+
+    def test_sealed_credentials_are_unique_and_bound_to_the_key_and_age(self):
+        first, second = seal("secretpass123"), seal("secretpass123")
+        # A fresh IV per value: the same password never seals the same way twice
+        self.assertNotEqual(first, second)
+        self.assertEqual(unseal(second, max_age=timedelta(minutes=1)), "secretpass123")
+
+        with mock.patch("cryptography.fernet.time.time", return_value=time.time() + 120):
+            with self.assertRaises(signing.BadSignature):
+                unseal(first, max_age=60)
+        with self.assertRaises(signing.BadSignature):
+            unseal("sealed$" + first[len("fernet$"):], max_age=60)
+        with override_settings(SECRET_KEY="another-secret-key"):
+            with self.assertRaises(signing.BadSignature):
+                unseal(first, max_age=60)
+        with override_settings(SECRET_KEY="another-secret-key", SECRET_KEY_FALLBACKS=[settings.SECRET_KEY]):
+            self.assertEqual(unseal(first, max_age=60), "secretpass123")
+
+    def test_wrong_codes_use_up_attempts_until_the_verification_is_dropped(self):
+        phone = "+63 917 000 0006"
+        self.client.post(
+            reverse("user-signup"),
+            {"name": "Guess Rider", "email": "guess@example.com", "phone": phone, "password": "secretpass123"},
+            format="json",
+        )
+        verification = PhoneVerification.objects.get(phone=phone)
+        wrong = f"{(int(verification.code) + 1) % 1_000_000:06d}"
+
+        for remaining in (4, 3, 2, 1):
+            response = self.client.post(reverse("user-verify"), {"phone": phone, "code": wrong}, format="json")
+            self.assertEqual(response.data["attempts_remaining"], remaining)
+        response = self.client.post(reverse("user-verify"), {"phone": phone, "code": wrong}, format="json")
+        self.assertEqual(response.data["detail"], "Too many incorrect attempts. Start over.")
+        response = self.client.post(reverse("user-verify"), {"phone": phone, "code": verification.code}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PhoneVerification.objects.filter(phone=phone).exists())
+
+    def test_sweep_deletes_expired_verifications_in_chunks(self):
+        now = timezone.now()
+        PhoneVerification.objects.bulk_create([
+            PhoneVerification(
+                phone=f"+63 917 100 {number:04d}",
+                role=MobileProfile.ROLE_USER,
+                code="123456",
+                expires_at=now + timedelta(minutes=-1 if number < 5 else 5),
+            )
+            for number in range(7)
+        ])
+
+        output = StringIO()
+        call_command("sweep_phone_verifications", "--chunk-size", "2", stdout=output)
+        self.assertIn("Deleted 5 expired verifications.", output.getvalue())
+        self.assertEqual(PhoneVerification.objects.count(), 2)
+
     def test_user_login_returns_token(self):
         phone = "+63 917 000 0002"
         password = "strongpass456"
@@ -130,6 +229,116 @@ class AuthAPITestCase(APITestCase):
         self.assertEqual(login_response.data["driver"]["role"], MobileProfile.ROLE_DRIVER)
         self.assertTrue(Token.objects.filter(user=profile.user).exists())
 
+    @override_settings(LOGIN_RATE_LIMITS={"account": (3, 900), "ip": (4, 300)})
+    def test_login_is_throttled_before_passwords_are_checked(self):
+        phone = "+63 917 000 0004"
+        self._create_mobile_account(phone=phone, password="rightpass123", role=MobileProfile.ROLE_DRIVER)
+
+        for _ in range(3):
+            response = self.client.post(reverse("driver-login"), {"phone": phone, "password": "wrong"}, format="json")
+            self.assertEqual(response.status_code, 400)
+        # The account is locked for the rider app too, and the right password is not even tried
+        with mock.patch("auth.views.aauthenticate") as authenticate:
+            response = self.client.post(reverse("user-login"), {"phone": phone, "password": "rightpass123"}, format="json")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        authenticate.assert_not_called()
+
+        # Per address: refused attempts are not counted, but the three failures are
+        other = "+63 917 000 0005"
+        self._create_mobile_account(phone=other, password="otherpass123", role=MobileProfile.ROLE_USER)
+        response = self.client.post(reverse("user-login"), {"phone": other, "password": "otherpass123"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(reverse("user-login"), {"phone": other, "password": "otherpass123"}, format="json")
+        self.assertEqual(response.status_code, 429)
+        response = self.client.post(
+            reverse("user-login"), {"phone": other, "password": "otherpass123"}, format="json", REMOTE_ADDR="10.0.0.9"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    async def test_login_views_run_on_the_event_loop_under_asgi(self):
+        phone = "+63 917 000 0008"
+        await sync_to_async(self._create_mobile_account)(
+            phone=phone, password="asyncpass123", role=MobileProfile.ROLE_DRIVER
+        )
+
+        # Concurrent logins, one of them failing, served by one event loop
+        right, wrong = await asyncio.gather(
+            self.async_client.post(
+                reverse("driver-login"), {"phone": phone, "password": "asyncpass123"}, content_type="application/json"
+            ),
+            self.async_client.post(
+                reverse("driver-login"), {"phone": phone, "password": "wrongpass123"}, content_type="application/json"
+            ),
+        )
+        self.assertEqual(right.status_code, 200)
+        self.assertEqual(right.json()["driver"]["phone"], phone)
+        self.assertEqual(wrong.status_code, 400)
+
+        response = await self.async_client.post(
+            reverse("user-signup"),
+            {"name": "Taken", "email": "taken@example.com", "phone": phone, "password": "secretpass123"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["phone"], ["Phone number already registered."])
+
+    def test_token_authentication_is_served_from_the_cache(self):
+        phone = "+63 917 000 0007"
+        profile = self._create_mobile_account(phone=phone, password="cachedpass123", role=MobileProfile.ROLE_USER)
+        token = Token.objects.create(user=profile.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        token_cache.clear()
+
+        self.assertEqual(self.client.get(reverse("user-me")).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("user-me"))
+        self.assertEqual(response.data["phone"], phone)
+        stats = token_cache.stats()
+        self.assertEqual(stats["local"]["hits"], 1)
+        self.assertEqual(stats["shared"], {"hits": 0, "misses": 1})
+        # The password hash is never copied into the shared cache
+        _, user_values, _ = caches["shared"].get(SHARED_PREFIX + token.key)
+        self.assertNotIn(profile.user.password, user_values)
+
+        # Other processes fall back to the shared cache
+        token_cache._local.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse("user-me")).status_code, 200)
+
+        # Changing the profile drops the cached copy
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.name = "Renamed Rider"
+            profile.save()
+        self.assertEqual(self.client.get(reverse("user-me")).data["name"], "Renamed Rider")
+
+        # A rider token still cannot read driver data, and logging out revokes it at once
+        self.assertEqual(self.client.get(reverse("driver-me")).status_code, 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(reverse("user-logout")).status_code, 200)
+        self.assertEqual(self.client.get(reverse("user-me")).status_code, 401)
+
+    def test_logout_in_one_process_revokes_the_token_in_the_others(self):
+        profile = self._create_mobile_account(
+            phone="+63 917 000 0010", password="sharedpass123", role=MobileProfile.ROLE_USER
+        )
+        token = Token.objects.create(user=profile.user)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        now = [0.0]
+        # Two workers: their own local tier, and separate cache instances over one shared store
+        worker = TokenCache(shared=FileBasedCache(directory.name, {}), timer=lambda: now[0])
+        other = TokenCache(shared=FileBasedCache(directory.name, {}), timer=lambda: now[0])
+        self.assertIsNotNone(worker.get(token.key))
+        self.assertIsNotNone(other.get(token.key))
+
+        key = token.key
+        token.delete()
+        other.invalidate(key)
+        now[0] += LOCAL_SECONDS + 1
+        with self.assertNumQueries(1):
+            self.assertIsNone(worker.get(key))
+
 
 if __name__ == "__main__":
     from django.conf import settings
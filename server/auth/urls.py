@@ -3,6 +3,7 @@ from django.urls import path
 from .views import (
     DriverLoginView,
     DriverMeView,
+    TokenCacheStatsView,
     UserLoginView,
     UserLogoutView,
     UserMeView,
@@ -18,4 +19,5 @@ urlpatterns = [
     path("users/me/", UserMeView.as_view(), name="user-me"),
     path("drivers/login/", DriverLoginView.as_view(), name="driver-login"),
     path("drivers/me/", DriverMeView.as_view(), name="driver-me"),
+    path("token-cache/stats/", TokenCacheStatsView.as_view(), name="token-cache-stats"),
 ]
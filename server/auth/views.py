@@ -1,16 +1,22 @@
-import random
-
-from django.contrib.auth import authenticate, get_user_model
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core import signing
 from django.db import IntegrityError, transaction
-from django.utils import timezone
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.authtoken.models import Token
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import Throttled
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import MobileProfile, PhoneVerification
+from sakayhub_admin.async_views import AsyncAPIView
+from sakayhub_admin.hashing import aauthenticate, amake_password
+from sakayhub_admin.ratelimit import LoginThrottle
+
+from .authentication import CachedTokenAuthentication, token_cache
+from .credentials import is_sealed, unseal
+from .models import MobileProfile
+from .otp import VERIFICATION_TTL_MINUTES, otp_store
 from .serializers import (
     LoginSerializer,
     MobileProfileSerializer,
@@ -18,34 +24,62 @@ from .serializers import (
     VerificationSerializer,
 )
 
-VERIFICATION_TTL_MINUTES = 10
-MAX_VERIFICATION_ATTEMPTS = 5
 
+def _start_login(request, phone: str) -> LoginThrottle:
+    """Refuse throttled logins before any password is hashed, and count this one.
 
-def _generate_otp() -> str:
-    return f"{random.randint(0, 999999):06d}"
+    Riders and drivers share one account namespace (the phone number).
+    """
+    throttle = LoginThrottle(request, phone, scope="mobile")
+    retry_after = throttle.acquire()
+    if retry_after:
+        raise Throttled(wait=retry_after)
+    return throttle
 
 
-class UserSignupView(APIView):
+def _create_account(verification, phone: str, password_hash: str):
+    """Turn ``verification`` into a rider account; returns ``(profile, error detail)``."""
+    payload = verification.payload or {}
+    UserModel = get_user_model()
+    with transaction.atomic():
+        if not otp_store.consume(verification):
+            return None, "No pending verification for this phone number."
+        try:
+            # A savepoint, so the consumed code stays consumed if this fails
+            with transaction.atomic():
+                user = UserModel.objects.create(
+                    username=phone, email=payload.get("email", "")
+                )
+        except IntegrityError:
+            return None, "Unable to create account with provided details."
+        user.first_name = payload.get("name", "")[:150]
+        user.password = password_hash
+        user.save(update_fields=["first_name", "password"])
+
+        profile = MobileProfile.objects.create(
+            user=user,
+            role=MobileProfile.ROLE_USER,
+            name=payload.get("name", ""),
+            phone=phone,
+            is_phone_verified=True,
+        )
+    return profile, None
+
+
+class UserSignupView(AsyncAPIView):
     permission_classes = [AllowAny]
 
-    def post(self, request):
+    async def post(self, request):
         serializer = UserSignupSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        await serializer.acheck_available()
         prepared = serializer.create_verification_payload()
 
-        code = _generate_otp()
-        expires_at = timezone.now() + timezone.timedelta(minutes=VERIFICATION_TTL_MINUTES)
-        PhoneVerification.objects.update_or_create(
-            phone=prepared["phone"],
-            role=MobileProfile.ROLE_USER,
-            defaults={
-                "code": code,
-                "hashed_password": prepared["hashed_password"],
-                "payload": prepared["payload"],
-                "expires_at": expires_at,
-                "attempts": 0,
-            },
+        code = await otp_store.aissue(
+            prepared["phone"],
+            MobileProfile.ROLE_USER,
+            prepared["credential"],
+            prepared["payload"],
         )
 
         # NOTE: For now return the code so QA can complete verification without SMS.
@@ -60,43 +94,37 @@ class UserSignupView(APIView):
         )
 
 
-class UserVerifyView(APIView):
+class UserVerifyView(AsyncAPIView):
     permission_classes = [AllowAny]
 
-    def post(self, request):
+    async def post(self, request):
         serializer = VerificationSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         phone = serializer.validated_data["phone"]
         code = serializer.validated_data["code"]
 
-        try:
-            verification = PhoneVerification.objects.get(
-                phone=phone, role=MobileProfile.ROLE_USER
-            )
-        except PhoneVerification.DoesNotExist:
+        verification = await otp_store.aget(phone, MobileProfile.ROLE_USER)
+        if verification is None:
             return Response(
                 {"detail": "No pending verification for this phone number."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         if verification.is_expired:
-            verification.delete()
+            await otp_store.adiscard(verification)
             return Response(
                 {"detail": "Verification code expired. Please request a new one."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         if verification.code != code:
-            verification.attempts += 1
-            if verification.attempts >= MAX_VERIFICATION_ATTEMPTS:
-                verification.delete()
+            remaining = await otp_store.afail(verification)
+            if not remaining:
                 return Response(
                     {"detail": "Too many incorrect attempts. Start over."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            verification.save(update_fields=["attempts"])
-            remaining = MAX_VERIFICATION_ATTEMPTS - verification.attempts
             return Response(
                 {
                     "detail": "Incorrect verification code.",
@@ -105,63 +133,61 @@ class UserVerifyView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        payload = verification.payload or {}
         UserModel = get_user_model()
-
-        if UserModel.objects.filter(username=phone).exists():
-            verification.delete()
+        if await UserModel.objects.filter(username=phone).aexists():
+            await otp_store.adiscard(verification)
             return Response(
                 {"detail": "Account already exists."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        with transaction.atomic():
+        # The one PBKDF2 run of the signup, now that the phone is proven
+        if is_sealed(verification.credential):
             try:
-                user = UserModel.objects.create(
-                    username=phone, email=payload.get("email", "")
-                )
-            except IntegrityError:
-                verification.delete()
+                password = unseal(verification.credential, max_age=otp_store.ttl)
+            except signing.BadSignature:
+                await otp_store.adiscard(verification)
                 return Response(
-                    {"detail": "Unable to create account with provided details."},
+                    {"detail": "Verification code expired. Please request a new one."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            user.first_name = payload.get("name", "")[:150]
-            user.password = verification.hashed_password
-            user.save(update_fields=["first_name", "password"])
-
-            profile = MobileProfile.objects.create(
-                user=user,
-                role=MobileProfile.ROLE_USER,
-                name=payload.get("name", ""),
-                phone=phone,
-                is_phone_verified=True,
-            )
+            password_hash = await amake_password(password)
+        else:
+            # Written before passwords were sealed: already a hash
+            password_hash = verification.credential
 
-            verification.delete()
+        # transaction.atomic() cannot span awaits, so the account is created in one sync call
+        profile, error = await sync_to_async(_create_account)(verification, phone, password_hash)
+        if profile is None:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
 
         response_payload = MobileProfileSerializer(profile).data
         return Response(response_payload, status=status.HTTP_201_CREATED)
 
 
-class UserLoginView(APIView):
+class UserLoginView(AsyncAPIView):
     permission_classes = [AllowAny]
 
-    def post(self, request):
+    async def post(self, request):
         serializer = LoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         phone = serializer.validated_data["phone"]
         password = serializer.validated_data["password"]
 
-        user = authenticate(request, username=phone, password=password)
+        throttle = await sync_to_async(_start_login)(request, phone)
+        user = await aauthenticate(request, phone, password)
         if user is None:
+            # Already counted against the account by _start_login()
             return Response(
                 {"detail": "Invalid phone number or password."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        await sync_to_async(throttle.succeeded)()
 
         try:
-            profile = user.mobile_profile
+            profile = await MobileProfile.objects.aget(user=user)
+            # Already loaded; the serializer reads the email from it
+            profile.user = user
         except MobileProfile.DoesNotExist:
             return Response(
                 {"detail": "Mobile account not found."},
@@ -174,7 +200,7 @@ class UserLoginView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        token, _ = Token.objects.get_or_create(user=user)
+        token, _ = await Token.objects.aget_or_create(user=user)
         return Response(
             {"token": token.key, "user": MobileProfileSerializer(profile).data},
             status=status.HTTP_200_OK,
@@ -182,7 +208,7 @@ class UserLoginView(APIView):
 
 
 class UserLogoutView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -195,7 +221,7 @@ class UserLogoutView(APIView):
 
 
 class UserMeView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -216,24 +242,29 @@ class UserMeView(APIView):
         return Response(MobileProfileSerializer(profile).data, status=status.HTTP_200_OK)
 
 
-class DriverLoginView(APIView):
+class DriverLoginView(AsyncAPIView):
     permission_classes = [AllowAny]
 
-    def post(self, request):
+    async def post(self, request):
         serializer = LoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         phone = serializer.validated_data["phone"]
         password = serializer.validated_data["password"]
 
-        user = authenticate(request, username=phone, password=password)
+        throttle = await sync_to_async(_start_login)(request, phone)
+        user = await aauthenticate(request, phone, password)
         if user is None:
+            # Already counted against the account by _start_login()
             return Response(
                 {"detail": "Invalid phone number or password."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        await sync_to_async(throttle.succeeded)()
 
         try:
-            profile = user.mobile_profile
+            profile = await MobileProfile.objects.aget(user=user)
+            # Already loaded; the serializer reads the email from it
+            profile.user = user
         except MobileProfile.DoesNotExist:
             return Response(
                 {"detail": "Driver account not found."},
@@ -246,7 +277,7 @@ class DriverLoginView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        token, _ = Token.objects.get_or_create(user=user)
+        token, _ = await Token.objects.aget_or_create(user=user)
         return Response(
             {"token": token.key, "driver": MobileProfileSerializer(profile).data},
             status=status.HTTP_200_OK,
@@ -254,7 +285,7 @@ class DriverLoginView(APIView):
 
 
 class DriverMeView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -273,3 +304,12 @@ class DriverMeView(APIView):
             )
 
         return Response(MobileProfileSerializer(profile).data, status=status.HTTP_200_OK)
+
+
+class TokenCacheStatsView(APIView):
+    """Hit and miss counts of this process's token cache, for staff."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(token_cache.stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,7 @@
+from drivers.dispatch import DispatchQueue
+
+from .models import Delivery
+from .rollups import delivery_rollup
+
+
+delivery_dispatch = DispatchQueue(Delivery, open_status="shipping", rollup=delivery_rollup)
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:21
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    Delivery = apps.get_model('deliveries', 'Delivery')
+    DeliveryDailyRollup = apps.get_model('deliveries', 'DeliveryDailyRollup')
+    db = schema_editor.connection.alias
+    rows = (
+        Delivery.objects.using(db)
+        .annotate(day=TruncDate('time', tzinfo=timezone.get_current_timezone()))
+        .values('day', 'status', vehicle=F('driver__vehicle_type'))
+        .annotate(total=Count('id'), amount=Sum('fee'))
+        .order_by()
+    )
+    DeliveryDailyRollup.objects.using(db).bulk_create([
+        DeliveryDailyRollup(
+            day=row['day'],
+            status=row['status'],
+            vehicle_type=row['vehicle'] or '',
+            count=row['total'],
+            fee_sum=row['amount'] or 0,
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0001_initial'),
+        ('drivers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('shipping', 'Shipping'), ('delivered', 'Delivered')], max_length=10)),
+                ('vehicle_type', models.CharField(blank=True, default='', max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('fee_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='delivery',
+            index=models.Index(fields=['-time', 'id'], name='deliveries_time_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='deliverydailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'status', 'vehicle_type'), name='delivery_rollup_unique_bucket'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
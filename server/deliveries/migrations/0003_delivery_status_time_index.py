@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0002_delivery_daily_rollup'),
+        ('drivers', '0011_driverapplication_stats_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='delivery',
+            index=models.Index(fields=['status', 'time'], name='deliveries_status_time_idx'),
+        ),
+    ]
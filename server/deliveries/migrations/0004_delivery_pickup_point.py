@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0003_delivery_status_time_index'),
+        ('drivers', '0013_driver_on_trip'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='delivery',
+            name='pickup_latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='delivery',
+            name='pickup_longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='delivery',
+            index=models.Index(condition=models.Q(('driver__isnull', True)), fields=['status', 'time'], name='deliveries_waiting_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from drivers.models import Driver
 
 class Delivery(models.Model):
@@ -15,5 +16,34 @@ class Delivery(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
     fee = models.DecimalField(max_digits=8, decimal_places=2)
     time = models.DateTimeField()
+    # Pickup point used by dispatch; deliveries without one are never auto-assigned
+    pickup_latitude = models.FloatField(blank=True, null=True)
+    pickup_longitude = models.FloatField(blank=True, null=True)
     proof_photo = models.ImageField(upload_to='proofs/photos/', null=True, blank=True)
-    proof_signature = models.ImageField(upload_to='proofs/signatures/', null=True, blank=True)
\ No newline at end of file
+    proof_signature = models.ImageField(upload_to='proofs/signatures/', null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-time", "id"], name="deliveries_time_id_idx"),
+            models.Index(fields=["status", "time"], name="deliveries_status_time_idx"),
+            models.Index(fields=["status", "time"], condition=Q(driver__isnull=True), name="deliveries_waiting_idx"),
+        ]
+
+
+class DeliveryDailyRollup(models.Model):
+    """Deliveries per local day, status and driver vehicle type, with fee totals.
+
+    Maintained from the Delivery receivers in ``deliveries.signals`` and
+    rebuilt by the ``backfill_delivery_rollups`` command.
+    """
+
+    day = models.DateField()
+    status = models.CharField(max_length=10, choices=Delivery.STATUS_CHOICES)
+    vehicle_type = models.CharField(max_length=20, blank=True, default="")
+    count = models.IntegerField(default=0)
+    fee_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "status", "vehicle_type"], name="delivery_rollup_unique_bucket"),
+        ]
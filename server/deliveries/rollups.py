@@ -0,0 +1,6 @@
+from sakayhub_admin.rollups import DailyRollup
+
+from .models import Delivery, DeliveryDailyRollup
+
+
+delivery_rollup = DailyRollup(DeliveryDailyRollup, Delivery, amount_field="fee_sum", source_amount="fee")
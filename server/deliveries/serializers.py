@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from deliveries.models import Delivery
+from sakayhub_admin.serialization import ValuesSerializer
 
 
 class DeliverySerializer(serializers.ModelSerializer):
@@ -30,3 +31,8 @@ class DeliverySerializer(serializers.ModelSerializer):
             return "Unassigned"
 
 
+# values()-backed twin of DeliverySerializer for list pages
+delivery_list_serializer = ValuesSerializer(
+    DeliverySerializer,
+    related={"driver": ("driver__name", "Unassigned")},
+)
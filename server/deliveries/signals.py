@@ -0,0 +1,75 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from drivers.models import Driver
+from sakayhub_admin import versions as change_versions
+from .dispatch import delivery_dispatch
+from .models import Delivery
+from .rollups import delivery_rollup
+
+
+change_versions.track(Delivery)
+
+
+@receiver(pre_save, sender=Delivery)
+def load_delivery_rollup_row(sender, instance, using=None, **kwargs):
+    instance._rollup_row = None if instance._state.adding else delivery_rollup.stored_row(instance.pk, using=using)
+
+
+@receiver(post_save, sender=Delivery)
+def update_delivery_rollup(sender, instance, using=None, **kwargs):
+    # Read the row back so the bucket key uses stored values and the driver's vehicle type
+    new_row = delivery_rollup.stored_row(instance.pk, using=using)
+    delivery_rollup.apply_change(getattr(instance, "_rollup_row", None), new_row, using=using)
+
+
+@receiver(pre_delete, sender=Delivery)
+def load_deleted_delivery_rollup_row(sender, instance, using=None, **kwargs):
+    instance._rollup_row = delivery_rollup.stored_row(instance.pk, using=using)
+
+
+@receiver(post_delete, sender=Delivery)
+def remove_delivery_rollup(sender, instance, using=None, **kwargs):
+    delivery_rollup.apply_change(getattr(instance, "_rollup_row", None), None, using=using)
+
+
+@receiver(pre_save, sender=Driver)
+def load_driver_delivery_rollup_rows(sender, instance, update_fields=None, using=None, **kwargs):
+    # Delivery buckets key on the driver's vehicle type, so a change moves the driver's deliverys
+    instance._delivery_rollup_rows = None
+    if instance._state.adding or (update_fields and "vehicle_type" not in update_fields):
+        return
+    stored = Driver.objects.using(using).filter(pk=instance.pk).values_list("vehicle_type", flat=True).first()
+    if stored is not None and stored != instance.vehicle_type:
+        instance._delivery_rollup_rows = delivery_rollup.rows_matching(using=using, driver_id=instance.pk)
+
+
+@receiver(post_save, sender=Driver)
+def rekey_driver_delivery_rollups(sender, instance, using=None, **kwargs):
+    delivery_rollup.rekey(getattr(instance, "_delivery_rollup_rows", None), using=using)
+
+
+@receiver(pre_delete, sender=Driver)
+def load_deleted_driver_delivery_rollup_rows(sender, instance, using=None, **kwargs):
+    instance._delivery_rollup_rows = delivery_rollup.rows_matching(using=using, driver_id=instance.pk)
+
+
+@receiver(post_delete, sender=Driver)
+def rekey_orphaned_delivery_rollups(sender, instance, using=None, **kwargs):
+    # The deliverys lost their driver in a bulk UPDATE that sent no signals
+    delivery_rollup.rekey(getattr(instance, "_delivery_rollup_rows", None), using=using)
+
+
+@receiver(pre_save, sender=Delivery)
+def load_delivery_driver(sender, instance, using=None, **kwargs):
+    instance._dispatch_driver_id = delivery_dispatch.stored_driver_id(instance, using=using)
+
+
+@receiver(post_save, sender=Delivery)
+def release_delivery_driver(sender, instance, using=None, **kwargs):
+    delivery_dispatch.release(instance, previous_driver_id=getattr(instance, "_dispatch_driver_id", None), using=using)
+
+
+@receiver(post_delete, sender=Delivery)
+def release_deleted_delivery_driver(sender, instance, using=None, **kwargs):
+    delivery_dispatch.release(instance, deleted=True, using=using)
@@ -3,5 +3,7 @@ from . import views
 
 urlpatterns = [
     path('list/', views.list_deliveries, name='deliveries-list'),
+    path('export/', views.export_deliveries, name='deliveries-export'),
     path('stats/', views.delivery_stats, name='deliveries-stats'),
+    path('stats/range/', views.delivery_stats_range, name='deliveries-stats-range'),
 ]
\ No newline at end of file
@@ -1,18 +1,35 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Delivery
-from .serializers import DeliverySerializer
-from .pagination import DeliveryPagination
+from drivers.models import Driver
+from .models import Delivery, DeliveryDailyRollup
+from .serializers import delivery_list_serializer
+from .pagination import DeliveryPagination, DeliveryCursorPagination
+from .rollups import delivery_rollup
+from sakayhub_admin.dates import parse_day_range
+from sakayhub_admin.export import EXPORT_RENDERERS, export_response
+from sakayhub_admin.versions import conditional
 from django.db.models import Q
 from django.utils import timezone
 
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def list_deliveries(request):
-    queryset = Delivery.objects.select_related("driver").all().order_by("-time", "id")
+EXPORT_COLUMNS = [
+    ("id", "id"),
+    ("sender", "sender"),
+    ("receiver", "receiver"),
+    ("driver", "driver__name"),
+    ("package", "package"),
+    ("pickup", "pickup"),
+    ("destination", "destination"),
+    ("status", "status"),
+    ("fee", "fee"),
+    ("time", "time"),
+]
+
+
+def _filtered_deliveries(request):
+    queryset = Delivery.objects.all().order_by("-time", "id")
     search = request.GET.get("search", "").strip()
     if search:
         queryset = queryset.filter(
@@ -22,22 +39,51 @@ def list_deliveries(request):
             | Q(pickup__icontains=search)
             | Q(destination__icontains=search)
         )
-    paginator = DeliveryPagination()
+    return queryset
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@conditional(Delivery, Driver)
+def list_deliveries(request):
+    # ?fields= / ?exclude= narrow both the payload and the SELECT
+    serializer = delivery_list_serializer.for_request(request)
+    # The cursor columns are fetched even when they are not rendered
+    queryset = serializer.values(_filtered_deliveries(request), include=DeliveryCursorPagination.ordering_fields())
+    if DeliveryCursorPagination.is_requested(request):
+        paginator = DeliveryCursorPagination()
+    else:
+        paginator = DeliveryPagination()
     page = paginator.paginate_queryset(queryset, request)
-    serializer = DeliverySerializer(page, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    return paginator.get_paginated_response(serializer.to_representation(page))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@renderer_classes(EXPORT_RENDERERS)
+def export_deliveries(request):
+    return export_response(request, _filtered_deliveries(request), EXPORT_COLUMNS, "deliveries")
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@conditional(Delivery, daily=True)
 def delivery_stats(request):
-    now = timezone.now()
-    week_start = (now - timezone.timedelta(days=now.weekday())).date()
+    today = timezone.localdate()
+    week_start = today - timezone.timedelta(days=today.weekday())
 
     active_deliveries = Delivery.objects.filter(status="shipping").count()
-    weekly_deliveries = Delivery.objects.filter(time__date__gte=week_start).count()
+    weekly_deliveries = delivery_rollup.count_between(week_start, today)
 
     return Response({
         "active_deliveries": active_deliveries,
         "weekly_deliveries": weekly_deliveries,
     })
 
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@conditional(Delivery, DeliveryDailyRollup, daily=True)
+def delivery_stats_range(request):
+    # Arbitrary ranges come from the daily rollups; today is aggregated live
+    start, end = parse_day_range(request.query_params)
+    return Response(delivery_rollup.summarize(start, end))
@@ -27,6 +27,6 @@ class DriverAdmin(admin.ModelAdmin):
 
 @admin.register(DriverApplication)
 class DriverApplicationAdmin(admin.ModelAdmin):
-    list_display = ("name", "phone", "vehicle_type", "status", "applied_at")
-    list_filter = ("vehicle_type", "status")
+    list_display = ("name", "phone", "vehicle_type", "status", "processing_status", "applied_at")
+    list_filter = ("vehicle_type", "status", "processing_status")
     search_fields = ("name", "phone", "email", "license_number")
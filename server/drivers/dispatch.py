@@ -0,0 +1,324 @@
+import time
+
+from django.db import transaction
+
+from sakayhub_admin import versions as change_versions
+
+from .locations import driver_locations, get_driver_index
+from .models import Driver
+
+
+# Only drivers this close to a pickup are considered for it
+DEFAULT_MAX_KM = 5.0
+# Nearest free drivers offered to each waiting request
+CANDIDATES_PER_REQUEST = 8
+# Waiting requests taken per queue in one batch, oldest first
+BATCH_LIMIT = 500
+# Larger connected groups of requests and drivers fall back to greedy
+# matching; the Hungarian step is cubic in the group size
+MAX_OPTIMAL_GROUP = 150
+
+STRATEGIES = ("greedy", "optimal")
+
+
+class DispatchQueue:
+    """Requests of one model that are open and still have no driver.
+
+    ``rollup`` and ``search_index`` are the model's ``DailyRollup`` and
+    ``SearchIndex``, if any: assignments are conditional ``update()`` calls
+    that send no signals, so ``assign()`` brings them up to date itself,
+    once per batch.
+    """
+
+    def __init__(self, model, open_status: str, rollup=None, search_index=None):
+        self.model = model
+        self.open_status = open_status
+        self.rollup = rollup
+        self.search_index = search_index
+
+    @property
+    def label(self) -> str:
+        return self.model._meta.model_name
+
+    def waiting(self, limit: int = BATCH_LIMIT, using=None) -> list:
+        """``(pk, latitude, longitude)`` of the oldest unassigned open requests."""
+        return list(
+            self.model.objects.using(using)
+            .filter(driver__isnull=True, status=self.open_status,
+                    pickup_latitude__isnull=False, pickup_longitude__isnull=False)
+            .order_by("time", "id")
+            .values_list("id", "pickup_latitude", "pickup_longitude")[:limit]
+        )
+
+    def claim(self, pk, driver_id: int, using=None) -> bool:
+        """Give request ``pk`` to ``driver_id`` unless either was taken meanwhile.
+
+        Both rows are claimed with conditional UPDATEs in one transaction, so
+        two dispatchers racing for the same driver or request cannot both win.
+        """
+        with transaction.atomic(using=using):
+            if not Driver.objects.using(using).filter(
+                pk=driver_id, online=True, status="active", on_trip=False
+            ).update(on_trip=True):
+                return False
+            if not self.model.objects.using(using).filter(
+                pk=pk, driver__isnull=True, status=self.open_status
+            ).update(driver_id=driver_id):
+                transaction.set_rollback(True, using=using)
+                return False
+        return True
+
+    def assign(self, pairs, using=None) -> list:
+        """Claim each ``(request pk, driver id)`` pair; returns those that stuck."""
+        old_rows = self.rollup.stored_rows([pk for pk, _ in pairs], using=using) if self.rollup else {}
+        claimed = [(pk, driver_id) for pk, driver_id in pairs if self.claim(pk, driver_id, using=using)]
+        if claimed:
+            pks = [pk for pk, _ in claimed]
+            with transaction.atomic(using=using):
+                if self.rollup:
+                    new_rows = self.rollup.stored_rows(pks, using=using)
+                    self.rollup.apply_changes(((old_rows.get(pk), new_rows.get(pk)) for pk in pks), using=using)
+                if self.search_index:
+                    self.search_index.refresh(self.model.objects.using(using).filter(pk__in=pks), using=using)
+                # The conditional updates send no post_save; list ETags must still move
+                change_versions.bump(self.model, using=using)
+        return claimed
+
+    def stored_driver_id(self, instance, using=None):
+        """The driver the stored row of ``instance`` holds, read before it is saved."""
+        if instance._state.adding:
+            return None
+        return self.model.objects.using(using).filter(pk=instance.pk).values_list("driver_id", flat=True).first()
+
+    def release(self, instance, deleted: bool = False, previous_driver_id=None, using=None):
+        """Free the driver once ``instance`` stops being an open request.
+
+        ``previous_driver_id`` is the driver the row held before this save
+        (see ``stored_driver_id()``); if the request was reassigned or its
+        driver cleared, that driver is freed too.
+        """
+        if previous_driver_id is not None and previous_driver_id != instance.driver_id:
+            self._free(previous_driver_id, instance.pk, using)
+        if instance.driver_id is None or (not deleted and instance.status == self.open_status):
+            return
+        self._free(instance.driver_id, instance.pk, using)
+
+    def _free(self, driver_id, pk, using):
+        still_busy = (
+            self.model.objects.using(using)
+            .filter(driver_id=driver_id, status=self.open_status)
+            .exclude(pk=pk)
+            .exists()
+        )
+        if not still_busy:
+            Driver.objects.using(using).filter(pk=driver_id, on_trip=True).update(on_trip=False)
+
+
+class DispatchReport:
+    """What one batch did, with the timings behind matches/sec and latency."""
+
+    def __init__(self, strategy: str):
+        self.strategy = strategy
+        self.requests = 0
+        self.candidates = 0
+        self.assignments = []  # (queue label, request pk, driver id, distance_km)
+        self.conflicts = 0
+        self.collect_seconds = 0.0
+        self.match_seconds = 0.0
+        self.commit_seconds = 0.0
+
+    @property
+    def matched(self) -> int:
+        return len(self.assignments)
+
+    @property
+    def total_km(self) -> float:
+        return sum(distance for _, _, _, distance in self.assignments)
+
+    @property
+    def latency_seconds(self) -> float:
+        return self.collect_seconds + self.match_seconds + self.commit_seconds
+
+    @property
+    def matches_per_second(self) -> float:
+        return self.matched / self.latency_seconds if self.latency_seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "requests": self.requests,
+            "candidates": self.candidates,
+            "matched": self.matched,
+            "conflicts": self.conflicts,
+            "total_km": round(self.total_km, 3),
+            "latency_ms": round(self.latency_seconds * 1000, 2),
+            "match_ms": round(self.match_seconds * 1000, 2),
+            "commit_ms": round(self.commit_seconds * 1000, 2),
+            "matches_per_second": round(self.matches_per_second, 1),
+        }
+
+
+def assign_greedy(edges) -> list:
+    """Shortest edge first; ``edges`` are ``(distance, request, driver)``."""
+    taken_requests, taken_drivers, pairs = set(), set(), []
+    for distance, request, driver in sorted(edges, key=lambda edge: edge[0]):
+        if request in taken_requests or driver in taken_drivers:
+            continue
+        taken_requests.add(request)
+        taken_drivers.add(driver)
+        pairs.append((distance, request, driver))
+    return pairs
+
+
+def _hungarian(cost) -> list:
+    """Minimum-cost assignment of every row of an ``n x m`` matrix, ``n <= m``.
+
+    The shortest augmenting path form of the Hungarian method, O(n^2 m).
+    Returns the chosen column for each row.
+    """
+    rows, cols = len(cost), len(cost[0])
+    inf = float("inf")
+    u = [0.0] * (rows + 1)
+    v = [0.0] * (cols + 1)
+    owner = [0] * (cols + 1)  # 1-based row holding each column; 0 = free
+    way = [0] * (cols + 1)
+    for row in range(1, rows + 1):
+        owner[0] = row
+        col0 = 0
+        min_slack = [inf] * (cols + 1)
+        used = [False] * (cols + 1)
+        while True:
+            used[col0] = True
+            row0 = owner[col0]
+            costs = cost[row0 - 1]
+            u_row0 = u[row0]
+            delta, col1 = inf, 0
+            for col in range(1, cols + 1):
+                if not used[col]:
+                    slack = costs[col - 1] - u_row0 - v[col]
+                    if slack < min_slack[col]:
+                        min_slack[col] = slack
+                        way[col] = col0
+                    if min_slack[col] < delta:
+                        delta, col1 = min_slack[col], col
+            for col in range(cols + 1):
+                if used[col]:
+                    u[owner[col]] += delta
+                    v[col] -= delta
+                else:
+                    min_slack[col] -= delta
+            col0 = col1
+            if owner[col0] == 0:
+                break
+        while col0:
+            col1 = way[col0]
+            owner[col0] = owner[col1]
+            col0 = col1
+    chosen = [0] * rows
+    for col in range(1, cols + 1):
+        if owner[col]:
+            chosen[owner[col] - 1] = col - 1
+    return chosen
+
+
+def _groups(edges) -> list:
+    """Split the request/driver graph into connected groups of edges."""
+    parent = {}
+
+    def find(node):
+        while parent.setdefault(node, node) != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for _, request, driver in edges:
+        parent[find(("r", request))] = find(("d", driver))
+    groups = {}
+    for edge in edges:
+        groups.setdefault(find(("r", edge[1])), []).append(edge)
+    return list(groups.values())
+
+
+def assign_optimal(edges, max_group: int = MAX_OPTIMAL_GROUP) -> list:
+    """Assignment with the least total distance among maximum matchings.
+
+    Each connected group is solved on its own; pairs that are not
+    candidates get a penalty above any real total, so the solver never
+    trades a match away to save distance.
+    """
+    pairs = []
+    for group in _groups(edges):
+        requests = list(dict.fromkeys(request for _, request, _ in group))
+        drivers = list(dict.fromkeys(driver for _, _, driver in group))
+        if len(group) == 1 or min(len(requests), len(drivers)) > max_group:
+            pairs.extend(assign_greedy(group))
+            continue
+        transpose = len(requests) > len(drivers)
+        rows, cols = (drivers, requests) if transpose else (requests, drivers)
+        row_at = {key: index for index, key in enumerate(rows)}
+        col_at = {key: index for index, key in enumerate(cols)}
+        penalty = sum(distance for distance, _, _ in group) + 1.0
+        cost = [[penalty] * len(cols) for _ in rows]
+        for distance, request, driver in group:
+            row, col = (driver, request) if transpose else (request, driver)
+            cost[row_at[row]][col_at[col]] = distance
+        for row_index, col_index in enumerate(_hungarian(cost)):
+            distance = cost[row_index][col_index]
+            if distance < penalty:
+                row, col = rows[row_index], cols[col_index]
+                request, driver = (col, row) if transpose else (row, col)
+                pairs.append((distance, request, driver))
+    return pairs
+
+
+def dispatch_batch(queues, strategy: str = "optimal", max_km: float = DEFAULT_MAX_KM,
+                   candidates: int = CANDIDATES_PER_REQUEST, limit: int = BATCH_LIMIT,
+                   index=None, using=None) -> DispatchReport:
+    """Match every waiting request in ``queues`` against free drivers, once.
+
+    Candidates come from the driver location index, which may lag the
+    database by a few seconds; ``DispatchQueue.claim()`` re-checks both
+    sides, and anything it refuses stays waiting for the next batch.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown dispatch strategy {strategy!r}")
+    report = DispatchReport(strategy)
+
+    started = time.perf_counter()
+    index = index if index is not None else get_driver_index()
+    pickups = {}
+    for queue_index, queue in enumerate(queues):
+        for pk, latitude, longitude in queue.waiting(limit, using=using):
+            pickups[(queue_index, pk)] = (latitude, longitude)
+    report.requests = len(pickups)
+    report.collect_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    edges = [
+        (distance, request, entry.driver_id)
+        for request, (latitude, longitude) in pickups.items()
+        for distance, entry in index.nearest(latitude, longitude, k=candidates, max_km=max_km)
+    ]
+    report.candidates = len(edges)
+    pairs = assign_optimal(edges) if strategy == "optimal" else assign_greedy(edges)
+    report.match_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    distances = {}
+    by_queue = {}
+    for distance, (queue_index, pk), driver_id in sorted(pairs, key=lambda pair: pair[0]):
+        distances[(queue_index, pk)] = distance
+        by_queue.setdefault(queue_index, []).append((pk, driver_id))
+    for queue_index, queue_pairs in by_queue.items():
+        queue = queues[queue_index]
+        claimed = queue.assign(queue_pairs, using=using)
+        report.conflicts += len(queue_pairs) - len(claimed)
+        for pk, driver_id in claimed:
+            report.assignments.append((queue.label, pk, driver_id, distances[(queue_index, pk)]))
+    # Busy or vanished drivers alike should not be offered again by this worker
+    for _, _, driver_id in pairs:
+        index.remove(driver_id)
+        if index is not driver_locations:
+            driver_locations.remove(driver_id)
+    report.commit_seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,240 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from sakayhub_admin import versions as change_versions
+from sakayhub_admin.thumbnails import update_thumbnails
+
+from .models import DriverApplication, DriverApplicationMotorPhoto
+from .search import application_search_index
+
+
+# (field, label used in processing_error)
+DOCUMENT_FIELDS = (
+    ("license_file", "Driver's license"),
+    ("orcr_file", "OR/CR"),
+    ("nbi_file", "NBI clearance"),
+)
+# Photos are scaled down to fit this many pixels on their longest side
+MAX_IMAGE_SIDE = 2560
+JPEG_QUALITY = 85
+# Applications left "processing" this long are assumed to have lost their worker
+STALE_AFTER = timedelta(minutes=10)
+
+# Leading bytes of each accepted upload type; Pillow names the image formats
+SIGNATURES = (
+    (b"%PDF-", "PDF"),
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+)
+
+
+class DocumentError(ValueError):
+    """An upload that is not a usable document; the message is shown to reviewers."""
+
+
+def _sniff(head: bytes):
+    for signature, kind in SIGNATURES:
+        if head.startswith(signature):
+            return kind
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP"
+    return None
+
+
+def _reencode(data: bytes, kind: str) -> bytes:
+    try:
+        image = Image.open(BytesIO(data))
+        image.load()
+    except (OSError, SyntaxError, UnidentifiedImageError, Image.DecompressionBombError):
+        raise DocumentError("the image is damaged or unreadable.") from None
+    # Phone cameras record rotation and GPS position in EXIF; apply the first, drop the rest
+    image = ImageOps.exif_transpose(image)
+    if max(image.size) > MAX_IMAGE_SIDE:
+        image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), Image.LANCZOS)
+    options = {}
+    if kind == "JPEG":
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        options = {"quality": JPEG_QUALITY, "optimize": True}
+    buffer = BytesIO()
+    image.save(buffer, format=kind, **options)
+    return buffer.getvalue()
+
+
+def normalize_document(field_file, allow_pdf: bool = True) -> str:
+    """Check one stored upload and rewrite images in a clean, bounded form.
+
+    PDFs are kept as they are. Images are decoded in full, turned upright,
+    stripped of metadata and scaled to ``MAX_IMAGE_SIDE``; the result is
+    stored next to the original, which is then deleted. Returns the
+    file's new name. Raises ``DocumentError`` for anything else.
+    """
+    with field_file.open("rb") as handle:
+        data = handle.read()
+    kind = _sniff(data[:16])
+    if kind is None:
+        raise DocumentError("not a JPEG, PNG, WebP or PDF file.")
+    if kind == "PDF":
+        if not allow_pdf:
+            raise DocumentError("expected a photo, got a PDF.")
+        return field_file.name
+    storage, old_name = field_file.storage, field_file.name
+    new_name = storage.save(old_name, ContentFile(_reencode(data, kind)))
+    storage.delete(old_name)
+    return new_name
+
+
+def accept_application(validated_data: dict, using=None) -> DriverApplication:
+    """Store a submitted application and queue its documents for processing.
+
+    The request only inserts rows: the application and its motor photos are
+    one ``bulk_create`` each, and files spooled to disk by the upload
+    handler are moved into place rather than copied. Decoding, checking and
+    rewriting the documents happens in ``process_application()`` once the
+    transaction commits.
+    """
+    motor_photos = validated_data.pop("motor_photos", [])
+    application = DriverApplication(**validated_data, processing_status="queued")
+    application.fill_name()
+    with transaction.atomic(using=using):
+        DriverApplication.objects.using(using).bulk_create([application])
+        DriverApplicationMotorPhoto.objects.using(using).bulk_create(
+            [DriverApplicationMotorPhoto(application=application, photo=photo) for photo in motor_photos]
+        )
+        # bulk_create sends no post_save; the search index and list ETags must still move
+        application_search_index.update(application, using=using)
+        change_versions.bump(DriverApplication, DriverApplicationMotorPhoto, using=using)
+        transaction.on_commit(lambda: document_pipeline.submit(application.pk, using=using), using=using)
+    return application
+
+
+def process_application(pk, using=None):
+    """Validate and normalize one queued application's documents.
+
+    The application is claimed with a conditional UPDATE, so a retry sweep
+    racing a pool worker cannot process it twice. Ends with the application
+    ``ready``, or ``failed`` with every problem listed in
+    ``processing_error``; ready applications also get their thumbnails.
+    Returns the final state, or ``None`` when the application was not
+    waiting to be processed.
+    """
+    manager = DriverApplication.objects.using(using)
+    claimed = manager.filter(pk=pk, processing_status="queued").update(
+        processing_status="processing", processing_started_at=timezone.now()
+    )
+    if not claimed:
+        return None
+    application = manager.get(pk=pk)
+    errors = []
+    renamed = {}
+    motor_photos = list(application.motor_photos.using(using).order_by("id"))
+    photos = []
+    try:
+        for field, label in DOCUMENT_FIELDS:
+            field_file = getattr(application, field)
+            if not field_file:
+                continue
+            try:
+                name = normalize_document(field_file)
+            except DocumentError as exc:
+                errors.append(f"{label}: {exc}")
+            else:
+                if name != field_file.name:
+                    renamed[field] = name
+        for number, photo in enumerate(motor_photos, start=1):
+            try:
+                name = normalize_document(photo.photo, allow_pdf=False)
+            except DocumentError as exc:
+                errors.append(f"Motor photo {number}: {exc}")
+            else:
+                if name != photo.photo.name:
+                    photo.photo.name = name
+                    photos.append(photo)
+    except Exception as exc:
+        # Storage trouble rather than a bad upload; the retry sweep can pick it up again
+        errors.append(f"Could not process documents: {exc}")
+
+    state = "failed" if errors else "ready"
+    with transaction.atomic(using=using):
+        manager.filter(pk=pk).update(
+            processing_status=state,
+            processing_error="\n".join(errors),
+            processed_at=timezone.now(),
+            **renamed,
+        )
+        if photos:
+            DriverApplicationMotorPhoto.objects.using(using).bulk_update(photos, ["photo"])
+        change_versions.bump(DriverApplication, DriverApplicationMotorPhoto, using=using)
+
+    if state == "ready":
+        for field, name in renamed.items():
+            getattr(application, field).name = name
+        update_thumbnails(application, [field for field, _ in DOCUMENT_FIELDS], using=using)
+        for photo in motor_photos:
+            update_thumbnails(photo, ["photo"], using=using)
+    return state
+
+
+def requeue(include_failed: bool = False, stale_after: timedelta = STALE_AFTER, using=None) -> list:
+    """Put stalled (and optionally failed) applications back in the queue; returns their pks."""
+    states = ["processing", "failed"] if include_failed else ["processing"]
+    stalled = DriverApplication.objects.using(using).filter(processing_status__in=states)
+    # Failed ones are retried whatever their age; "processing" ones only once
+    # their worker has had the row for longer than stale_after
+    stalled = stalled.exclude(
+        processing_status="processing", processing_started_at__gt=timezone.now() - stale_after
+    )
+    pks = list(stalled.values_list("id", flat=True))
+    if pks:
+        # Rows that finished in the meantime keep their result
+        DriverApplication.objects.using(using).filter(pk__in=pks, processing_status__in=states).update(
+            processing_status="queued"
+        )
+        change_versions.bump(DriverApplication, using=using)
+    return pks
+
+
+class DocumentPipeline:
+    """Runs ``process_application()`` on a small process-wide thread pool.
+
+    ``DRIVER_DOCUMENT_WORKERS`` sizes the pool; ``0`` processes inline,
+    which is what tests and one-off scripts want. Work lost with the
+    process is recovered by ``manage.py process_driver_documents``.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _run(self, pk, using):
+        try:
+            return process_application(pk, using=using)
+        finally:
+            # Pool threads outlive the request cycle that would normally close these
+            connections.close_all()
+
+    def submit(self, pk, using=None):
+        workers = getattr(settings, "DRIVER_DOCUMENT_WORKERS", 2)
+        if workers <= 0:
+            return process_application(pk, using=using)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="driver-documents")
+            return self._executor.submit(self._run, pk, using)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+document_pipeline = DocumentPipeline()
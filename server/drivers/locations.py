@@ -0,0 +1,329 @@
+import heapq
+import math
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from sakayhub_admin.geo import KM_PER_DEGREE, haversine_km
+from .models import Driver
+
+
+# ~1.1 km cells: a 2 km radius query touches about 25 of them
+CELL_DEGREES = 0.01
+
+VEHICLE_TYPES = tuple(choice for choice, _ in Driver.VEHICLE_CHOICES)
+_VEHICLE_CODES = {vehicle_type: code for code, vehicle_type in enumerate(VEHICLE_TYPES)}
+
+SNAPSHOT_MAGIC = b"SKDL1"
+_HEADER = struct.Struct("<5sdI")
+_RECORD = struct.Struct("<qddB")
+
+
+class DriverPosition:
+    __slots__ = ("driver_id", "latitude", "longitude", "vehicle_type", "cell")
+
+    def __init__(self, driver_id: int, latitude: float, longitude: float, vehicle_type: str, cell):
+        self.driver_id = driver_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.vehicle_type = vehicle_type
+        self.cell = cell
+
+
+def is_dispatchable(online, status, latitude, longitude, on_trip=False) -> bool:
+    """Only online, active, free drivers with a known position are indexed."""
+    return (
+        bool(online) and status == "active" and not on_trip
+        and latitude is not None and longitude is not None
+    )
+
+
+class DriverLocationIndex:
+    """Uniform grid of dispatchable drivers, one grid per vehicle type.
+
+    Cells are ``CELL_DEGREES`` squares keyed by ``(row, col)``; each holds a
+    dict of ``DriverPosition`` entries by driver id. Radius queries visit the
+    cells under the query's bounding box; k-nearest queries walk rings of
+    cells outwards and stop once no unvisited cell can beat the k-th hit.
+    The index only ever holds drivers that pass ``is_dispatchable()``, so
+    queries filter on vehicle type alone.
+    """
+
+    def __init__(self, cell_degrees: float = CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._grids = {vehicle_type: {} for vehicle_type in VEHICLE_TYPES}
+        self._entries = {}
+        self._counts = dict.fromkeys(VEHICLE_TYPES, 0)
+        self._lock = threading.Lock()
+        self.loaded_at = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, driver_id) -> bool:
+        return driver_id in self._entries
+
+    def _cell(self, latitude: float, longitude: float):
+        return (math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees))
+
+    # -- writes ------------------------------------------------------------
+
+    def update(self, driver_id: int, latitude, longitude, vehicle_type: str, online=True, status="active",
+               on_trip=False):
+        """Insert, move or drop one driver depending on whether it is dispatchable."""
+        if not is_dispatchable(online, status, latitude, longitude, on_trip) or vehicle_type not in self._grids:
+            self.remove(driver_id)
+            return
+        cell = self._cell(latitude, longitude)
+        with self._lock:
+            entry = self._entries.get(driver_id)
+            if entry is not None and (entry.cell != cell or entry.vehicle_type != vehicle_type):
+                self._discard(entry)
+                entry = None
+            if entry is None:
+                entry = DriverPosition(driver_id, latitude, longitude, vehicle_type, cell)
+                self._entries[driver_id] = entry
+                self._counts[vehicle_type] += 1
+                self._grids[vehicle_type].setdefault(cell, {})[driver_id] = entry
+            else:
+                entry.latitude, entry.longitude = latitude, longitude
+
+    def remove(self, driver_id: int):
+        with self._lock:
+            entry = self._entries.get(driver_id)
+            if entry is not None:
+                self._discard(entry)
+
+    def _discard(self, entry):
+        if self._entries.pop(entry.driver_id, None) is not None:
+            self._counts[entry.vehicle_type] -= 1
+        grid = self._grids[entry.vehicle_type]
+        bucket = grid.get(entry.cell)
+        if bucket is not None:
+            bucket.pop(entry.driver_id, None)
+            if not bucket:
+                del grid[entry.cell]
+
+    def clear(self):
+        with self._lock:
+            self._grids = {vehicle_type: {} for vehicle_type in VEHICLE_TYPES}
+            self._entries = {}
+            self._counts = dict.fromkeys(VEHICLE_TYPES, 0)
+
+    def rebuild(self, using=None) -> int:
+        """Reload every dispatchable driver from the database."""
+        rows = (
+            Driver.objects.using(using)
+            .filter(online=True, status="active", on_trip=False, latitude__isnull=False, longitude__isnull=False)
+            .values_list("id", "latitude", "longitude", "vehicle_type")
+        )
+        self._load(rows)
+        return len(self)
+
+    def refresh(self, driver_ids, using=None):
+        """Re-read ``driver_ids`` after a write that sent no ``post_save``, such as a bulk status change."""
+        # Until the first query loads it, the index has nothing to keep current
+        if self.loaded_at is None or not driver_ids:
+            return
+        rows = (
+            Driver.objects.using(using)
+            .filter(pk__in=driver_ids)
+            .values_list("id", "latitude", "longitude", "vehicle_type", "online", "status", "on_trip")
+        )
+        seen = set()
+        for driver_id, latitude, longitude, vehicle_type, online, status, on_trip in rows:
+            seen.add(driver_id)
+            self.update(driver_id, latitude, longitude, vehicle_type, online=online, status=status, on_trip=on_trip)
+        for driver_id in set(driver_ids) - seen:
+            self.remove(driver_id)
+
+    def _load(self, records):
+        grids = {vehicle_type: {} for vehicle_type in VEHICLE_TYPES}
+        entries = {}
+        counts = dict.fromkeys(VEHICLE_TYPES, 0)
+        for driver_id, latitude, longitude, vehicle_type in records:
+            if vehicle_type not in grids:
+                continue
+            cell = self._cell(latitude, longitude)
+            entry = DriverPosition(driver_id, latitude, longitude, vehicle_type, cell)
+            entries[driver_id] = entry
+            counts[vehicle_type] += 1
+            grids[vehicle_type].setdefault(cell, {})[driver_id] = entry
+        with self._lock:
+            self._grids, self._entries, self._counts = grids, entries, counts
+            self.loaded_at = time.time()
+
+    # -- queries -------------------------------------------------------------
+
+    def _grids_for(self, vehicle_type):
+        if vehicle_type is None:
+            return list(self._grids.values())
+        grid = self._grids.get(vehicle_type)
+        return [grid] if grid is not None else []
+
+    def within(self, latitude: float, longitude: float, radius_km: float, vehicle_type=None, limit=None) -> list:
+        """``(distance_km, DriverPosition)`` pairs inside ``radius_km``, nearest first."""
+        with self._lock:
+            return self._within(latitude, longitude, radius_km, vehicle_type, limit)
+
+    def _within(self, latitude, longitude, radius_km, vehicle_type, limit):
+        grids = self._grids_for(vehicle_type)
+        lat_span = radius_km / KM_PER_DEGREE
+        lng_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(min(89.0, abs(latitude) + lat_span))), 1e-6))
+        row_min, col_min = self._cell(latitude - lat_span, longitude - lng_span)
+        row_max, col_max = self._cell(latitude + lat_span, longitude + lng_span)
+
+        hits = []
+        for grid in grids:
+            if not grid:
+                continue
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    bucket = grid.get((row, col))
+                    if not bucket:
+                        continue
+                    for entry in bucket.values():
+                        distance = haversine_km(latitude, longitude, entry.latitude, entry.longitude)
+                        if distance <= radius_km:
+                            hits.append((distance, entry.driver_id, entry))
+        hits.sort()
+        if limit is not None:
+            hits = hits[:limit]
+        return [(distance, entry) for distance, _, entry in hits]
+
+    def nearest(self, latitude: float, longitude: float, k: int = 5, vehicle_type=None, max_km=None) -> list:
+        """The ``k`` closest drivers as ``(distance_km, DriverPosition)`` pairs, nearest first."""
+        with self._lock:
+            return self._nearest(latitude, longitude, k, vehicle_type, max_km)
+
+    def _nearest(self, latitude, longitude, k, vehicle_type, max_km):
+        grids = [grid for grid in self._grids_for(vehicle_type) if grid]
+        if k <= 0 or not grids:
+            return []
+        center_row, center_col = self._cell(latitude, longitude)
+        cell_km = self.cell_degrees * KM_PER_DEGREE
+        total = len(self._entries) if vehicle_type is None else self._counts.get(vehicle_type, 0)
+        remaining = total
+
+        best = []  # min-heap of the k best so far, as (-distance, -driver_id, entry)
+
+        def consider(entry):
+            distance = haversine_km(latitude, longitude, entry.latitude, entry.longitude)
+            if max_km is not None and distance > max_km:
+                return
+            item = (-distance, -entry.driver_id, entry)
+            if len(best) < k:
+                heapq.heappush(best, item)
+            elif item > best[0]:
+                heapq.heapreplace(best, item)
+
+        ring = 0
+        while remaining:
+            if (2 * ring + 1) ** 2 * len(grids) > 4 * total + 64:
+                # The rings have grown past the data (sparse or far-away drivers): scan what is left
+                best.clear()
+                for grid in grids:
+                    for bucket in grid.values():
+                        for entry in bucket.values():
+                            consider(entry)
+                break
+            for row, col in _ring_cells(center_row, center_col, ring):
+                for grid in grids:
+                    bucket = grid.get((row, col))
+                    if not bucket:
+                        continue
+                    remaining -= len(bucket)
+                    for entry in bucket.values():
+                        consider(entry)
+            # Anything not yet visited lies at least ``ring`` whole cells away
+            lng_scale = math.cos(math.radians(min(89.0, abs(latitude) + (ring + 1) * self.cell_degrees)))
+            floor_km = ring * cell_km * lng_scale
+            if max_km is not None and floor_km > max_km:
+                break
+            if len(best) == k and floor_km >= -best[0][0]:
+                break
+            ring += 1
+        return [(-neg_distance, entry) for neg_distance, _, entry in sorted(best, reverse=True)]
+
+    # -- snapshots -------------------------------------------------------------
+
+    def snapshot(self, path) -> int:
+        """Write the index to ``path`` atomically as fixed-size binary records."""
+        with self._lock:
+            entries = list(self._entries.values())
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".driver-index-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(_HEADER.pack(SNAPSHOT_MAGIC, time.time(), len(entries)))
+                for entry in entries:
+                    handle.write(_RECORD.pack(
+                        entry.driver_id, entry.latitude, entry.longitude, _VEHICLE_CODES[entry.vehicle_type]
+                    ))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return len(entries)
+
+    def restore(self, path) -> float:
+        """Load a snapshot written by ``snapshot()``; returns when it was taken."""
+        with open(path, "rb") as handle:
+            data = handle.read()
+        magic, taken_at, count = _HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or len(data) != _HEADER.size + count * _RECORD.size:
+            raise ValueError(f"{path} is not a driver index snapshot")
+        self._load(
+            (driver_id, latitude, longitude, VEHICLE_TYPES[code])
+            for driver_id, latitude, longitude, code in _RECORD.iter_unpack(data[_HEADER.size:])
+        )
+        self.loaded_at = taken_at
+        return taken_at
+
+
+def _ring_cells(row: int, col: int, ring: int):
+    if ring == 0:
+        yield row, col
+        return
+    for offset in range(-ring, ring + 1):
+        yield row - ring, col + offset
+        yield row + ring, col + offset
+    for offset in range(-ring + 1, ring):
+        yield row + offset, col - ring
+        yield row + offset, col + ring
+
+
+def snapshot_path():
+    return getattr(settings, "DRIVER_INDEX_SNAPSHOT", os.path.join(settings.BASE_DIR, "var", "driver-index.bin"))
+
+
+# Positions reach this worker's index through the Driver signals; a full
+# reload every MAX_AGE_SECONDS picks up writes made by other workers.
+MAX_AGE_SECONDS = 30
+
+driver_locations = DriverLocationIndex()
+_load_lock = threading.Lock()
+
+
+def get_driver_index(max_age: float = MAX_AGE_SECONDS) -> DriverLocationIndex:
+    """The process-wide index, loaded from a fresh snapshot or the database on demand."""
+    if driver_locations.loaded_at is not None and time.time() - driver_locations.loaded_at < max_age:
+        return driver_locations
+    with _load_lock:
+        if driver_locations.loaded_at is None:
+            path = snapshot_path()
+            try:
+                if time.time() - os.path.getmtime(path) < max_age:
+                    driver_locations.restore(path)
+                    return driver_locations
+            except (OSError, ValueError, struct.error):
+                pass
+        if driver_locations.loaded_at is None or time.time() - driver_locations.loaded_at >= max_age:
+            driver_locations.rebuild()
+    return driver_locations
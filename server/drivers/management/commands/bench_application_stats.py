@@ -0,0 +1,100 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from drivers import stats as driver_stats
+from drivers.models import DriverApplication
+
+
+STATUS_CHOICES = ["pending", "under_review", "approved", "rejected"]
+# Most applications are settled; only a small share is still open
+STATUS_WEIGHTS = [3, 2, 60, 35]
+SPREAD_DAYS = 365
+
+
+def legacy_application_stats():
+    """The previous implementation: four COUNTs, two of them over applied_at__date."""
+    now = timezone.now()
+    today = now.date()
+    month_start = today.replace(day=1)
+    return {
+        "pending": DriverApplication.objects.filter(status="pending").count(),
+        "under_review": DriverApplication.objects.filter(status="under_review").count(),
+        "approved_today": DriverApplication.objects.filter(status="approved", applied_at__date=today).count(),
+        "total_month": DriverApplication.objects.filter(applied_at__date__gte=month_start).count(),
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark driver_application_stats against seeded applications (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=100_000, help="Number of applications to seed")
+        parser.add_argument("--iterations", type=int, default=20, help="Timed runs per implementation")
+
+    def handle(self, *args, **options):
+        count: int = options["count"]
+        iterations: int = options["iterations"]
+
+        with transaction.atomic():
+            self._seed(count)
+            for label, func in (("legacy", legacy_application_stats), ("single-pass", driver_stats.application_stats)):
+                self._measure(label, func, iterations)
+            self._explain()
+            transaction.set_rollback(True)
+
+    def _seed(self, count: int):
+        started = time.perf_counter()
+        rng = random.Random(7)
+        batch = [
+            DriverApplication(
+                reference_number=f"BENCH-{index:08d}",
+                first_name="Bench",
+                last_name=str(index),
+                name=f"Bench {index}",
+                email=f"bench{index}@example.com",
+                phone=f"+63 900 {index:07d}",
+                status=rng.choices(STATUS_CHOICES, weights=STATUS_WEIGHTS, k=1)[0],
+            )
+            for index in range(count)
+        ]
+        DriverApplication.objects.bulk_create(batch, batch_size=2000)
+
+        # applied_at is auto_now_add, so spread the rows over the past year afterwards
+        ids = list(DriverApplication.objects.order_by("id").values_list("id", flat=True))
+        step = max(1, len(ids) // SPREAD_DAYS)
+        now = timezone.now()
+        for day, offset in enumerate(range(0, len(ids), step)):
+            chunk = ids[offset:offset + step]
+            DriverApplication.objects.filter(id__gte=chunk[0], id__lte=chunk[-1]).update(
+                applied_at=now - timedelta(days=day % SPREAD_DAYS, minutes=day)
+            )
+        self.stdout.write(f"Seeded {count} applications in {time.perf_counter() - started:.1f}s")
+
+    def _measure(self, label: str, func, iterations: int):
+        func()  # warm caches
+        timings = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(iterations):
+                started = time.perf_counter()
+                result = func()
+                timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f"{label:>12}: {len(queries) // iterations} queries, "
+            f"median {timings[len(timings) // 2]:.2f} ms, max {timings[-1]:.2f} ms -> {result}"
+        )
+
+    def _explain(self):
+        with CaptureQueriesContext(connection) as queries:
+            driver_stats.application_stats()
+        sql = queries.captured_queries[-1]["sql"]
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            for row in cursor.fetchall():
+                self.stdout.write(f"  plan: {row[-1]}")
@@ -0,0 +1,77 @@
+import os
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from drivers.locations import VEHICLE_TYPES, DriverLocationIndex
+from sakayhub_admin.geo import haversine_km
+
+
+# Roughly Metro Manila
+LAT_RANGE = (14.35, 14.80)
+LNG_RANGE = (120.90, 121.15)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the driver location index against a linear scan (no database access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--drivers", type=int, default=20_000, help="Synthetic online drivers")
+        parser.add_argument("--queries", type=int, default=2_000, help="Queries per measurement")
+        parser.add_argument("--k", type=int, default=5)
+        parser.add_argument("--radius", type=float, default=2.0, help="Radius query size in km")
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        positions = [
+            (driver_id, rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE), rng.choice(VEHICLE_TYPES))
+            for driver_id in range(1, options["drivers"] + 1)
+        ]
+        points = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(options["queries"])]
+        k, radius = options["k"], options["radius"]
+
+        index = DriverLocationIndex()
+        started = time.perf_counter()
+        for driver_id, latitude, longitude, vehicle_type in positions:
+            index.update(driver_id, latitude, longitude, vehicle_type)
+        self.stdout.write(f"Indexed {len(index)} drivers in {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+        def scan_nearest(latitude, longitude):
+            return sorted((haversine_km(latitude, longitude, lat, lng), driver_id)
+                          for driver_id, lat, lng, _ in positions)[:k]
+
+        def scan_within(latitude, longitude):
+            return sorted(hit for hit in (
+                (haversine_km(latitude, longitude, lat, lng), driver_id) for driver_id, lat, lng, _ in positions
+            ) if hit[0] <= radius)
+
+        scan_points = points[: max(1, len(points) // 20)]
+        self.stdout.write(f"{'query':>12} {'index µs':>10} {'scan µs':>10} {'speedup':>8}")
+        for label, indexed, scanned in (
+            (f"nearest {k}", lambda lat, lng: index.nearest(lat, lng, k=k), scan_nearest),
+            (f"within {radius:g}km", lambda lat, lng: index.within(lat, lng, radius), scan_within),
+        ):
+            fast = self._per_query(indexed, points)
+            slow = self._per_query(scanned, scan_points)
+            self.stdout.write(f"{label:>12} {fast * 1e6:>10.1f} {slow * 1e6:>10.1f} {slow / fast:>7.0f}x")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "driver-index.bin")
+            started = time.perf_counter()
+            index.snapshot(path)
+            written = time.perf_counter() - started
+            started = time.perf_counter()
+            DriverLocationIndex().restore(path)
+            restored = time.perf_counter() - started
+            self.stdout.write(
+                f"Snapshot {os.path.getsize(path) / 1024:.0f} KiB: "
+                f"write {written * 1e3:.1f} ms, restore {restored * 1e3:.1f} ms"
+            )
+
+    def _per_query(self, func, points) -> float:
+        started = time.perf_counter()
+        for latitude, longitude in points:
+            func(latitude, longitude)
+        return (time.perf_counter() - started) / len(points)
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from drivers.documents import DOCUMENT_FIELDS
+from drivers.models import PHOTO_FIELDS, Driver, DriverApplication, DriverApplicationMotorPhoto
+from sakayhub_admin import versions as change_versions
+from sakayhub_admin.thumbnails import update_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Create missing thumbnails for driver photos and application documents"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebuild thumbnails that look current too")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        document_fields = tuple(field for field, _ in DOCUMENT_FIELDS)
+        has_any = lambda fields: Q(*(Q(**{f"{field}__gt": ""}) for field in fields), _connector=Q.OR)
+        targets = (
+            ("drivers", Driver.objects.filter(has_any(PHOTO_FIELDS)), PHOTO_FIELDS),
+            # Queued and failed applications get theirs from the document pipeline
+            (
+                "applications",
+                DriverApplication.objects.filter(has_any(document_fields), processing_status="ready"),
+                document_fields,
+            ),
+            (
+                "motor photos",
+                DriverApplicationMotorPhoto.objects.filter(application__processing_status="ready"),
+                ("photo",),
+            ),
+        )
+        for label, queryset, fields in targets:
+            updated = 0
+            rows = queryset.order_by("pk").only("pk", "thumbnails", *fields).iterator(chunk_size=options["chunk_size"])
+            for instance in rows:
+                if update_thumbnails(instance, fields, force=options["force"], bump=False):
+                    updated += 1
+            if updated:
+                change_versions.bump(queryset.model)
+            self.stdout.write(self.style.SUCCESS(f"Updated thumbnails for {updated} {label}."))
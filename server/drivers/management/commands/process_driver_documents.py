@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from drivers.documents import process_application, requeue
+from drivers.models import DriverApplication
+
+
+class Command(BaseCommand):
+    help = "Process queued driver application documents, retrying stalled ones (run periodically)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retry-failed", action="store_true", help="Also retry applications that failed")
+        parser.add_argument(
+            "--stale-minutes", type=int, default=10,
+            help="Treat applications stuck in processing for this long as abandoned",
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue(
+            include_failed=options["retry_failed"],
+            stale_after=timedelta(minutes=options["stale_minutes"]),
+        )
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {len(requeued)} stalled applications."))
+
+        outcomes = {"ready": 0, "failed": 0}
+        queued = DriverApplication.objects.filter(processing_status="queued").order_by("applied_at", "id")
+        for pk in queued.values_list("id", flat=True):
+            state = process_application(pk)
+            if state is not None:
+                outcomes[state] += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {outcomes['ready'] + outcomes['failed']} applications: "
+            f"{outcomes['ready']} ready, {outcomes['failed']} failed."
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from drivers.search import application_search_index, driver_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search indexes used by the drivers and applications list endpoints"
+
+    def handle(self, *args, **options):
+        indexed = driver_search_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} drivers."))
+        indexed = application_search_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} driver applications."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from drivers import stats as driver_stats
+from drivers.models import DriverStats
+
+
+class Command(BaseCommand):
+    help = "Recompute the driver dashboard counters from the drivers table (run periodically)"
+
+    def handle(self, *args, **options):
+        before = DriverStats.objects.filter(pk=DriverStats.SINGLETON_ID).first()
+        after = driver_stats.reconcile()
+
+        if before is not None:
+            drift = {
+                field: (getattr(before, field), getattr(after, field))
+                for field in ("total", "online", "verified", "earnings_sum")
+                if getattr(before, field) != getattr(after, field)
+            }
+            if abs(before.rating_sum - after.rating_sum) > 1e-6:
+                drift["rating_sum"] = (before.rating_sum, after.rating_sum)
+            for field, (old, new) in drift.items():
+                self.stdout.write(self.style.WARNING(f"Corrected {field}: {old} -> {new}"))
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled driver stats for {after.total} drivers."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from drivers.locations import DriverLocationIndex, snapshot_path
+
+
+class Command(BaseCommand):
+    help = "Write the online-driver location index to disk so new workers can start from it"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", help="Snapshot file (defaults to settings.DRIVER_INDEX_SNAPSHOT)")
+
+    def handle(self, *args, **options):
+        path = options["path"] or snapshot_path()
+        index = DriverLocationIndex()
+        index.rebuild()
+        written = index.snapshot(path)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} driver positions to {path}."))
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends keep using icontains lookups
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS drivers_driver_search USING fts5("
+        "name, email, phone, plate_number, license_number, "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO drivers_driver_search (rowid, name, email, phone, plate_number, license_number) "
+        "SELECT id, name, email, phone, COALESCE(plate_number, ''), COALESCE(license_number, '') "
+        "FROM drivers_driver"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS drivers_driver_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0008_merge_20251024_2204'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:15
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+
+def seed_driver_stats(apps, schema_editor):
+    Driver = apps.get_model('drivers', 'Driver')
+    DriverStats = apps.get_model('drivers', 'DriverStats')
+    db = schema_editor.connection.alias
+    aggregate = Driver.objects.using(db).aggregate(
+        total=Count('id'),
+        online=Count('id', filter=Q(online=True)),
+        verified=Count('id', filter=Q(license_status='verified')),
+        rating_sum=Sum('rating'),
+        earnings_sum=Sum('earnings'),
+    )
+    DriverStats.objects.using(db).create(
+        pk=1,
+        total=aggregate['total'] or 0,
+        online=aggregate['online'] or 0,
+        verified=aggregate['verified'] or 0,
+        rating_sum=aggregate['rating_sum'] or 0,
+        earnings_sum=aggregate['earnings_sum'] or 0,
+        reconciled_at=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0009_driver_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('online', models.IntegerField(default=0)),
+                ('verified', models.IntegerField(default=0)),
+                ('rating_sum', models.FloatField(default=0)),
+                ('earnings_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'driver stats',
+            },
+        ),
+        migrations.RunPython(seed_driver_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0010_driverstats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='driverapplication',
+            index=models.Index(fields=['status', 'applied_at'], name='drivers_app_status_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driverapplication',
+            index=models.Index(fields=['applied_at'], name='drivers_app_applied_at_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0011_driverapplication_stats_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driver',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='driver',
+            name='location_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='driver',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
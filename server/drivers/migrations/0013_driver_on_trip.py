@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0012_driver_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driver',
+            name='on_trip',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0013_driver_on_trip'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driverapplication',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='driverapplication',
+            name='processing_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='driverapplication',
+            name='processing_status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='driverapplication',
+            index=models.Index(condition=models.Q(('processing_status__in', ['queued', 'processing'])), fields=['processing_status', 'applied_at'], name='drivers_app_processing_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends keep using icontains lookups
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS drivers_application_search USING fts5("
+        "reference_number, name, email, phone, license_plate, "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO drivers_application_search (rowid, reference_number, name, email, phone, license_plate) "
+        "SELECT id, reference_number, name, email, phone, license_plate FROM drivers_driverapplication"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS drivers_application_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0015_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='driverapplication',
+            index=models.Index(fields=['vehicle_type', 'applied_at'], name='drivers_app_vehicle_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0016_application_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driverapplication',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -45,6 +45,14 @@ class Driver(models.Model):
     date_of_birth = models.DateField(blank=True, null=True)
     join_date = models.DateField()
     last_active = models.DateTimeField()
+    # Last reported position; see drivers.locations for the in-memory index
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    location_updated_at = models.DateTimeField(blank=True, null=True)
+    # Held by the dispatch engine while the driver has an open ride or delivery
+    on_trip = models.BooleanField(default=False)
+    # Resized copies of the photos, by field; see sakayhub_admin.thumbnails
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         constraints = [
@@ -71,6 +79,40 @@ class Driver(models.Model):
         self.full_clean()
         return super().save(*args, **kwargs)
 
+    def stats_values(self):
+        return tuple(getattr(self, name) for name in STATS_FIELDS)
+
+
+# Driver columns that feed the running totals in DriverStats
+STATS_FIELDS = ("online", "license_status", "rating", "earnings")
+# Fields written by driver position updates
+LOCATION_FIELDS = ("latitude", "longitude", "location_updated_at")
+# Image fields that get thumbnails
+PHOTO_FIELDS = ("license_photo", "profile_photo")
+
+
+class DriverStats(models.Model):
+    """Single-row running totals behind the drivers dashboard cards.
+
+    Kept current by the Driver save/delete receivers in ``drivers.signals``
+    and recomputed from scratch by the ``reconcile_driver_stats`` command.
+    """
+
+    SINGLETON_ID = 1
+
+    total = models.IntegerField(default=0)
+    online = models.IntegerField(default=0)
+    verified = models.IntegerField(default=0)
+    rating_sum = models.FloatField(default=0)
+    earnings_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "driver stats"
+
+    def __str__(self) -> str:
+        return f"Driver stats ({self.total} drivers)"
+
 
 def generate_application_reference() -> str:
     return f"APP-{uuid.uuid4().hex[:8].upper()}"
@@ -84,6 +126,14 @@ class DriverApplication(models.Model):
         ('rejected', 'Rejected'),
     ]
 
+    # Where the uploaded documents are in the background pipeline (drivers/documents.py)
+    PROCESSING_CHOICES = [
+        ('queued', 'Queued'),
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
     VEHICLE_CHOICES = [
         ('sedan', 'Sedan'),
         ('suv', 'SUV'),
@@ -114,14 +164,34 @@ class DriverApplication(models.Model):
     orcr_file = models.FileField(upload_to='driver_applications/orcr/', null=True, blank=True)
     nbi_file = models.FileField(upload_to='driver_applications/nbi/', null=True, blank=True)
     status = models.CharField(max_length=12, choices=APPLICATION_STATUS_CHOICES, default='pending')
+    processing_status = models.CharField(max_length=10, choices=PROCESSING_CHOICES, default='ready')
+    processing_error = models.TextField(blank=True)
+    # When a worker last claimed it; "processing" rows are judged stale from here
+    processing_started_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         ordering = ['-applied_at']
+        indexes = [
+            models.Index(fields=['status', 'applied_at'], name='drivers_app_status_applied_idx'),
+            models.Index(fields=['applied_at'], name='drivers_app_applied_at_idx'),
+            models.Index(fields=['vehicle_type', 'applied_at'], name='drivers_app_vehicle_idx'),
+            # The pipeline's retry sweep only ever looks at unfinished applications
+            models.Index(
+                fields=['processing_status', 'applied_at'],
+                name='drivers_app_processing_idx',
+                condition=models.Q(processing_status__in=['queued', 'processing']),
+            ),
+        ]
 
-    def save(self, *args, **kwargs):
+    def fill_name(self):
         if not self.name:
             full = f"{self.first_name} {self.last_name}".strip()
             self.name = full or self.name
+
+    def save(self, *args, **kwargs):
+        self.fill_name()
         super().save(*args, **kwargs)
 
     def __str__(self) -> str:
@@ -132,6 +202,7 @@ class DriverApplicationMotorPhoto(models.Model):
     application = models.ForeignKey(DriverApplication, related_name='motor_photos', on_delete=models.CASCADE)
     photo = models.FileField(upload_to='driver_applications/motor_photos/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         ordering = ['uploaded_at']
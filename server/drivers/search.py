@@ -0,0 +1,19 @@
+from sakayhub_admin.search import SearchIndex
+
+from .models import Driver, DriverApplication
+
+
+driver_search_index = SearchIndex(
+    Driver,
+    table="drivers_driver_search",
+    columns=("name", "email", "phone", "plate_number", "license_number"),
+)
+
+
+# Results keep the applications list's (-applied_at, -id) ordering
+application_search_index = SearchIndex(
+    DriverApplication,
+    table="drivers_application_search",
+    columns=("reference_number", "name", "email", "phone", "license_plate"),
+    ranked=False,
+)
@@ -1,9 +1,16 @@
 from rest_framework import serializers
 
+from sakayhub_admin.bulk import BulkStatusSerializer
+from sakayhub_admin.serialization import SparseFieldsMixin, ValuesSerializer
+from sakayhub_admin.thumbnails import ThumbnailsField
+from .documents import accept_application
 from .models import Driver, DriverApplication, DriverApplicationMotorPhoto
 
 
 class DriverSerializer(serializers.ModelSerializer):
+    license_photo_thumbnails = ThumbnailsField("license_photo")
+    profile_photo_thumbnails = ThumbnailsField("profile_photo")
+
     class Meta:
         model = Driver
         fields = [
@@ -24,16 +31,22 @@ class DriverSerializer(serializers.ModelSerializer):
             "license_number",
             "license_expiry",
             "license_photo",
+            "license_photo_thumbnails",
             "vehicle_model",
             "vehicle_color",
             "plate_number",
             "profile_photo",
+            "profile_photo_thumbnails",
             "date_of_birth",
             "join_date",
             "last_active",
         ]
 
 
+# values()-backed twin of DriverSerializer for list pages
+driver_list_serializer = ValuesSerializer(DriverSerializer)
+
+
 class DriverStatusUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Driver
@@ -52,18 +65,24 @@ class DriverStatusUpdateSerializer(serializers.ModelSerializer):
 
 
 class DriverApplicationMotorPhotoSerializer(serializers.ModelSerializer):
+    photo_thumbnails = ThumbnailsField("photo")
+
     class Meta:
         model = DriverApplicationMotorPhoto
         fields = [
             "id",
             "photo",
+            "photo_thumbnails",
             "uploaded_at",
         ]
         read_only_fields = ["id", "uploaded_at"]
 
 
-class DriverApplicationSerializer(serializers.ModelSerializer):
+class DriverApplicationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     motor_photos = DriverApplicationMotorPhotoSerializer(many=True, read_only=True)
+    license_file_thumbnails = ThumbnailsField("license_file")
+    orcr_file_thumbnails = ThumbnailsField("orcr_file")
+    nbi_file_thumbnails = ThumbnailsField("nbi_file")
 
     class Meta:
         model = DriverApplication
@@ -89,9 +108,15 @@ class DriverApplicationSerializer(serializers.ModelSerializer):
             "cr_number",
             "service_types",
             "license_file",
+            "license_file_thumbnails",
             "orcr_file",
+            "orcr_file_thumbnails",
             "nbi_file",
+            "nbi_file_thumbnails",
             "status",
+            "processing_status",
+            "processing_error",
+            "processed_at",
             "motor_photos",
         ]
         read_only_fields = [
@@ -99,6 +124,9 @@ class DriverApplicationSerializer(serializers.ModelSerializer):
             "reference_number",
             "applied_at",
             "status",
+            "processing_status",
+            "processing_error",
+            "processed_at",
             "motor_photos",
         ]
 
@@ -149,17 +177,51 @@ class DriverApplicationCreateSerializer(serializers.ModelSerializer):
         return [item for item in value if item]
 
     def create(self, validated_data):
-        motor_photos = validated_data.pop("motor_photos", [])
-        service_types = validated_data.get("service_types") or []
-
         if not validated_data.get("vehicle_type"):
             validated_data["vehicle_type"] = "motorcycle"
 
-        validated_data["service_types"] = service_types
+        validated_data["service_types"] = validated_data.get("service_types") or []
+
+        return accept_application(validated_data)
+
+
+class DriverApplicationFilterSerializer(serializers.Serializer):
+    search = serializers.CharField(required=False, allow_blank=True, default="")
+    status = serializers.ChoiceField(choices=DriverApplication.APPLICATION_STATUS_CHOICES, required=False)
+    vehicle_type = serializers.ChoiceField(choices=DriverApplication.VEHICLE_CHOICES, required=False)
+    # Inclusive days of applied_at, in the configured timezone
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if "start" in attrs and "end" in attrs and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError({"start": "start must not be after end."})
+        return attrs
+
+
+class DriverBulkFilterSerializer(serializers.Serializer):
+    search = serializers.CharField(required=False, allow_blank=True, default="")
+    status = serializers.ChoiceField(choices=Driver.STATUS_CHOICES, required=False)
+
+
+class DriverBulkStatusSerializer(BulkStatusSerializer):
+    status = serializers.ChoiceField(choices=Driver.STATUS_CHOICES)
+    filter = DriverBulkFilterSerializer(required=False)
+
+
+class DriverLocationUpdateSerializer(serializers.Serializer):
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
 
-        application = DriverApplication.objects.create(**validated_data)
 
-        for photo in motor_photos:
-            DriverApplicationMotorPhoto.objects.create(application=application, photo=photo)
+class DriverNearbyQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    vehicle_type = serializers.ChoiceField(choices=Driver.VEHICLE_CHOICES, required=False)
+    k = serializers.IntegerField(min_value=1, max_value=100, required=False)
+    radius_km = serializers.FloatField(min_value=0, max_value=50, required=False)
 
-        return application
+    def validate(self, attrs):
+        if "k" not in attrs and "radius_km" not in attrs:
+            attrs["k"] = 5
+        return attrs
@@ -0,0 +1,110 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from sakayhub_admin import versions as change_versions
+from sakayhub_admin.thumbnails import stale_fields, thumbnail_pool
+from . import stats as driver_stats
+from .locations import driver_locations
+from .models import LOCATION_FIELDS, PHOTO_FIELDS, STATS_FIELDS, Driver, DriverApplication, DriverApplicationMotorPhoto
+from .search import application_search_index, driver_search_index
+
+
+# Position pings are not shown by the driver list or stats
+change_versions.track(Driver, ignore_fields=LOCATION_FIELDS)
+change_versions.track(DriverApplication, DriverApplicationMotorPhoto)
+
+
+@receiver(post_save, sender=Driver)
+def index_driver(sender, instance, update_fields=None, using=None, **kwargs):
+    # Status-only saves (suspend/unsuspend) do not touch indexed columns
+    if update_fields and not set(update_fields) & set(driver_search_index.columns):
+        return
+    driver_search_index.update(instance, using=using)
+
+
+@receiver(post_delete, sender=Driver)
+def unindex_driver(sender, instance, using=None, **kwargs):
+    driver_search_index.delete(instance.pk, using=using)
+
+
+@receiver(post_save, sender=DriverApplication)
+def index_application(sender, instance, update_fields=None, using=None, **kwargs):
+    if update_fields and not set(update_fields) & set(application_search_index.columns):
+        return
+    application_search_index.update(instance, using=using)
+
+
+@receiver(post_delete, sender=DriverApplication)
+def unindex_application(sender, instance, using=None, **kwargs):
+    application_search_index.delete(instance.pk, using=using)
+
+
+def _stored_stats_values(instance, using):
+    return Driver.objects.using(using).filter(pk=instance.pk).values_list(*STATS_FIELDS).first()
+
+
+@receiver(pre_save, sender=Driver)
+def load_stats_snapshot(sender, instance, using=None, update_fields=None, **kwargs):
+    # Read what the stored row contributes now, so a stale instance cannot skew the totals
+    if instance._state.adding or (update_fields and not set(update_fields) & set(STATS_FIELDS)):
+        instance._stats_snapshot = None
+        return
+    instance._stats_snapshot = _stored_stats_values(instance, using)
+
+
+@receiver(post_save, sender=Driver)
+def update_driver_stats(sender, instance, created=False, update_fields=None, using=None, **kwargs):
+    if update_fields and not set(update_fields) & set(STATS_FIELDS):
+        return
+    old_values = None if created else instance._stats_snapshot
+    new_values = instance.stats_values()
+    if update_fields and old_values is not None:
+        # Columns left out of update_fields kept their stored values
+        saved = set(update_fields)
+        new_values = tuple(
+            new if name in saved else old
+            for name, old, new in zip(STATS_FIELDS, old_values, new_values)
+        )
+    driver_stats.apply_change(old_values, new_values, using=using)
+
+
+@receiver(pre_delete, sender=Driver)
+def load_deleted_stats(sender, instance, using=None, **kwargs):
+    instance._stats_snapshot = _stored_stats_values(instance, using)
+
+
+@receiver(post_delete, sender=Driver)
+def remove_driver_stats(sender, instance, using=None, **kwargs):
+    driver_stats.apply_change(instance._stats_snapshot, None, using=using)
+
+
+@receiver(post_save, sender=Driver)
+def update_driver_location(sender, instance, **kwargs):
+    # Until the first query loads it, the index has nothing to keep current
+    if driver_locations.loaded_at is None:
+        return
+    driver_locations.update(
+        instance.pk,
+        instance.latitude,
+        instance.longitude,
+        instance.vehicle_type,
+        online=instance.online,
+        status=instance.status,
+        on_trip=instance.on_trip,
+    )
+
+
+@receiver(post_delete, sender=Driver)
+def remove_driver_location(sender, instance, **kwargs):
+    driver_locations.remove(instance.pk)
+
+
+@receiver(post_save, sender=Driver)
+def refresh_driver_thumbnails(sender, instance, update_fields=None, using=None, **kwargs):
+    if update_fields and not set(update_fields) & set(PHOTO_FIELDS):
+        return
+    # Resizing reads the new file, so wait until the row pointing at it is
+    # committed; the pool keeps the decoding off the request
+    if stale_fields(instance, PHOTO_FIELDS):
+        transaction.on_commit(lambda: thumbnail_pool.submit(instance, PHOTO_FIELDS, using=using), using=using)
@@ -0,0 +1,141 @@
+import math
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q, Sum
+from django.utils import timezone
+
+from sakayhub_admin import versions as change_versions
+from sakayhub_admin.dates import day_bounds, month_bounds
+from .models import Driver, DriverApplication, DriverStats
+
+
+def _contribution(values):
+    """What one driver adds to each running total, from ``Driver.stats_values()``."""
+    if values is None:
+        return {"total": 0, "online": 0, "verified": 0, "rating_sum": 0.0, "earnings_sum": Decimal("0")}
+    online, license_status, rating, earnings = values
+    return {
+        "total": 1,
+        "online": int(bool(online)),
+        "verified": int(license_status == "verified"),
+        "rating_sum": float(rating or 0),
+        "earnings_sum": Decimal(earnings or 0),
+    }
+
+
+def apply_change(old_values, new_values, using=None):
+    """Move the running totals from ``old_values`` to ``new_values`` in one UPDATE.
+
+    ``None`` stands for "no driver", so creation passes ``old_values=None``
+    and deletion passes ``new_values=None``.
+    """
+    old, new = _contribution(old_values), _contribution(new_values)
+    delta = {key: new[key] - old[key] for key in new}
+    if not any(delta.values()):
+        return
+    updated = DriverStats.objects.using(using).filter(pk=DriverStats.SINGLETON_ID).update(
+        **{key: F(key) + value for key, value in delta.items()}
+    )
+    if not updated:
+        # No counters row yet: build it from the table, which already includes this change
+        reconcile(using=using)
+
+
+def _aggregate(using=None) -> dict:
+    return Driver.objects.using(using).aggregate(
+        total=Count("id"),
+        online_count=Count("id", filter=Q(online=True)),
+        verified_count=Count("id", filter=Q(license_status="verified")),
+        rating_sum=Sum("rating"),
+        avg_rating=Avg("rating"),
+        total_earnings=Sum("earnings"),
+    )
+
+
+def compute(using=None) -> dict:
+    """Full-table aggregate; used by the ``?fresh=1`` escape hatch."""
+    aggregate = _aggregate(using=using)
+    return {
+        "online": aggregate.get("online_count") or 0,
+        "verified": aggregate.get("verified_count") or 0,
+        "avg_rating": float(aggregate.get("avg_rating") or 0.0),
+        "total_earnings": float(aggregate.get("total_earnings") or 0.0),
+    }
+
+
+def _drifted(stored, counters) -> bool:
+    if stored is None:
+        return True
+    return any(
+        not math.isclose(stored[key], value, abs_tol=1e-6) if key == "rating_sum" else stored[key] != value
+        for key, value in counters.items()
+    )
+
+
+def reconcile(using=None) -> DriverStats:
+    """Rewrite the counters row from a full-table aggregate.
+
+    The row is written with ``update_or_create()`` on ``DriverStats``, so
+    when a counter actually moves the ``Driver`` change version is bumped
+    here; otherwise ``@conditional(Driver)`` views would keep answering 304
+    with the drifted numbers.
+    """
+    aggregate = _aggregate(using=using)
+    counters = {
+        "total": aggregate.get("total") or 0,
+        "online": aggregate.get("online_count") or 0,
+        "verified": aggregate.get("verified_count") or 0,
+        "rating_sum": float(aggregate.get("rating_sum") or 0.0),
+        "earnings_sum": aggregate.get("total_earnings") or Decimal("0"),
+    }
+    with transaction.atomic(using=using):
+        stored = DriverStats.objects.using(using).filter(pk=DriverStats.SINGLETON_ID).values(*counters).first()
+        stats, _ = DriverStats.objects.using(using).update_or_create(
+            pk=DriverStats.SINGLETON_ID,
+            defaults={**counters, "reconciled_at": timezone.now()},
+        )
+        if _drifted(stored, counters):
+            change_versions.bump(Driver, using=using)
+    return stats
+
+
+def read(using=None) -> dict:
+    """O(1) read of the dashboard numbers from the counters row."""
+    stats = DriverStats.objects.using(using).filter(pk=DriverStats.SINGLETON_ID).first()
+    if stats is None:
+        stats = reconcile(using=using)
+    return {
+        "online": stats.online,
+        "verified": stats.verified,
+        "avg_rating": stats.rating_sum / stats.total if stats.total else 0.0,
+        "total_earnings": float(stats.earnings_sum),
+    }
+
+
+def application_stats(now=None) -> dict:
+    """Driver application dashboard counts in one conditional aggregate.
+
+    Day and month windows are half-open datetime ranges in the configured
+    timezone, and the WHERE clause only reaches rows an index can find:
+    open applications by ``status`` plus this month's by ``applied_at``.
+    """
+    today = timezone.localdate(now)
+    today_start, today_end = day_bounds(today)
+    month_start, month_end = month_bounds(today)
+    open_statuses = ("pending", "under_review")
+
+    aggregate = (
+        DriverApplication.objects
+        .filter(Q(status__in=open_statuses) | Q(applied_at__gte=month_start, applied_at__lt=month_end))
+        .aggregate(
+            pending=Count("id", filter=Q(status="pending")),
+            under_review=Count("id", filter=Q(status="under_review")),
+            approved_today=Count(
+                "id",
+                filter=Q(status="approved", applied_at__gte=today_start, applied_at__lt=today_end),
+            ),
+            total_month=Count("id", filter=Q(applied_at__gte=month_start, applied_at__lt=month_end)),
+        )
+    )
+    return {key: aggregate.get(key) or 0 for key in ("pending", "under_review", "approved_today", "total_month")}
@@ -1,11 +1,32 @@
 import json
+import os
+import random
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
+from PIL import Image
 from rest_framework.test import APITestCase, APIClient
 
-from .models import DriverApplication
+from sakayhub_admin.dates import day_bounds, local_midnight, month_bounds
+from sakayhub_admin.geo import haversine_km
+from sakayhub_admin.thumbnails import thumbnail_pool
+from . import stats as driver_stats_store
+from .documents import MAX_IMAGE_SIDE, process_application, requeue
+from .locations import DriverLocationIndex, driver_locations
+from .models import Driver, DriverApplication, DriverApplicationMotorPhoto, DriverStats
+from .serializers import DriverSerializer
 
 
 class DriverApplicationSubmissionTests(APITestCase):
@@ -78,3 +99,671 @@ class DriverApplicationSubmissionTests(APITestCase):
         results = list_response.json().get("results", [])
         self.assertEqual(list_response.json().get("count"), 16)
         self.assertTrue(any(app["reference_number"] == reference_number for app in results))
+
+
+def jpeg_upload(name, size, exif=None):
+    buffer = BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, format="JPEG", exif=exif or Image.Exif())
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), DRIVER_DOCUMENT_WORKERS=0)
+class DriverApplicationDocumentTests(APITestCase):
+    def _submit(self, **files):
+        payload = {
+            "first_name": "Maria",
+            "last_name": "Santos",
+            "phone_number": "+63 917 555 0101",
+            "email": "maria.santos@example.com",
+            "vehicle_type": "motorcycle",
+            **files,
+        }
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post("/api/driver-applications/", data=payload, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.content)
+        # The request itself only queues the documents
+        self.assertEqual(response.json()["processing_status"], "queued")
+        application = DriverApplication.objects.get(reference_number=response.json()["reference_number"])
+        self.assertEqual(application.processing_status, "queued")
+        self.assertEqual(application.name, "Maria Santos")
+        for callback in callbacks:
+            callback()
+        application.refresh_from_db()
+        return application
+
+    def test_images_are_turned_upright_stripped_and_scaled(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Stored sideways; display rotated 90 degrees
+        exif[0x010F] = "PhoneMaker"
+        application = self._submit(
+            license_file=jpeg_upload("license.jpg", (300, 200), exif=exif),
+            orcr_file=SimpleUploadedFile("orcr.pdf", b"%PDF-1.4 scanned", content_type="application/pdf"),
+            motor_photo_0=jpeg_upload("side.jpg", (MAX_IMAGE_SIDE + 440, 100)),
+            motor_photo_1=jpeg_upload("front.jpg", (640, 480)),
+        )
+
+        self.assertEqual(application.processing_status, "ready")
+        self.assertEqual(application.processing_error, "")
+        self.assertIsNotNone(application.processed_at)
+        with Image.open(application.license_file.path) as license_image:
+            self.assertEqual(license_image.size, (200, 300))
+            self.assertEqual(dict(license_image.getexif()), {})
+        with application.orcr_file.open("rb") as handle:
+            self.assertEqual(handle.read(), b"%PDF-1.4 scanned")
+        sizes = []
+        for photo in application.motor_photos.order_by("id"):
+            self.assertTrue(os.path.exists(photo.photo.path))
+            with Image.open(photo.photo.path) as image:
+                sizes.append(max(image.size))
+        self.assertEqual(sizes, [MAX_IMAGE_SIDE, 640])
+
+        admin = get_user_model().objects.create_user(
+            username="admin@example.com", email="admin@example.com", password="adminpass123", is_staff=True
+        )
+        self.client.force_authenticate(user=admin)
+        listed = self.client.get(
+            "/api/drivers/applications/?fields=reference_number,processing_status,license_file_thumbnails,orcr_file_thumbnails"
+        ).json()
+        row = listed["results"][0]
+        self.assertEqual(
+            (row["reference_number"], row["processing_status"], row["orcr_file_thumbnails"]),
+            (application.reference_number, "ready", None),
+        )
+        self.assertEqual(sorted(row["license_file_thumbnails"]), ["medium", "small"])
+
+    def test_bad_documents_fail_with_reasons_and_can_be_retried(self):
+        application = self._submit(
+            license_file=SimpleUploadedFile("license.jpg", b"not really a photo", content_type="image/jpeg"),
+            motor_photo_0=SimpleUploadedFile("bike.pdf", b"%PDF-1.4", content_type="application/pdf"),
+        )
+
+        self.assertEqual(application.processing_status, "failed")
+        self.assertEqual(
+            application.processing_error.splitlines(),
+            ["Driver's license: not a JPEG, PNG, WebP or PDF file.", "Motor photo 1: expected a photo, got a PDF."],
+        )
+        # Only queued applications are claimed
+        self.assertIsNone(process_application(application.pk))
+
+        application.license_file.save("license.jpg", jpeg_upload("license.jpg", (64, 64)), save=True)
+        application.motor_photos.all().delete()
+        self.assertEqual(requeue(), [])
+        self.assertEqual(requeue(include_failed=True), [application.pk])
+        out = StringIO()
+        call_command("process_driver_documents", stdout=out)
+        application.refresh_from_db()
+        self.assertEqual(application.processing_status, "ready")
+        self.assertIn("1 ready, 0 failed", out.getvalue())
+
+    def test_only_claims_older_than_the_stale_window_are_requeued(self):
+        application = self._submit()
+        long_ago = timezone.now() - timedelta(hours=2)
+        # Waited in the queue for hours, but a worker claimed it a moment ago
+        DriverApplication.objects.filter(pk=application.pk).update(
+            applied_at=long_ago, processing_status="processing", processing_started_at=timezone.now()
+        )
+        self.assertEqual(requeue(), [])
+        self.assertEqual(requeue(include_failed=True), [])
+
+        DriverApplication.objects.filter(pk=application.pk).update(processing_started_at=long_ago)
+        self.assertEqual(requeue(), [application.pk])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class DriverApplicationListTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin_user = User.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        statuses = ["pending", "approved", "rejected"]
+        self.applications = []
+        for index in range(12):
+            application = DriverApplication.objects.create(
+                first_name=f"Applicant{index}",
+                last_name="Reyes" if index % 2 else "Garcia",
+                email=f"applicant{index}@example.com",
+                phone=f"+63 900 111 00{index:02d}",
+                vehicle_type="sedan" if index % 3 == 0 else "motorcycle",
+                license_plate=f"NAB {1000 + index}",
+                status=statuses[index % 3],
+            )
+            for side in ("front", "back"):
+                DriverApplicationMotorPhoto.objects.create(
+                    application=application, photo=f"driver_applications/motor_photos/{index}-{side}.jpg"
+                )
+            self.applications.append(application)
+        # Four a day over the last three days, oldest first
+        today = timezone.localdate()
+        for index, application in enumerate(self.applications):
+            application.applied_at = local_midnight(today - timedelta(days=2 - index // 4)) + timedelta(hours=1, minutes=index)
+            DriverApplication.objects.filter(pk=application.pk).update(applied_at=application.applied_at)
+
+    def _references(self, **params):
+        response = self.client.get("/api/drivers/applications/", {"page_size": 50, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return [row["reference_number"] for row in response.json()["results"]]
+
+    def test_newest_first_with_filters(self):
+        self.assertEqual(self._references(), [app.reference_number for app in reversed(self.applications)])
+
+        pending = self._references(status="pending")
+        self.assertEqual(len(pending), 4)
+        self.assertTrue(all(ref in {app.reference_number for app in self.applications[::3]} for ref in pending))
+        self.assertEqual(len(self._references(vehicle_type="sedan", status="pending")), 4)
+        self.assertEqual(len(self._references(vehicle_type="motorcycle")), 8)
+
+        today = timezone.localdate()
+        self.assertEqual(
+            set(self._references(start=today.isoformat())),
+            {app.reference_number for app in self.applications[8:]},
+        )
+        self.assertEqual(len(self._references(start=(today - timedelta(days=2)).isoformat(),
+                                              end=(today - timedelta(days=1)).isoformat())), 8)
+        bad = self.client.get("/api/drivers/applications/", {"start": today.isoformat(),
+                                                             "end": (today - timedelta(days=1)).isoformat()})
+        self.assertEqual(bad.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_uses_indexed_columns(self):
+        target = self.applications[5]
+        self.assertEqual(self._references(search=target.reference_number), [target.reference_number])
+        self.assertEqual(self._references(search="NAB 1005"), [target.reference_number])
+        self.assertEqual(len(self._references(search="reyes")), 6)
+        self.assertEqual(self._references(search="applicant7@example.com"), [self.applications[7].reference_number])
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        url = "/api/drivers/applications/"
+        self.client.get(url)  # Warm the change-version cache
+        counts = []
+        for page_size in (2, 12):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, {"page_size": page_size})
+            self.assertEqual(len(response.json()["results"]), page_size)
+            self.assertTrue(all(len(row["motor_photos"]) == 2 for row in response.json()["results"]))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertLessEqual(counts[1], 3)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), THUMBNAIL_WORKERS=0)
+class DriverThumbnailTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin_user = User.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+    def _driver(self, index, **photos):
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            driver = Driver.objects.create(
+                name=f"Photo Driver {index}",
+                email=f"photo{index}@example.com",
+                phone=f"+63 917 600 000{index}",
+                status="active",
+                vehicle_type="motorcycle",
+                license_status="verified",
+                join_date=now.date(),
+                last_active=now,
+                **photos,
+            )
+        driver.refresh_from_db()
+        return driver
+
+    def test_photos_get_shared_thumbnails_in_the_list(self):
+        first = self._driver(1, profile_photo=jpeg_upload("me.jpg", (1200, 900)))
+        second = self._driver(2, profile_photo=jpeg_upload("also-me.jpg", (1200, 900)))
+        self.assertNotEqual(first.profile_photo.name, second.profile_photo.name)
+        # Same bytes, same thumbnails
+        self.assertEqual(
+            {key: value for key, value in first.thumbnails["profile_photo"].items() if key != "source"},
+            {key: value for key, value in second.thumbnails["profile_photo"].items() if key != "source"},
+        )
+        self.assertNotIn("license_photo", first.thumbnails)
+
+        results = self.client.get("/api/drivers/list/").json()["results"]
+        urls = results[0]["profile_photo_thumbnails"]
+        self.assertIsNone(results[0]["license_photo_thumbnails"])
+        self.assertTrue(urls["small"].startswith("/media/drivers/profile_photos/thumbnails/"), urls)
+        for size, longest in (("small", 160), ("medium", 640)):
+            path = os.path.join(settings.MEDIA_ROOT, first.thumbnails["profile_photo"][size])
+            with Image.open(path) as image:
+                self.assertEqual(max(image.size), longest)
+        self.assertEqual(DriverSerializer(first).data["profile_photo_thumbnails"], urls)
+
+    def test_saves_hand_rendering_to_the_pool(self):
+        with override_settings(THUMBNAIL_WORKERS=1), mock.patch.object(thumbnail_pool, "_run") as run:
+            driver = self._driver(4, profile_photo=jpeg_upload("pooled.jpg", (1200, 900)))
+            thumbnail_pool.shutdown()
+        # Nothing was decoded on the saving thread
+        self.assertEqual(driver.thumbnails, {})
+        run.assert_called_once_with(Driver, driver.pk, ["license_photo", "profile_photo"], "default")
+
+        self.assertTrue(thumbnail_pool._render(*run.call_args.args))
+        driver.refresh_from_db()
+        self.assertEqual(driver.thumbnails["profile_photo"]["source"], driver.profile_photo.name)
+
+    def test_document_thumbnails_are_as_private_as_the_document(self):
+        driver = self._driver(
+            5, license_photo=jpeg_upload("id.jpg", (800, 500)), profile_photo=jpeg_upload("face.jpg", (800, 500)),
+        )
+        license_thumbnail = driver.thumbnails["license_photo"]["medium"]
+        self.assertTrue(license_thumbnail.startswith("drivers/license_photos/thumbnails/"), license_thumbnail)
+
+        anonymous = Client()
+        self.assertEqual(anonymous.get(f"/media/{license_thumbnail}").status_code, 404)
+        response = anonymous.get(f"/media/{driver.thumbnails['profile_photo']['small']}")
+        self.assertEqual((response.status_code, response["Cache-Control"]), (200, "public, max-age=31536000, immutable"))
+        response.close()
+
+        # Sets made under the old shared prefix are rebuilt beside their source
+        legacy = {**driver.thumbnails["license_photo"], "medium": "thumbnails/ab/legacy-640.jpg"}
+        Driver.objects.filter(pk=driver.pk).update(thumbnails={**driver.thumbnails, "license_photo": legacy})
+        out = StringIO()
+        call_command("generate_thumbnails", stdout=out)
+        self.assertIn("Updated thumbnails for 1 drivers.", out.getvalue())
+        driver.refresh_from_db()
+        self.assertEqual(driver.thumbnails["license_photo"]["medium"], license_thumbnail)
+
+    def test_backfill_covers_existing_media(self):
+        driver = self._driver(3, license_photo=jpeg_upload("license.jpg", (800, 500)))
+        Driver.objects.filter(pk=driver.pk).update(thumbnails={})
+
+        out = StringIO()
+        call_command("generate_thumbnails", stdout=out)
+        self.assertIn("Updated thumbnails for 1 drivers.", out.getvalue())
+        driver.refresh_from_db()
+        self.assertEqual(driver.thumbnails["license_photo"]["source"], driver.license_photo.name)
+
+        out = StringIO()
+        call_command("generate_thumbnails", stdout=out)
+        self.assertIn("Updated thumbnails for 0 drivers.", out.getvalue())
+
+
+class DriverBulkStatusTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin_user = User.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        now = timezone.now()
+        self.drivers = [
+            Driver.objects.create(
+                name=name,
+                email=f"driver{index}@example.com",
+                phone=f"+63 917 300 000{index}",
+                status=driver_status,
+                vehicle_type="motorcycle",
+                license_status="verified",
+                join_date=now.date(),
+                last_active=now,
+            )
+            for index, (name, driver_status) in enumerate([
+                ("Ring Leader", "active"),
+                ("Ring Member", "active"),
+                ("Ring Member Two", "suspended"),
+                ("Honest Driver", "active"),
+            ])
+        ]
+
+    def test_bulk_suspend_by_ids_reports_each_outcome(self):
+        ids = [self.drivers[0].id, self.drivers[2].id, 999999]
+        # One SELECT, one UPDATE and the change-version bump, wrapped in a savepoint
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                "/api/drivers/bulk/status/",
+                {"ids": ids, "status": "suspended"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        body = response.json()
+        self.assertEqual(body["updated"], 1)
+        self.assertEqual(
+            [row["outcome"] for row in body["results"]],
+            ["updated", "unchanged", "not_found"],
+        )
+        self.assertNotIn("rows", body)
+        self.assertEqual(Driver.objects.get(id=self.drivers[0].id).status, "suspended")
+
+    def test_bulk_suspend_by_filter_can_return_rows(self):
+        response = self.client.post(
+            "/api/drivers/bulk/status/",
+            {"filter": {"search": "ring", "status": "active"}, "status": "suspended", "include_rows": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        body = response.json()
+        self.assertEqual(body["updated"], 2)
+        self.assertEqual([row["name"] for row in body["rows"]], ["Ring Leader", "Ring Member"])
+        self.assertEqual(Driver.objects.get(id=self.drivers[3].id).status, "active")
+
+    def test_bulk_requires_exactly_one_selector(self):
+        response = self.client.post(
+            "/api/drivers/bulk/status/",
+            {"ids": [self.drivers[0].id], "filter": {"search": "ring"}, "status": "suspended"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DriverStatsCounterTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin_user = User.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+    def _create_driver(self, index, **overrides):
+        now = timezone.now()
+        fields = {
+            "name": f"Driver {index}",
+            "email": f"stats{index}@example.com",
+            "phone": f"+63 917 400 000{index}",
+            "status": "active",
+            "vehicle_type": "sedan",
+            "license_status": "pending",
+            "join_date": now.date(),
+            "last_active": now,
+        }
+        fields.update(overrides)
+        return Driver.objects.create(**fields)
+
+    def _stats(self, fresh=False):
+        response = self.client.get("/api/drivers/stats/", {"fresh": 1} if fresh else {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_counters_follow_creates_updates_and_deletes(self):
+        first = self._create_driver(1, online=True, rating=4.0, earnings="100.00")
+        second = self._create_driver(2, license_status="verified", rating=5.0, earnings="50.50")
+
+        second.online = True
+        second.earnings = "60.50"
+        second.save()
+        reloaded = Driver.objects.only("id", "name").get(id=first.id)
+        reloaded.rating = 3.0
+        reloaded.save()
+
+        self.assertEqual(self._stats(), self._stats(fresh=True))
+        self.assertEqual(self._stats()["online"], 2)
+
+        first.delete()
+        self.assertEqual(self._stats(), self._stats(fresh=True))
+        self.assertEqual(self._stats()["avg_rating"], 5.0)
+
+    def test_stats_read_is_a_single_query(self):
+        self._create_driver(1, online=True)
+        with self.assertNumQueries(1):
+            stats = driver_stats_store.read()
+        self.assertEqual(stats["online"], 1)
+
+    def test_reconcile_command_repairs_drift(self):
+        self._create_driver(1, online=True, rating=4.0)
+        DriverStats.objects.filter(pk=DriverStats.SINGLETON_ID).update(online=42)
+        etag = self.client.get("/api/drivers/stats/")["ETag"]
+
+        call_command("reconcile_driver_stats", stdout=StringIO())
+        # Cached copies of the drifted numbers must not be revalidated
+        response = self.client.get("/api/drivers/stats/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._stats(), self._stats(fresh=True))
+
+        # Nothing to correct, nothing to invalidate
+        etag = response["ETag"]
+        call_command("reconcile_driver_stats", stdout=StringIO())
+        response = self.client.get("/api/drivers/stats/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class DriverApplicationStatsTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin_user = User.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+    def _application(self, index, application_status, applied_at):
+        application = DriverApplication.objects.create(
+            first_name=f"Stats{index}",
+            last_name="Applicant",
+            email=f"stats{index}@example.com",
+            phone=f"+63 900 100 00{index:02d}",
+            status=application_status,
+        )
+        # applied_at is auto_now_add; move it where the test needs it
+        DriverApplication.objects.filter(pk=application.pk).update(applied_at=applied_at)
+
+    def test_stats_use_local_day_and_month_windows_in_one_query(self):
+        now = timezone.now()
+        today_start, _ = day_bounds(timezone.localdate())
+        month_start, _ = month_bounds(timezone.localdate())
+        self._application(1, "pending", now)
+        self._application(2, "under_review", month_start - timedelta(days=40))
+        self._application(3, "approved", today_start)
+        self._application(4, "approved", today_start - timedelta(microseconds=1))
+        self._application(5, "rejected", month_start - timedelta(microseconds=1))
+
+        with self.assertNumQueries(1):
+            stats = driver_stats_store.application_stats()
+
+        self.assertEqual(stats["pending"], 1)
+        self.assertEqual(stats["under_review"], 1)
+        self.assertEqual(stats["approved_today"], 1)
+        expected_month = 2 + (1 if today_start - timedelta(microseconds=1) >= month_start else 0)
+        self.assertEqual(stats["total_month"], expected_month)
+
+        response = self.client.get("/api/drivers/applications/stats/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), stats)
+
+
+class DriverSparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin_user = User.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        now = timezone.now()
+        self.driver = Driver.objects.create(
+            name="Sparse Driver",
+            email="sparse@example.com",
+            phone="+63 917 500 0001",
+            status="active",
+            vehicle_type="sedan",
+            license_status="verified",
+            feedback="A very long feedback blob " * 50,
+            join_date=now.date(),
+            last_active=now,
+        )
+        self.application = DriverApplication.objects.create(
+            first_name="Sparse",
+            last_name="Applicant",
+            email="applicant@example.com",
+            phone="+63 917 500 0002",
+        )
+
+    def test_fields_projects_payload_and_select(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/drivers/list/", {"fields": "id,name,status"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], [{"id": self.driver.id, "name": "Sparse Driver", "status": "active"}])
+        page_sql = queries.captured_queries[-1]["sql"]
+        self.assertNotIn('"feedback"', page_sql)
+        self.assertNotIn('"license_photo"', page_sql)
+
+    def test_exclude_drops_fields(self):
+        response = self.client.get("/api/drivers/list/", {"exclude": "feedback,license_photo,profile_photo"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        row = response.json()["results"][0]
+        self.assertNotIn("feedback", row)
+        self.assertNotIn("profile_photo", row)
+        self.assertIn("plate_number", row)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get("/api/drivers/list/", {"fields": "id,secret"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("secret", response.json()["fields"])
+
+    def test_application_fields_skip_columns_and_photo_prefetch(self):
+        cache.clear()
+        # Change versions, COUNT and the page; no motor photo query when they are not requested
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/drivers/applications/", {"fields": "id,reference_number,status"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 3)
+        self.assertNotIn('"nbi_file"', queries.captured_queries[-1]["sql"])
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": self.application.id, "reference_number": self.application.reference_number, "status": "pending"}],
+        )
+
+
+class DriverLocationIndexTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin_user = User.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        driver_locations.clear()
+        driver_locations.loaded_at = None
+        self.addCleanup(driver_locations.clear)
+        self.addCleanup(setattr, driver_locations, "loaded_at", None)
+
+    def _create_driver(self, index, latitude, longitude, **overrides):
+        now = timezone.now()
+        fields = {
+            "name": f"Driver {index}",
+            "email": f"located{index}@example.com",
+            "phone": f"+63 917 500 {index:04d}",
+            "status": "active",
+            "vehicle_type": "motorcycle",
+            "license_status": "verified",
+            "online": True,
+            "latitude": latitude,
+            "longitude": longitude,
+            "join_date": now.date(),
+            "last_active": now,
+        }
+        fields.update(overrides)
+        return Driver.objects.create(**fields)
+
+    def test_queries_match_a_linear_scan(self):
+        rng = random.Random(3)
+        index = DriverLocationIndex()
+        positions = {}
+        for driver_id in range(1, 801):
+            latitude, longitude = rng.uniform(14.4, 14.8), rng.uniform(120.9, 121.1)
+            vehicle_type = rng.choice(["motorcycle", "sedan"])
+            positions[driver_id] = (latitude, longitude, vehicle_type)
+            index.update(driver_id, latitude, longitude, vehicle_type)
+
+        for _ in range(25):
+            latitude, longitude = rng.uniform(14.3, 14.9), rng.uniform(120.8, 121.2)
+            scan = sorted(
+                (haversine_km(latitude, longitude, lat, lng), driver_id)
+                for driver_id, (lat, lng, vehicle_type) in positions.items()
+                if vehicle_type == "sedan"
+            )
+            nearest = index.nearest(latitude, longitude, k=7, vehicle_type="sedan")
+            self.assertEqual([entry.driver_id for _, entry in nearest], [driver_id for _, driver_id in scan[:7]])
+            within = index.within(latitude, longitude, 3.0, vehicle_type="sedan")
+            self.assertEqual(
+                [entry.driver_id for _, entry in within],
+                [driver_id for distance, driver_id in scan if distance <= 3.0],
+            )
+
+    def test_signals_keep_only_dispatchable_drivers(self):
+        near = self._create_driver(1, 14.5547, 121.0244)
+        self._create_driver(2, 14.5550, 121.0250, online=False)
+        self._create_driver(3, 14.5560, 121.0260, vehicle_type="sedan")
+
+        response = self.client.get("/api/drivers/nearby/", {"lat": 14.5547, "lng": 121.0244, "k": 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["id"] for row in response.json()["results"]], [near.id, near.id + 2])
+
+        # One UPDATE, plus one read of what the index keys on
+        with self.assertNumQueries(2):
+            response = self.client.post(f"/api/drivers/{near.id}/location/", {"latitude": 14.60, "longitude": 121.0})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post("/api/drivers/999999/location/", {"latitude": 14.6, "longitude": 121.0}).status_code, 404)
+        Driver.objects.filter(pk=near.id + 2).get().delete()
+        response = self.client.get(
+            "/api/drivers/nearby/",
+            {"lat": 14.5547, "lng": 121.0244, "radius_km": 1, "vehicle_type": "motorcycle"},
+        )
+        self.assertEqual(response.json()["results"], [])
+
+        near.refresh_from_db()
+        near.status = "suspended"
+        near.save()
+        self.assertNotIn(near.id, driver_locations)
+
+    def test_bulk_status_changes_reach_the_index(self):
+        first = self._create_driver(1, 14.5547, 121.0244)
+        second = self._create_driver(2, 14.5550, 121.0250)
+        nearby = lambda: [
+            row["id"] for row in
+            self.client.get("/api/drivers/nearby/", {"lat": 14.5547, "lng": 121.0244, "k": 5}).json()["results"]
+        ]
+        self.assertEqual(nearby(), [first.id, second.id])
+
+        response = self.client.post(
+            "/api/drivers/bulk/status/", {"ids": [first.id, second.id], "status": "suspended"}, format="json"
+        )
+        self.assertEqual(response.json()["updated"], 2)
+        self.assertEqual(nearby(), [])
+
+        self.client.post("/api/drivers/bulk/status/", {"ids": [second.id], "status": "active"}, format="json")
+        self.assertEqual(nearby(), [second.id])
+
+    def test_location_pings_keep_list_etag(self):
+        driver = self._create_driver(1, 14.5547, 121.0244)
+        etag = self.client.get("/api/drivers/list/")["ETag"]
+        self.client.post(f"/api/drivers/{driver.id}/location/", {"latitude": 14.56, "longitude": 121.03})
+        self.assertEqual(self.client.get("/api/drivers/list/")["ETag"], etag)
+
+    def test_snapshot_round_trip(self):
+        index = DriverLocationIndex()
+        index.update(1, 14.55, 121.02, "sedan")
+        index.update(2, 14.60, 121.00, "van")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "driver-index.bin")
+            self.assertEqual(index.snapshot(path), 2)
+            restored = DriverLocationIndex()
+            restored.restore(path)
+        self.assertEqual(len(restored), 2)
+        [(_, entry)] = restored.nearest(14.60, 121.00, k=1, vehicle_type="van")
+        self.assertEqual((entry.driver_id, entry.latitude, entry.longitude), (2, 14.60, 121.00))
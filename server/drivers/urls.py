@@ -3,11 +3,15 @@ from . import views
 
 urlpatterns = [
     path('list/', views.list_drivers, name='drivers-list'),
+    path('export/', views.export_drivers, name='drivers-export'),
     path('stats/', views.driver_stats, name='drivers-stats'),
+    path('nearby/', views.nearby_drivers, name='drivers-nearby'),
     path('applications/', views.list_driver_applications, name='driver-applications-list'),
     path('applications/submit/', views.submit_driver_application, name='driver-applications-submit'),
     path('applications/stats/', views.driver_application_stats, name='driver-applications-stats'),
+    path('bulk/status/', views.bulk_update_driver_status, name='drivers-bulk-status'),
     path('<int:driver_id>/status/', views.update_driver_status, name='driver-update-status'),
     path('<int:driver_id>/suspend/', views.suspend_driver, name='driver-suspend'),
     path('<int:driver_id>/unsuspend/', views.unsuspend_driver, name='driver-unsuspend'),
+    path('<int:driver_id>/location/', views.update_driver_location, name='driver-update-location'),
 ]
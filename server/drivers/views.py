@@ -1,89 +1,147 @@
 import json
 
+from django.utils import timezone
+
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.decorators import api_view, permission_classes, parser_classes, renderer_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 
-from .models import Driver, DriverApplication
+from .locations import driver_locations, get_driver_index
+from .models import Driver, DriverApplication, DriverApplicationMotorPhoto
 from .serializers import (
     DriverSerializer,
     DriverApplicationSerializer,
     DriverApplicationCreateSerializer,
+    DriverApplicationFilterSerializer,
     DriverStatusUpdateSerializer,
+    DriverBulkStatusSerializer,
+    DriverLocationUpdateSerializer,
+    DriverNearbyQuerySerializer,
+    driver_list_serializer,
 )
-from .pagination import DriverPagination
-from django.db.models import Count, Avg, Sum, Q
-from django.utils import timezone
+from .pagination import DriverPagination, DriverCursorPagination
+from .search import application_search_index, driver_search_index
+from . import stats as driver_stats_store
+from sakayhub_admin.bulk import bulk_update_status, resolve_filter_ids
+from sakayhub_admin.dates import day_bounds
+from sakayhub_admin.export import EXPORT_RENDERERS, export_response
+from sakayhub_admin.serialization import requested_fields
+from sakayhub_admin.versions import conditional
+
+
+EXPORT_COLUMNS = [
+    ("id", "id"),
+    ("name", "name"),
+    ("email", "email"),
+    ("phone", "phone"),
+    ("status", "status"),
+    ("vehicle_type", "vehicle_type"),
+    ("license_status", "license_status"),
+    ("rating", "rating"),
+    ("total_rides", "total_rides"),
+    ("total_sakays", "total_sakays"),
+    ("number_of_cancellations", "number_of_cancellations"),
+    ("earnings", "earnings"),
+    ("online", "online"),
+    ("license_number", "license_number"),
+    ("license_expiry", "license_expiry"),
+    ("vehicle_model", "vehicle_model"),
+    ("vehicle_color", "vehicle_color"),
+    ("plate_number", "plate_number"),
+    ("join_date", "join_date"),
+    ("last_active", "last_active"),
+]
+
+
+def _filtered_drivers(search: str):
+    queryset = Driver.objects.all().order_by("id")
+    # Server-side search through the full-text index, best matches first
+    if search:
+        queryset = driver_search_index.filter(queryset, search)
+    return queryset
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@conditional(Driver)
 def list_drivers(request):
-    queryset = Driver.objects.all().order_by("id")
-    # Server-side search across the full dataset then paginate
-    search = request.GET.get("search", "").strip()
-    if search:
-        queryset = queryset.filter(
-            Q(name__icontains=search)
-            | Q(email__icontains=search)
-            | Q(phone__icontains=search)
-        )
-    paginator = DriverPagination()
+    # ?fields= / ?exclude= narrow both the payload and the SELECT
+    serializer = driver_list_serializer.for_request(request)
+    # The cursor columns are fetched even when they are not rendered
+    queryset = serializer.values(_filtered_drivers(request.GET.get("search", "").strip()), include=DriverCursorPagination.ordering_fields())
+    if DriverCursorPagination.is_requested(request):
+        paginator = DriverCursorPagination()
+    else:
+        paginator = DriverPagination()
     page = paginator.paginate_queryset(queryset, request)
-    serializer = DriverSerializer(page, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    return paginator.get_paginated_response(serializer.to_representation(page))
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@renderer_classes(EXPORT_RENDERERS)
+def export_drivers(request):
+    queryset = _filtered_drivers(request.GET.get("search", "").strip())
+    return export_response(request, queryset, EXPORT_COLUMNS, "drivers")
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@conditional(Driver)
 def driver_stats(request):
-    # Aggregate key stats for dashboard cards
-    aggregate = Driver.objects.aggregate(
-        online_count=Count("id", filter=Q(online=True)),
-        verified_count=Count("id", filter=Q(license_status="verified")),
-        avg_rating=Avg("rating"),
-        total_earnings=Sum("earnings"),
-    )
+    # Dashboard cards read the incrementally maintained counters; ?fresh=1 recomputes
+    if request.GET.get("fresh", "").lower() in ("1", "true", "yes"):
+        return Response(driver_stats_store.compute())
+    return Response(driver_stats_store.read())
 
-    return Response({
-        "online": aggregate.get("online_count") or 0,
-        "verified": aggregate.get("verified_count") or 0,
-        "avg_rating": float(aggregate.get("avg_rating") or 0.0),
-        "total_earnings": float(aggregate.get("total_earnings") or 0.0),
-    })
+
+def _filtered_applications(params):
+    filters = DriverApplicationFilterSerializer(data=params)
+    filters.is_valid(raise_exception=True)
+    data = filters.validated_data
+    # Newest first, as the model orders them; id breaks ties along the same index
+    queryset = DriverApplication.objects.order_by("-applied_at", "-id")
+    if "status" in data:
+        queryset = queryset.filter(status=data["status"])
+    if "vehicle_type" in data:
+        queryset = queryset.filter(vehicle_type=data["vehicle_type"])
+    # Half-open bounds on the bare column, so the applied_at indexes apply
+    if "start" in data:
+        queryset = queryset.filter(applied_at__gte=day_bounds(data["start"])[0])
+    if "end" in data:
+        queryset = queryset.filter(applied_at__lt=day_bounds(data["end"])[1])
+    if data["search"].strip():
+        queryset = application_search_index.filter(queryset, data["search"].strip())
+    return queryset
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@conditional(DriverApplication, DriverApplicationMotorPhoto)
 def list_driver_applications(request):
     # Simple pagination using the same paginator with page_size=5
     paginator = DriverPagination()
-    queryset = DriverApplication.objects.all().order_by("id")
+    fields = requested_fields(request, DriverApplicationSerializer.Meta.fields)
+    queryset = _filtered_applications(request.query_params)
+    if fields is not None:
+        # Nested photos are not a column; everything else is deferred unless asked for
+        sources = DriverApplicationSerializer().fields
+        queryset = queryset.only("id", *{sources[name].source for name in fields if name != "motor_photos"})
+    if fields is None or "motor_photos" in fields:
+        # One query for the whole page's photos instead of one per application
+        queryset = queryset.prefetch_related("motor_photos")
     page = paginator.paginate_queryset(queryset, request)
-    serializer = DriverApplicationSerializer(page, many=True)
+    serializer = DriverApplicationSerializer(page, many=True, fields=fields)
     return paginator.get_paginated_response(serializer.data)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@conditional(DriverApplication, daily=True)
 def driver_application_stats(request):
-    now = timezone.now()
-    today = now.date()
-    month_start = today.replace(day=1)
-
-    pending_count = DriverApplication.objects.filter(status="pending").count()
-    under_review_count = DriverApplication.objects.filter(status="under_review").count()
-    approved_today_count = DriverApplication.objects.filter(status="approved", applied_at__date=today).count()
-    total_month_count = DriverApplication.objects.filter(applied_at__date__gte=month_start).count()
-
-    return Response({
-        "pending": pending_count,
-        "under_review": under_review_count,
-        "approved_today": approved_today_count,
-        "total_month": total_month_count,
-    })
+    return Response(driver_stats_store.application_stats())
 
 
 @api_view(["POST"])
@@ -140,6 +198,7 @@ def submit_driver_application(request):
             {
                 "reference_number": application.reference_number,
                 "status": application.status,
+                "processing_status": application.processing_status,
             },
             status=status.HTTP_201_CREATED,
         )
@@ -186,3 +245,93 @@ def unsuspend_driver(request, driver_id: int):
     driver.status = "active"
     driver.save(update_fields=["status"])
     return Response(DriverSerializer(driver).data)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def bulk_update_driver_status(request):
+    serializer = DriverBulkStatusSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    if "ids" in data:
+        ids = data["ids"]
+    else:
+        criteria = data["filter"]
+        queryset = _filtered_drivers(criteria["search"].strip())
+        if criteria.get("status"):
+            queryset = queryset.filter(status=criteria["status"])
+        ids = resolve_filter_ids(queryset)
+
+    results, updated_ids = bulk_update_status(Driver, ids, data["status"])
+    # The UPDATE skipped the post_save receiver that keeps this worker's index current
+    driver_locations.refresh(updated_ids)
+    payload = {
+        "status": data["status"],
+        "updated": len(updated_ids),
+        "results": results,
+    }
+    if data["include_rows"]:
+        rows = Driver.objects.filter(pk__in=updated_ids).order_by("id")
+        payload["rows"] = DriverSerializer(rows, many=True).data
+    return Response(payload)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def update_driver_location(request, driver_id: int):
+    serializer = DriverLocationUpdateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    latitude = serializer.validated_data["latitude"]
+    longitude = serializer.validated_data["longitude"]
+    updated_at = timezone.now()
+    # The busiest write there is: one UPDATE, no full_clean() uniqueness
+    # checks and no save signals (position columns feed no stats, ETags or search)
+    if not Driver.objects.filter(pk=driver_id).update(
+        latitude=latitude, longitude=longitude, location_updated_at=updated_at
+    ):
+        return Response({"detail": "Driver not found"}, status=404)
+
+    # What the post_save receiver would do: move the driver in this worker's index
+    if driver_locations.loaded_at is not None:
+        row = Driver.objects.filter(pk=driver_id).values_list("vehicle_type", "online", "status", "on_trip").first()
+        if row is not None:
+            vehicle_type, online, driver_status, on_trip = row
+            driver_locations.update(
+                driver_id, latitude, longitude, vehicle_type, online=online, status=driver_status, on_trip=on_trip
+            )
+    return Response({
+        "id": driver_id,
+        "latitude": latitude,
+        "longitude": longitude,
+        "location_updated_at": updated_at,
+    })
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def nearby_drivers(request):
+    serializer = DriverNearbyQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    index = get_driver_index()
+    if "k" in params:
+        hits = index.nearest(
+            params["lat"], params["lng"], k=params["k"],
+            vehicle_type=params.get("vehicle_type"), max_km=params.get("radius_km"),
+        )
+    else:
+        hits = index.within(params["lat"], params["lng"], params["radius_km"], vehicle_type=params.get("vehicle_type"))
+    return Response({
+        "results": [
+            {
+                "id": entry.driver_id,
+                "distance_km": round(distance, 3),
+                "latitude": entry.latitude,
+                "longitude": entry.longitude,
+                "vehicle_type": entry.vehicle_type,
+            }
+            for distance, entry in hits
+        ],
+    })
+
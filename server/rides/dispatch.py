@@ -0,0 +1,8 @@
+from drivers.dispatch import DispatchQueue
+
+from .models import Ride
+from .rollups import ride_rollup
+from .search import ride_search_index
+
+
+ride_dispatch = DispatchQueue(Ride, open_status="ongoing", rollup=ride_rollup, search_index=ride_search_index)
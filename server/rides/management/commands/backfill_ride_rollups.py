@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from rides.models import Ride
+from rides.rollups import ride_rollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild daily ride rollups from the rides table for a date range"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day to rebuild (YYYY-MM-DD); defaults to the oldest ride")
+        parser.add_argument("--end", help="Last day to rebuild (YYYY-MM-DD); defaults to today")
+        parser.add_argument("--days", type=int, help="Rebuild only the last N days, ending today")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        end = parse_date(options["end"]) if options["end"] else today
+        if options["days"]:
+            start = end - timedelta(days=options["days"] - 1)
+        elif options["start"]:
+            start = parse_date(options["start"])
+        else:
+            oldest = Ride.objects.order_by("time").values_list("time", flat=True).first()
+            start = timezone.localdate(oldest) if oldest else end
+        if start is None or end is None or start > end:
+            raise CommandError("Provide a valid --start/--end range.")
+
+        buckets = ride_rollup.backfill(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} ride rollup buckets for {start} to {end}."))
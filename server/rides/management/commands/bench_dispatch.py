@@ -0,0 +1,96 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from drivers.dispatch import STRATEGIES, dispatch_batch
+from drivers.locations import DriverLocationIndex
+from drivers.models import Driver
+from rides.dispatch import ride_dispatch
+from rides.models import Ride
+from users.models import User
+
+
+# Roughly Metro Manila
+LAT_RANGE = (14.35, 14.80)
+LNG_RANGE = (120.90, 121.15)
+
+
+class Command(BaseCommand):
+    help = "Compare greedy and optimal batch dispatch on seeded rides and drivers (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--drivers", type=int, default=2_000)
+        parser.add_argument("--rides", type=int, default=500, help="Waiting rides per batch")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options["drivers"], options["rides"])
+            self.stdout.write(
+                f"{'strategy':>9} {'requests':>9} {'matched':>8} {'avg km':>7} {'match ms':>9} "
+                f"{'commit ms':>10} {'latency ms':>11} {'matches/s':>10}"
+            )
+            for strategy in STRATEGIES:
+                with transaction.atomic():
+                    index = DriverLocationIndex()
+                    index.rebuild()
+                    report = dispatch_batch([ride_dispatch], strategy=strategy, index=index)
+                    self.stdout.write(
+                        f"{strategy:>9} {report.requests:>9} {report.matched:>8} "
+                        f"{report.total_km / max(report.matched, 1):>7.3f} {report.match_seconds * 1e3:>9.1f} "
+                        f"{report.commit_seconds * 1e3:>10.1f} {report.latency_seconds * 1e3:>11.1f} "
+                        f"{report.matches_per_second:>10.0f}"
+                    )
+                    transaction.set_rollback(True)
+            transaction.set_rollback(True)
+
+    def _seed(self, driver_count: int, ride_count: int):
+        rng = random.Random(3)
+        now = timezone.now()
+        Driver.objects.bulk_create(
+            (
+                Driver(
+                    name=f"Bench Driver {index}",
+                    email=f"bench.dispatch{index}@example.com",
+                    phone=f"+63 992 {index:07d}",
+                    status="active",
+                    vehicle_type=rng.choice(["sedan", "motorcycle"]),
+                    license_status="verified",
+                    online=True,
+                    latitude=rng.uniform(*LAT_RANGE),
+                    longitude=rng.uniform(*LNG_RANGE),
+                    join_date=now.date(),
+                    last_active=now,
+                )
+                for index in range(driver_count)
+            ),
+            batch_size=2000,
+        )
+        customer = User.objects.create(
+            name="Bench Rider",
+            email="bench.dispatch.rider@example.com",
+            phone="+63 993 0000000",
+            status="active",
+            kyc_status="verified",
+            join_date=now.date(),
+            last_active=now,
+        )
+        Ride.objects.bulk_create(
+            (
+                Ride(
+                    customer=customer,
+                    pickup="Pickup",
+                    destination="Destination",
+                    status="ongoing",
+                    fare=Decimal("150.00"),
+                    time=now - timedelta(seconds=index),
+                    pickup_latitude=rng.uniform(*LAT_RANGE),
+                    pickup_longitude=rng.uniform(*LNG_RANGE),
+                )
+                for index in range(ride_count)
+            ),
+            batch_size=2000,
+        )
@@ -0,0 +1,140 @@
+import gc
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from deliveries.models import Delivery
+from deliveries.serializers import DeliverySerializer, delivery_list_serializer
+from drivers.models import Driver
+from drivers.serializers import DriverSerializer, driver_list_serializer
+from rides.models import Ride
+from rides.serializers import RideSerializer, ride_list_serializer
+from users.models import User
+from users.serializers import UserSerializer, user_list_serializer
+
+
+PAGE_SIZES = (5, 100, 10_000)
+
+
+class Command(BaseCommand):
+    help = "Compare ModelSerializer and values()-backed list serialization (seeded rows are rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=5, help="Timed runs per page size (median is reported)")
+
+    def handle(self, *args, **options):
+        iterations: int = options["iterations"]
+        rows = max(PAGE_SIZES)
+
+        with transaction.atomic():
+            self._seed(rows)
+            cases = (
+                ("users", User.objects.order_by("id"), UserSerializer, user_list_serializer),
+                ("drivers", Driver.objects.order_by("id"), DriverSerializer, driver_list_serializer),
+                ("rides", Ride.objects.select_related("customer", "driver").order_by("-time", "id"),
+                 RideSerializer, ride_list_serializer),
+                ("deliveries", Delivery.objects.select_related("driver").order_by("-time", "id"),
+                 DeliverySerializer, delivery_list_serializer),
+            )
+            self.stdout.write(f"{'endpoint':>10} {'rows':>6} {'serializer µs/row':>18} {'values µs/row':>14} {'speedup':>8}")
+            for label, queryset, serializer_class, fast in cases:
+                for size in PAGE_SIZES:
+                    slow_page = list(queryset[:size])
+                    fast_page = list(fast.values(queryset)[:size])
+                    slow = self._median(lambda: serializer_class(slow_page, many=True).data, iterations)
+                    quick = self._median(lambda: fast.to_representation(fast_page), iterations)
+                    self.stdout.write(
+                        f"{label:>10} {size:>6} {slow / size * 1e6:>18.2f} {quick / size * 1e6:>14.2f} "
+                        f"{slow / quick:>7.1f}x"
+                    )
+            transaction.set_rollback(True)
+
+    def _median(self, func, iterations: int) -> float:
+        func()  # warm up
+        timings = []
+        # Like timeit, keep collector pauses from landing on one side at random
+        gc.disable()
+        try:
+            for _ in range(iterations):
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+        timings.sort()
+        return timings[len(timings) // 2]
+
+    def _seed(self, count: int):
+        now = timezone.now()
+        users = User.objects.bulk_create(
+            (
+                User(
+                    name=f"Bench Rider {index}",
+                    email=f"bench.rider{index}@example.com",
+                    phone=f"+63 990 {index:07d}",
+                    favorite_locations=["Home"],
+                    status="active",
+                    kyc_status="verified",
+                    total_spent=Decimal("100.00"),
+                    join_date=now.date(),
+                    last_active=now,
+                )
+                for index in range(count)
+            ),
+            batch_size=2000,
+        )
+        drivers = Driver.objects.bulk_create(
+            (
+                Driver(
+                    name=f"Bench Driver {index}",
+                    email=f"bench.driver{index}@example.com",
+                    phone=f"+63 991 {index:07d}",
+                    status="active",
+                    vehicle_type="sedan",
+                    license_status="verified",
+                    rating=4.5,
+                    earnings=Decimal("1000.00"),
+                    license_photo=f"drivers/license_photos/{index}.jpg",
+                    join_date=now.date(),
+                    last_active=now,
+                )
+                for index in range(count)
+            ),
+            batch_size=2000,
+        )
+        Ride.objects.bulk_create(
+            (
+                Ride(
+                    customer=users[index],
+                    driver=drivers[index] if index % 10 else None,
+                    pickup="Pickup",
+                    destination="Destination",
+                    status="completed",
+                    fare=Decimal("150.00"),
+                    time=now - timedelta(minutes=index),
+                )
+                for index in range(count)
+            ),
+            batch_size=2000,
+        )
+        Delivery.objects.bulk_create(
+            (
+                Delivery(
+                    sender="Sender",
+                    receiver="Receiver",
+                    driver=drivers[index] if index % 10 else None,
+                    package="Parcel",
+                    pickup="Pickup",
+                    destination="Destination",
+                    status="delivered",
+                    fee=Decimal("80.00"),
+                    time=now - timedelta(minutes=index),
+                )
+                for index in range(count)
+            ),
+            batch_size=2000,
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from rides.search import ride_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized search index used by the rides list endpoint"
+
+    def handle(self, *args, **options):
+        indexed = ride_search_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} rides."))
@@ -0,0 +1,30 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from deliveries.dispatch import delivery_dispatch
+from drivers.dispatch import DEFAULT_MAX_KM, STRATEGIES, dispatch_batch
+from rides.dispatch import ride_dispatch
+
+
+class Command(BaseCommand):
+    help = "Assign free drivers to waiting rides and deliveries in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--window", type=float, default=2.0,
+                            help="Seconds to collect requests between batches")
+        parser.add_argument("--strategy", choices=STRATEGIES, default="optimal")
+        parser.add_argument("--max-km", type=float, default=DEFAULT_MAX_KM, help="Farthest pickup to offer a driver")
+        parser.add_argument("--once", action="store_true", help="Run a single batch and exit")
+
+    def handle(self, *args, **options):
+        queues = [ride_dispatch, delivery_dispatch]
+        while True:
+            started = time.monotonic()
+            report = dispatch_batch(queues, strategy=options["strategy"], max_km=options["max_km"])
+            if report.requests or options["once"]:
+                self.stdout.write(json.dumps(report.as_dict()))
+            if options["once"]:
+                return
+            time.sleep(max(0.0, options["window"] - (time.monotonic() - started)))
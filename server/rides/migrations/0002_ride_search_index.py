@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends keep using icontains lookups
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS rides_ride_search USING fts5("
+        "customer, driver, pickup, destination, "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO rides_ride_search (rowid, customer, driver, pickup, destination) "
+        "SELECT r.id, u.name, d.name, r.pickup, r.destination "
+        "FROM rides_ride r "
+        "INNER JOIN users_user u ON u.id = r.customer_id "
+        "LEFT OUTER JOIN drivers_driver d ON d.id = r.driver_id"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS rides_ride_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0001_initial'),
+        ('rides', '0001_initial'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(fields=['-time', 'id'], name='rides_ride_time_id_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:21
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    Ride = apps.get_model('rides', 'Ride')
+    RideDailyRollup = apps.get_model('rides', 'RideDailyRollup')
+    db = schema_editor.connection.alias
+    rows = (
+        Ride.objects.using(db)
+        .annotate(day=TruncDate('time', tzinfo=timezone.get_current_timezone()))
+        .values('day', 'status', vehicle=F('driver__vehicle_type'))
+        .annotate(total=Count('id'), amount=Sum('fare'))
+        .order_by()
+    )
+    RideDailyRollup.objects.using(db).bulk_create([
+        RideDailyRollup(
+            day=row['day'],
+            status=row['status'],
+            vehicle_type=row['vehicle'] or '',
+            count=row['total'],
+            fare_sum=row['amount'] or 0,
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0002_ride_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RideDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('ongoing', 'Ongoing'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=10)),
+                ('vehicle_type', models.CharField(blank=True, default='', max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('fare_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'status', 'vehicle_type'), name='ride_rollup_unique_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0011_driverapplication_stats_indexes'),
+        ('rides', '0003_ride_daily_rollup'),
+        ('users', '0009_user_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(fields=['status', 'time'], name='rides_ride_status_time_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0013_driver_on_trip'),
+        ('rides', '0004_ride_status_time_index'),
+        ('users', '0009_user_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ride',
+            name='pickup_latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ride',
+            name='pickup_longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(condition=models.Q(('driver__isnull', True)), fields=['status', 'time'], name='rides_ride_waiting_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from users.models import User
 from drivers.models import Driver
 
@@ -14,4 +15,33 @@ class Ride(models.Model):
     destination = models.CharField(max_length=255)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
     fare = models.DecimalField(max_digits=8, decimal_places=2)
-    time = models.DateTimeField()
\ No newline at end of file
+    time = models.DateTimeField()
+    # Pickup point used by dispatch; rides without one are never auto-assigned
+    pickup_latitude = models.FloatField(blank=True, null=True)
+    pickup_longitude = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-time", "id"], name="rides_ride_time_id_idx"),
+            models.Index(fields=["status", "time"], name="rides_ride_status_time_idx"),
+            models.Index(fields=["status", "time"], condition=Q(driver__isnull=True), name="rides_ride_waiting_idx"),
+        ]
+
+
+class RideDailyRollup(models.Model):
+    """Rides per local day, status and driver vehicle type, with fare totals.
+
+    Maintained from the Ride receivers in ``rides.signals`` and rebuilt by
+    the ``backfill_ride_rollups`` command.
+    """
+
+    day = models.DateField()
+    status = models.CharField(max_length=10, choices=Ride.STATUS_CHOICES)
+    vehicle_type = models.CharField(max_length=20, blank=True, default="")
+    count = models.IntegerField(default=0)
+    fare_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "status", "vehicle_type"], name="ride_rollup_unique_bucket"),
+        ]
@@ -0,0 +1,6 @@
+from sakayhub_admin.rollups import DailyRollup
+
+from .models import Ride, RideDailyRollup
+
+
+ride_rollup = DailyRollup(RideDailyRollup, Ride, amount_field="fare_sum", source_amount="fare")
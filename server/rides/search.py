@@ -0,0 +1,14 @@
+from sakayhub_admin.search import SearchIndex
+
+from .models import Ride
+
+
+# Denormalized per-ride document so search never joins users/drivers.
+# Results keep the list's (-time, id) ordering rather than relevance.
+ride_search_index = SearchIndex(
+    Ride,
+    table="rides_ride_search",
+    columns=("customer", "driver", "pickup", "destination"),
+    sources={"customer": "customer__name", "driver": "driver__name"},
+    ranked=False,
+)
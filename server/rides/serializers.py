@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from rides.models import Ride
+from sakayhub_admin.serialization import ValuesSerializer
 
 
 class RideSerializer(serializers.ModelSerializer):
@@ -33,3 +34,8 @@ class RideSerializer(serializers.ModelSerializer):
             return "Unassigned"
 
 
+# values()-backed twin of RideSerializer for list pages
+ride_list_serializer = ValuesSerializer(
+    RideSerializer,
+    related={"customer": ("customer__name", "Unknown"), "driver": ("driver__name", "Unassigned")},
+)
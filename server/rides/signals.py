@@ -0,0 +1,121 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from drivers.models import Driver
+from sakayhub_admin import versions as change_versions
+from users.models import User
+from .dispatch import ride_dispatch
+from .models import Ride
+from .rollups import ride_rollup
+from .search import ride_search_index
+
+
+change_versions.track(Ride)
+
+
+def _name_may_have_changed(update_fields) -> bool:
+    return not update_fields or "name" in update_fields
+
+
+@receiver(post_save, sender=Ride)
+def index_ride(sender, instance, using=None, **kwargs):
+    ride_search_index.update(instance, using=using)
+
+
+@receiver(post_delete, sender=Ride)
+def unindex_ride(sender, instance, using=None, **kwargs):
+    ride_search_index.delete(instance.pk, using=using)
+
+
+@receiver(post_save, sender=User)
+def reindex_customer_rides(sender, instance, created=False, update_fields=None, using=None, **kwargs):
+    if created or not _name_may_have_changed(update_fields):
+        return
+    ride_search_index.refresh(Ride.objects.using(using).filter(customer_id=instance.pk), using=using)
+
+
+@receiver(post_save, sender=Driver)
+def reindex_driver_rides(sender, instance, created=False, update_fields=None, using=None, **kwargs):
+    if created or not _name_may_have_changed(update_fields):
+        return
+    ride_search_index.refresh(Ride.objects.using(using).filter(driver_id=instance.pk), using=using)
+
+
+@receiver(pre_delete, sender=Driver)
+def remember_driver_rides(sender, instance, using=None, **kwargs):
+    # Deleting a driver nulls Ride.driver with a bulk UPDATE that sends no
+    # signals, so note the affected rides before they lose the reference
+    instance._search_ride_ids = list(
+        Ride.objects.using(using).filter(driver_id=instance.pk).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Driver)
+def reindex_orphaned_rides(sender, instance, using=None, **kwargs):
+    ride_ids = getattr(instance, "_search_ride_ids", None)
+    if ride_ids:
+        ride_search_index.refresh(Ride.objects.using(using).filter(pk__in=ride_ids), using=using)
+
+
+@receiver(pre_save, sender=Ride)
+def load_ride_rollup_row(sender, instance, using=None, **kwargs):
+    instance._rollup_row = None if instance._state.adding else ride_rollup.stored_row(instance.pk, using=using)
+
+
+@receiver(post_save, sender=Ride)
+def update_ride_rollup(sender, instance, using=None, **kwargs):
+    # Read the row back so the bucket key uses stored values and the driver's vehicle type
+    new_row = ride_rollup.stored_row(instance.pk, using=using)
+    ride_rollup.apply_change(getattr(instance, "_rollup_row", None), new_row, using=using)
+
+
+@receiver(pre_delete, sender=Ride)
+def load_deleted_ride_rollup_row(sender, instance, using=None, **kwargs):
+    instance._rollup_row = ride_rollup.stored_row(instance.pk, using=using)
+
+
+@receiver(post_delete, sender=Ride)
+def remove_ride_rollup(sender, instance, using=None, **kwargs):
+    ride_rollup.apply_change(getattr(instance, "_rollup_row", None), None, using=using)
+
+
+@receiver(pre_save, sender=Driver)
+def load_driver_ride_rollup_rows(sender, instance, update_fields=None, using=None, **kwargs):
+    # Ride buckets key on the driver's vehicle type, so a change moves the driver's rides
+    instance._ride_rollup_rows = None
+    if instance._state.adding or (update_fields and "vehicle_type" not in update_fields):
+        return
+    stored = Driver.objects.using(using).filter(pk=instance.pk).values_list("vehicle_type", flat=True).first()
+    if stored is not None and stored != instance.vehicle_type:
+        instance._ride_rollup_rows = ride_rollup.rows_matching(using=using, driver_id=instance.pk)
+
+
+@receiver(post_save, sender=Driver)
+def rekey_driver_ride_rollups(sender, instance, using=None, **kwargs):
+    ride_rollup.rekey(getattr(instance, "_ride_rollup_rows", None), using=using)
+
+
+@receiver(pre_delete, sender=Driver)
+def load_deleted_driver_ride_rollup_rows(sender, instance, using=None, **kwargs):
+    instance._ride_rollup_rows = ride_rollup.rows_matching(using=using, driver_id=instance.pk)
+
+
+@receiver(post_delete, sender=Driver)
+def rekey_orphaned_ride_rollups(sender, instance, using=None, **kwargs):
+    # The rides lost their driver in a bulk UPDATE that sent no signals
+    ride_rollup.rekey(getattr(instance, "_ride_rollup_rows", None), using=using)
+
+
+@receiver(pre_save, sender=Ride)
+def load_ride_driver(sender, instance, using=None, **kwargs):
+    instance._dispatch_driver_id = ride_dispatch.stored_driver_id(instance, using=using)
+
+
+@receiver(post_save, sender=Ride)
+def release_ride_driver(sender, instance, using=None, **kwargs):
+    ride_dispatch.release(instance, previous_driver_id=getattr(instance, "_dispatch_driver_id", None), using=using)
+
+
+@receiver(post_delete, sender=Ride)
+def release_deleted_ride_driver(sender, instance, using=None, **kwargs):
+    ride_dispatch.release(instance, deleted=True, using=using)
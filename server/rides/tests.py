@@ -1,3 +1,471 @@
-from django.test import TestCase
+import itertools
+import random
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from drivers.dispatch import assign_greedy, assign_optimal, dispatch_batch
+from drivers.locations import DriverLocationIndex
+from drivers.models import Driver
+from sakayhub_admin.dates import local_midnight
+from users.models import User
+from .dispatch import ride_dispatch
+from .models import Ride, RideDailyRollup
+
+
+class RideListCursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        AuthUser = get_user_model()
+        self.admin_user = AuthUser.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+        now = timezone.now()
+        self.customer = User.objects.create(
+            name="Rider One",
+            email="rider1@example.com",
+            phone="+63 917 100 0001",
+            status="active",
+            kyc_status="verified",
+            join_date=now.date(),
+            last_active=now,
+        )
+        self.driver = Driver.objects.create(
+            name="Driver One",
+            email="driver1@example.com",
+            phone="+63 917 200 0001",
+            status="active",
+            vehicle_type="motorcycle",
+            license_status="verified",
+            join_date=now.date(),
+            last_active=now,
+        )
+        # Pairs of rides share a timestamp so the id tie-breaker is exercised
+        for index in range(12):
+            Ride.objects.create(
+                customer=self.customer,
+                driver=self.driver,
+                pickup="City Mall",
+                destination="Old Town",
+                status="completed",
+                fare="120.00",
+                time=now - timedelta(minutes=index // 2),
+            )
+
+    def _expected_ids(self):
+        return list(Ride.objects.order_by("-time", "id").values_list("id", flat=True))
+
+    def test_cursor_pages_walk_forward_and_back_without_gaps(self):
+        response = self.client.get("/api/rides/list/?cursor=&page_size=5")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertNotIn("count", body)
+        self.assertIsNone(body["previous"])
+
+        seen = [row["id"] for row in body["results"]]
+        pages = [body]
+        while body["next"]:
+            body = self.client.get(body["next"]).json()
+            pages.append(body)
+            seen.extend(row["id"] for row in body["results"])
+
+        self.assertEqual(seen, self._expected_ids())
+        self.assertEqual(len(pages), 3)
+
+        back = self.client.get(pages[-1]["previous"]).json()
+        self.assertEqual(
+            [row["id"] for row in back["results"]],
+            [row["id"] for row in pages[1]["results"]],
+        )
+
+    def test_cursor_mode_count_is_opt_in(self):
+        response = self.client.get("/api/rides/list/?cursor=&with_count=1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], 12)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get("/api/rides/list/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_sparse_fields_keep_cursor_working(self):
+        with CaptureQueriesContext(connection) as queries:
+            body = self.client.get("/api/rides/list/?cursor=&fields=customer,fare").json()
+        self.assertNotIn('"pickup"', queries.captured_queries[-1]["sql"])
+
+        rows = list(body["results"])
+        while body["next"]:
+            body = self.client.get(body["next"]).json()
+            rows.extend(body["results"])
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(set(rows[0]), {"customer", "fare"})
+        self.assertEqual(rows[0], {"customer": "Rider One", "fare": "120.00"})
+
+    def test_page_number_mode_is_unchanged(self):
+        response = self.client.get("/api/rides/list/?page=2")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual(body["count"], 12)
+        self.assertEqual([row["id"] for row in body["results"]], self._expected_ids()[5:10])
+
+
+class RideSearchIndexTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        AuthUser = get_user_model()
+        self.admin_user = AuthUser.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+        now = timezone.now()
+        self.customer = User.objects.create(
+            name="Carla Mendoza",
+            email="carla@example.com",
+            phone="+63 917 100 0002",
+            status="active",
+            kyc_status="verified",
+            join_date=now.date(),
+            last_active=now,
+        )
+        self.driver = Driver.objects.create(
+            name="Dante Villanueva",
+            email="dante@example.com",
+            phone="+63 917 200 0002",
+            status="active",
+            vehicle_type="sedan",
+            license_status="verified",
+            join_date=now.date(),
+            last_active=now,
+        )
+        self.older = Ride.objects.create(
+            customer=self.customer,
+            driver=self.driver,
+            pickup="Harbor Point",
+            destination="Science Museum",
+            status="completed",
+            fare="150.00",
+            time=now - timedelta(hours=2),
+        )
+        self.newer = Ride.objects.create(
+            customer=self.customer,
+            driver=None,
+            pickup="Tech Park",
+            destination="Harbor Point",
+            status="ongoing",
+            fare="90.00",
+            time=now,
+        )
+
+    def _search(self, term):
+        response = self.client.get("/api/rides/list/", {"search": term})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["id"] for row in response.json()["results"]]
+
+    def test_search_covers_names_and_places_in_time_order(self):
+        self.assertEqual(self._search("harbor"), [self.newer.id, self.older.id])
+        self.assertEqual(self._search("carla"), [self.newer.id, self.older.id])
+        self.assertEqual(self._search("villa"), [self.older.id])
+        self.assertEqual(self._search("science mus"), [self.older.id])
+
+    def test_related_name_changes_refresh_ride_documents(self):
+        self.customer.name = "Carmela Mendoza"
+        self.customer.save()
+        self.driver.name = "Rafael Villanueva"
+        self.driver.save()
+
+        self.assertEqual(self._search("carla"), [])
+        self.assertEqual(self._search("carmela"), [self.newer.id, self.older.id])
+        self.assertEqual(self._search("rafael"), [self.older.id])
+
+        self.driver.delete()
+        self.assertEqual(self._search("rafael"), [])
+
+    def test_export_uses_same_search_and_flattens_names(self):
+        response = self.client.get("/api/rides/export/", {"search": "harbor"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual(lines[0], "id,customer,driver,pickup,destination,status,fare,time")
+        self.assertEqual([line.split(",")[0] for line in lines[1:]], [str(self.newer.id), str(self.older.id)])
+        self.assertIn("Dante Villanueva", lines[2])
+
+
+class RideDailyRollupTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        AuthUser = get_user_model()
+        self.admin_user = AuthUser.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+        now = timezone.now()
+        self.customer = User.objects.create(
+            name="Rollup Rider",
+            email="rollup@example.com",
+            phone="+63 917 100 0003",
+            status="active",
+            kyc_status="verified",
+            join_date=now.date(),
+            last_active=now,
+        )
+        self.driver = Driver.objects.create(
+            name="Rollup Driver",
+            email="rollup.driver@example.com",
+            phone="+63 917 200 0003",
+            status="active",
+            vehicle_type="motorcycle",
+            license_status="verified",
+            join_date=now.date(),
+            last_active=now,
+        )
+        self.today = timezone.localdate()
+        self.yesterday_noon = local_midnight(self.today - timedelta(days=1)) + timedelta(hours=12)
+
+    def _ride(self, when, ride_status="completed", fare="100.00", driver=True):
+        return Ride.objects.create(
+            customer=self.customer,
+            driver=self.driver if driver else None,
+            pickup="City Mall",
+            destination="Old Town",
+            status=ride_status,
+            fare=fare,
+            time=when,
+        )
+
+    def _range(self):
+        start = (self.today - timedelta(days=1)).isoformat()
+        response = self.client.get("/api/rides/stats/range/", {"start": start, "end": self.today.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_rollups_follow_writes_and_match_backfill(self):
+        first = self._ride(self.yesterday_noon, fare="100.00")
+        self._ride(self.yesterday_noon, ride_status="cancelled", fare="40.00", driver=False)
+        self._ride(timezone.now(), ride_status="ongoing", fare="75.50")
+
+        first.status = "cancelled"
+        first.save()
+
+        body = self._range()
+        yesterday, today = body["days"]
+        self.assertEqual(yesterday["count"], 2)
+        self.assertEqual(yesterday["fare_sum"], 140.0)
+        self.assertEqual(yesterday["by_status"], {"cancelled": 2})
+        self.assertEqual(today["count"], 1)
+        self.assertEqual(body["total"]["by_vehicle_type"], {"motorcycle": 2, "unassigned": 1})
+
+        first.delete()
+        self.assertEqual(self._range()["days"][0]["count"], 1)
+
+        incremental = sorted(RideDailyRollup.objects.filter(count__gt=0).values_list("day", "status", "vehicle_type", "count", "fare_sum"))
+        call_command("backfill_ride_rollups", "--days", "2", stdout=StringIO())
+        rebuilt = sorted(RideDailyRollup.objects.values_list("day", "status", "vehicle_type", "count", "fare_sum"))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_closed_days_are_read_from_rollups(self):
+        self._ride(self.yesterday_noon)
+        # A write that bypasses the model signals is only visible once backfilled
+        Ride.objects.update(fare="999.00")
+        self.assertEqual(self._range()["total"]["fare_sum"], 100.0)
+
+        call_command("backfill_ride_rollups", "--days", "2", stdout=StringIO())
+        self.assertEqual(self._range()["total"]["fare_sum"], 999.0)
+
+    def test_driver_vehicle_change_and_deletion_move_their_rides(self):
+        self._ride(self.yesterday_noon, fare="100.00")
+        self._ride(self.yesterday_noon, ride_status="cancelled", fare="40.00")
+
+        self.driver.vehicle_type = "sedan"
+        self.driver.save()
+        self.assertEqual(self._range()["total"]["by_vehicle_type"], {"sedan": 2})
+
+        self.driver.delete()
+        self.assertEqual(self._range()["total"]["by_vehicle_type"], {"unassigned": 2})
+        self.assertFalse(RideDailyRollup.objects.filter(count__lt=0).exists())
+
+        incremental = sorted(RideDailyRollup.objects.filter(count__gt=0).values_list("day", "status", "vehicle_type", "count", "fare_sum"))
+        call_command("backfill_ride_rollups", "--days", "2", stdout=StringIO())
+        rebuilt = sorted(RideDailyRollup.objects.values_list("day", "status", "vehicle_type", "count", "fare_sum"))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_weekly_stats_and_invalid_range(self):
+        self._ride(timezone.now(), ride_status="ongoing")
+        response = self.client.get("/api/rides/stats/")
+        self.assertEqual(response.json(), {"active_rides": 1, "weekly_rides": 1})
+
+        response = self.client.get("/api/rides/stats/range/", {"start": "2025-02-01", "end": "2025-01-01"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RideDispatchTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        AuthUser = get_user_model()
+        self.admin_user = AuthUser.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+        now = timezone.now()
+        self.customer = User.objects.create(
+            name="Dispatch Rider",
+            email="dispatch@example.com",
+            phone="+63 917 100 0004",
+            status="active",
+            kyc_status="verified",
+            join_date=now.date(),
+            last_active=now,
+        )
+
+    def _driver(self, index, longitude, **overrides):
+        now = timezone.now()
+        fields = {
+            "name": f"Dispatch Driver {index}",
+            "email": f"dispatch.driver{index}@example.com",
+            "phone": f"+63 917 600 {index:04d}",
+            "status": "active",
+            "vehicle_type": "sedan",
+            "license_status": "verified",
+            "online": True,
+            "latitude": 14.55,
+            "longitude": longitude,
+            "join_date": now.date(),
+            "last_active": now,
+        }
+        fields.update(overrides)
+        return Driver.objects.create(**fields)
+
+    def _ride(self, longitude, minutes_ago=0):
+        return Ride.objects.create(
+            customer=self.customer,
+            pickup="Pickup",
+            destination="Destination",
+            status="ongoing",
+            fare="120.00",
+            time=timezone.now() - timedelta(minutes=minutes_ago),
+            pickup_latitude=14.55,
+            pickup_longitude=longitude,
+        )
+
+    def _index(self):
+        index = DriverLocationIndex()
+        index.rebuild()
+        return index
+
+    def test_optimal_beats_greedy_on_total_distance(self):
+        # Greedy grabs the 0.9 edge first and strands the other request with 2.9
+        edges = [(1.0, "r1", "d1"), (2.9, "r1", "d2"), (0.9, "r2", "d1"), (1.0, "r2", "d2")]
+        self.assertEqual(sum(distance for distance, _, _ in assign_greedy(edges)), 3.8)
+        self.assertEqual(
+            sorted(assign_optimal(edges)), [(1.0, "r1", "d1"), (1.0, "r2", "d2")]
+        )
+
+        rng = random.Random(9)
+        for _ in range(40):
+            requests, drivers = rng.randint(1, 4), rng.randint(1, 4)
+            edges = [
+                (rng.uniform(0, 5), request, driver)
+                for request in range(requests) for driver in range(drivers) if rng.random() < 0.7
+            ]
+            pairs = assign_optimal(edges)
+            self.assertEqual(
+                (len(pairs), round(sum(distance for distance, _, _ in pairs), 9)),
+                brute_force_assignment(edges, requests, drivers),
+            )
+
+    def test_batch_assigns_without_double_booking(self):
+        near = self._driver(1, 121.001)
+        far = self._driver(2, 121.02)
+        self._driver(3, 121.0, online=False)
+        first = self._ride(121.0, minutes_ago=5)
+        second = self._ride(121.021)
+        stale_index = self._index()
+
+        report = dispatch_batch([ride_dispatch], index=self._index())
+        self.assertEqual(report.matched, 2)
+        self.assertEqual(
+            sorted((pk, driver_id) for _, pk, driver_id, _ in report.assignments),
+            [(first.id, near.id), (second.id, far.id)],
+        )
+        self.assertEqual(set(Driver.objects.filter(on_trip=True).values_list("id", flat=True)), {near.id, far.id})
+
+        # Another worker with an older view of the drivers cannot book them again
+        third = self._ride(121.0)
+        report = dispatch_batch([ride_dispatch], index=stale_index)
+        self.assertEqual((report.matched, report.conflicts), (0, 1))
+        third.refresh_from_db()
+        self.assertIsNone(third.driver_id)
+
+        # The assignment shows up in the list, rollups and search like a saved ride
+        rows = {row["id"]: row for row in self.client.get("/api/rides/list/").json()["results"]}
+        self.assertEqual(rows[first.id]["driver"], near.name)
+        self.assertEqual(
+            RideDailyRollup.objects.get(status="ongoing", vehicle_type="sedan").count, 2
+        )
+        self.assertEqual(
+            [row["id"] for row in self.client.get("/api/rides/list/", {"search": near.name}).json()["results"]],
+            [first.id],
+        )
+
+        first.refresh_from_db()
+        first.status = "completed"
+        first.save()
+        near.refresh_from_db()
+        self.assertFalse(near.on_trip)
+        report = dispatch_batch([ride_dispatch], index=self._index())
+        self.assertEqual([(pk, driver_id) for _, pk, driver_id, _ in report.assignments], [(third.id, near.id)])
+
+    def test_reassigning_or_clearing_the_driver_frees_the_previous_one(self):
+        first = self._driver(1, 121.001)
+        second = self._driver(2, 121.02)
+        spare = self._driver(3, 121.5)
+        reassigned = self._ride(121.0, minutes_ago=5)
+        cleared = self._ride(121.021)
+        dispatch_batch([ride_dispatch], index=self._index())
+        self.assertEqual(set(Driver.objects.filter(on_trip=True).values_list("id", flat=True)), {first.id, second.id})
+
+        reassigned.refresh_from_db()
+        reassigned.driver = spare
+        reassigned.save()
+        cleared.refresh_from_db()
+        cleared.driver = None
+        cleared.save()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertFalse(first.on_trip)
+        self.assertFalse(second.on_trip)
+
+
+def brute_force_assignment(edges, requests, drivers):
+    """(matches, total distance) of the best maximum matching, by trying every choice."""
+    cost = {(request, driver): distance for distance, request, driver in edges}
+    best = (0, 0.0)
+    for choice in itertools.product([None, *range(drivers)], repeat=requests):
+        picked = [(request, driver) for request, driver in enumerate(choice) if driver is not None]
+        if len({driver for _, driver in picked}) != len(picked) or any(pair not in cost for pair in picked):
+            continue
+        total = round(sum(cost[pair] for pair in picked), 9)
+        if (-len(picked), total) < (-best[0], best[1]):
+            best = (len(picked), total)
+    return best
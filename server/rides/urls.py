@@ -3,5 +3,7 @@ from . import views
 
 urlpatterns = [
     path('list/', views.list_rides, name='rides-list'),
+    path('export/', views.export_rides, name='rides-export'),
     path('stats/', views.ride_stats, name='rides-stats'),
+    path('stats/range/', views.ride_stats_range, name='rides-stats-range'),
 ]
\ No newline at end of file
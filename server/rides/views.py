@@ -1,43 +1,83 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Ride
-from .serializers import RideSerializer
-from .pagination import RidePagination
-from django.db.models import Q
+from drivers.models import Driver
+from users.models import User
+from .models import Ride, RideDailyRollup
+from .serializers import ride_list_serializer
+from .pagination import RidePagination, RideCursorPagination
+from .rollups import ride_rollup
+from .search import ride_search_index
+from sakayhub_admin.dates import parse_day_range
+from sakayhub_admin.export import EXPORT_RENDERERS, export_response
+from sakayhub_admin.versions import conditional
 from django.utils import timezone
 from django.db.models import Count
 
 
+EXPORT_COLUMNS = [
+    ("id", "id"),
+    ("customer", "customer__name"),
+    ("driver", "driver__name"),
+    ("pickup", "pickup"),
+    ("destination", "destination"),
+    ("status", "status"),
+    ("fare", "fare"),
+    ("time", "time"),
+]
+
+
+def _filtered_rides(request):
+    queryset = Ride.objects.all().order_by("-time", "id")
+    search = request.GET.get("search", "").strip()
+    if search:
+        queryset = ride_search_index.filter(queryset, search)
+    return queryset
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@conditional(Ride, User, Driver)
 def list_rides(request):
-    queryset = Ride.objects.select_related("customer", "driver").all().order_by("-time", "id")
-    search = request.GET.get("search", "").strip()
-    if search:
-        queryset = queryset.filter(
-            Q(customer__name__icontains=search)
-            | Q(driver__name__icontains=search)
-            | Q(pickup__icontains=search)
-            | Q(destination__icontains=search)
-        )
-    paginator = RidePagination()
+    # ?fields= / ?exclude= narrow both the payload and the SELECT
+    serializer = ride_list_serializer.for_request(request)
+    # The cursor columns are fetched even when they are not rendered
+    queryset = serializer.values(_filtered_rides(request), include=RideCursorPagination.ordering_fields())
+    if RideCursorPagination.is_requested(request):
+        paginator = RideCursorPagination()
+    else:
+        paginator = RidePagination()
     page = paginator.paginate_queryset(queryset, request)
-    serializer = RideSerializer(page, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    return paginator.get_paginated_response(serializer.to_representation(page))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@renderer_classes(EXPORT_RENDERERS)
+def export_rides(request):
+    return export_response(request, _filtered_rides(request), EXPORT_COLUMNS, "rides")
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@conditional(Ride, daily=True)
 def ride_stats(request):
-    now = timezone.now()
-    week_start = (now - timezone.timedelta(days=now.weekday())).date()
+    today = timezone.localdate()
+    week_start = today - timezone.timedelta(days=today.weekday())
 
     active_rides = Ride.objects.filter(status="ongoing").count()
-    weekly_rides = Ride.objects.filter(time__date__gte=week_start).count()
+    weekly_rides = ride_rollup.count_between(week_start, today)
 
     return Response({
         "active_rides": active_rides,
         "weekly_rides": weekly_rides,
     })
 
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@conditional(Ride, RideDailyRollup, daily=True)
+def ride_stats_range(request):
+    # Arbitrary ranges come from the daily rollups; today is aggregated live
+    start, end = parse_day_range(request.query_params)
+    return Response(ride_rollup.summarize(start, end))
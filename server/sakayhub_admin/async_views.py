@@ -0,0 +1,38 @@
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """``APIView`` whose ``async def`` handlers run on the event loop under ASGI.
+
+    DRF's ``dispatch()`` is synchronous, so Django would otherwise run an
+    async view's handler through ``async_to_sync`` on a worker thread.
+    Authentication, permissions and throttles may query the database, so
+    they run through ``sync_to_async``; handlers must use the async ORM or
+    wrap sync work the same way. Under WSGI the view still works: Django
+    runs it in a private event loop.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
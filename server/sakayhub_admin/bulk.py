@@ -0,0 +1,69 @@
+from django.db import transaction
+from rest_framework import serializers
+
+from . import versions as change_versions
+
+
+MAX_BULK_IDS = 1000
+
+
+class BulkStatusSerializer(serializers.Serializer):
+    """Shared payload for bulk status changes: either ``ids`` or a ``filter``.
+
+    Subclasses declare ``status`` (a ChoiceField over the model's choices) and
+    ``filter`` (a nested serializer describing the rows to match).
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_BULK_IDS,
+    )
+    include_rows = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Provide either 'ids' or 'filter', not both.")
+        return attrs
+
+
+def resolve_filter_ids(queryset):
+    """Return the primary keys matched by ``queryset``, refusing oversized selections."""
+    ids = list(queryset.order_by("pk").values_list("pk", flat=True)[: MAX_BULK_IDS + 1])
+    if len(ids) > MAX_BULK_IDS:
+        raise serializers.ValidationError(
+            {"filter": f"Filter matches more than {MAX_BULK_IDS} rows; narrow it down."}
+        )
+    return ids
+
+
+def bulk_update_status(model, ids, new_status: str):
+    """Set ``status`` on every id with one UPDATE and report what happened to each.
+
+    Returns ``(results, updated_ids)`` where ``results`` lists
+    ``{"id", "outcome"}`` in request order; outcome is ``updated``,
+    ``unchanged`` (already in that status) or ``not_found``. ``save()`` and
+    ``full_clean()`` are skipped on purpose: only ``status`` changes and it
+    is validated against the model choices by the request serializer.
+    """
+    ids = list(dict.fromkeys(ids))
+    with transaction.atomic():
+        current = dict(model.objects.filter(pk__in=ids).values_list("pk", "status"))
+        updated_ids = [pk for pk in ids if pk in current and current[pk] != new_status]
+        if updated_ids:
+            model.objects.filter(pk__in=updated_ids).update(status=new_status)
+            # update() sends no post_save, so invalidate cached list ETags here
+            change_versions.bump(model)
+
+    updated = set(updated_ids)
+    results = []
+    for pk in ids:
+        if pk not in current:
+            outcome = "not_found"
+        elif pk in updated:
+            outcome = "updated"
+        else:
+            outcome = "unchanged"
+        results.append({"id": pk, "outcome": outcome})
+    return results, updated_ids
@@ -0,0 +1,44 @@
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+
+def local_midnight(day: date) -> datetime:
+    """Aware datetime for the start of ``day`` in the configured timezone."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def day_bounds(day: date):
+    """Half-open ``[start, end)`` covering ``day`` in the configured timezone.
+
+    Filtering ``field__gte=start, field__lt=end`` keeps the column bare, so an
+    index on it can be used, unlike ``field__date=day``.
+    """
+    return local_midnight(day), local_midnight(day + timedelta(days=1))
+
+
+def month_bounds(day: date):
+    """Half-open ``[start, end)`` covering the month that contains ``day``."""
+    first = day.replace(day=1)
+    following = (first + timedelta(days=32)).replace(day=1)
+    return local_midnight(first), local_midnight(following)
+
+
+def parse_day_range(params, default_days: int = 30, max_days: int = 3660):
+    """Read ``start``/``end`` (inclusive, YYYY-MM-DD) from query params.
+
+    Missing bounds default to the last ``default_days`` days ending today.
+    """
+    today = timezone.localdate()
+    try:
+        end = parse_date(params.get("end") or "") or today
+        start = parse_date(params.get("start") or "") or end - timedelta(days=default_days - 1)
+    except ValueError:
+        raise ValidationError({"detail": "Dates must be valid YYYY-MM-DD values."})
+    if start > end:
+        raise ValidationError({"detail": "start must not be after end."})
+    if (end - start).days >= max_days:
+        raise ValidationError({"detail": f"Date range cannot exceed {max_days} days."})
+    return start, end
@@ -0,0 +1,31 @@
+import math
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def haversine_many(pairs) -> list:
+    """``haversine_km()`` for a sequence of ``(lat1, lng1, lat2, lng2)`` tuples.
+
+    Works column-wise like a vectorised version would: every distinct
+    latitude's cosine is computed once, which is most of the trigonometry
+    when many pairs share a pickup point.
+    """
+    pairs = list(pairs)
+    radians, sin, asin, sqrt = math.radians, math.sin, math.asin, math.sqrt
+    cosines = {lat: math.cos(radians(lat)) for pair in pairs for lat in (pair[0], pair[2])}
+    diameter = 2 * EARTH_RADIUS_KM
+    return [
+        diameter * asin(sqrt(min(1.0, sin(radians(lat2 - lat1) / 2) ** 2
+                                 + cosines[lat1] * cosines[lat2] * sin(radians(lng2 - lng1) / 2) ** 2)))
+        for lat1, lng1, lat2, lng2 in pairs
+    ]
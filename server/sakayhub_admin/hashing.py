@@ -0,0 +1,74 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, user_login_failed
+from django.contrib.auth.hashers import make_password, verify_password
+
+
+class HashingPool:
+    """A small process-wide thread pool for PBKDF2 work, for async views.
+
+    Django's own ``acheck_password()`` hashes on the event loop, which
+    stalls every other request the loop is serving. Here hashing runs on
+    ``PASSWORD_HASHING_WORKERS`` threads (default: one per CPU); hashlib
+    releases the GIL while it hashes, so they really run in parallel, and
+    the bound keeps a login storm from taking every core. The threads
+    never touch the database.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                workers = getattr(settings, "PASSWORD_HASHING_WORKERS", None) or os.cpu_count() or 1
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hashing")
+            return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), partial(func, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+hashing_pool = HashingPool()
+
+
+async def amake_password(raw_password) -> str:
+    return await hashing_pool.run(make_password, raw_password)
+
+
+async def aauthenticate(request, username: str, password: str):
+    """``ModelBackend.authenticate()`` for async views, hashing on ``hashing_pool``.
+
+    Returns the active user whose password matches, or ``None``. Unknown
+    usernames cost one hash too, so response times do not reveal which
+    accounts exist; outdated hashes are upgraded as Django does.
+    """
+    UserModel = get_user_model()
+    try:
+        user = await UserModel._default_manager.aget_by_natural_key(username)
+    except UserModel.DoesNotExist:
+        await amake_password(password)
+        user = None
+    else:
+        is_correct, must_update = await hashing_pool.run(verify_password, password, user.password)
+        if is_correct and must_update:
+            user.password = await amake_password(password)
+            await user.asave(update_fields=["password"])
+        if not is_correct or not user.is_active:
+            user = None
+    if user is None:
+        await user_login_failed.asend(sender=__name__, credentials={"username": username}, request=request)
+    return user
@@ -0,0 +1,187 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+
+# Names carrying a SHA-256 (thumbnails, see sakayhub_admin.thumbnails) never
+# change content, so clients may keep them for good, unless they are staff only
+HASHED_NAME = re.compile(r"(^|/)[0-9a-f]{64}[^/]*$")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Other uploads are never overwritten either, but keep a revalidation window
+# in case one is replaced by hand; never in shared caches, since they are
+# named after whatever the uploader called them
+MUTABLE_CACHE = "private, max-age=3600"
+# Identity documents and delivery proofs: staff only, and never stored by
+# shared caches whatever their name. Their thumbnails are kept beside them;
+# the top-level "thumbnails/" holds sets made before that, which may be
+# copies of documents, until ``manage.py generate_thumbnails`` replaces them
+STAFF_ONLY_PREFIXES = ("driver_applications/", "drivers/license_photos/", "proofs/", "thumbnails/")
+STAFF_ONLY_CACHE = "private, no-cache"
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+# As FileResponse does: compressed files are labelled as archives rather than
+# given a Content-Encoding, so browsers do not unpack them
+ENCODED_TYPES = {
+    "br": "application/x-brotli",
+    "bzip2": "application/x-bzip",
+    "compress": "application/x-compress",
+    "gzip": "application/gzip",
+    "xz": "application/x-xz",
+}
+
+
+class _RangeFile:
+    """Up to ``length`` bytes of an open file, from its current position.
+
+    Exposes ``fileno()`` so WSGI servers with ``wsgi.file_wrapper`` (gunicorn)
+    send the range with ``os.sendfile``, bounded by Content-Length; other
+    servers iterate ``read()``, which stops at the end of the range.
+    """
+
+    def __init__(self, file, length: int):
+        self._file = file
+        self._remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def close(self):
+        self._file.close()
+
+
+def _etag(stat) -> str:
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _not_modified(request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    return since is not None and int(mtime) <= since
+
+
+def _byte_range(request, size: int, etag: str, mtime: float):
+    """``(start, end)`` inclusive for a single satisfiable range, ``None`` for the
+    whole file, or ``"unsatisfiable"``.
+
+    Multi-range requests and ranges guarded by a stale ``If-Range`` get the
+    whole file, which RFC 9110 allows.
+    """
+    header = request.headers.get("Range")
+    if not header:
+        return None
+    if_range = request.headers.get("If-Range")
+    if if_range is not None and if_range != etag and parse_http_date_safe(if_range) != int(mtime):
+        return None
+    match = RANGE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last or int(last) == 0:
+            return "unsatisfiable"
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    if start >= size:
+        return "unsatisfiable"
+    return start, end
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a file under ``MEDIA_ROOT`` for production deployments.
+
+    Answers conditional requests with 304 and single byte ranges with 206.
+    Files under ``STAFF_ONLY_PREFIXES`` are a 404 to anyone but logged-in
+    staff, the same as a missing file.
+    With ``MEDIA_SENDFILE_HEADER`` set, the body is left to the fronting
+    server: ``X-Accel-Redirect`` points nginx at ``MEDIA_SENDFILE_PREFIX``
+    plus the path (an ``internal`` location aliasing ``MEDIA_ROOT``), and
+    ``X-Sendfile`` hands Apache/lighttpd the absolute file path. Either
+    way the fronting server applies ranges itself.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found")
+    # Checked on the resolved name, so "drivers/../proofs/..." is no way around it
+    name = os.path.relpath(full_path, os.path.abspath(settings.MEDIA_ROOT)).replace(os.sep, "/")
+    staff_only = name.startswith(STAFF_ONLY_PREFIXES)
+    if staff_only and not request.user.is_staff:
+        raise Http404("File not found")
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404("File not found")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+
+    etag = _etag(stat)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": (
+            STAFF_ONLY_CACHE if staff_only else IMMUTABLE_CACHE if HASHED_NAME.search(path) else MUTABLE_CACHE
+        ),
+        "X-Content-Type-Options": "nosniff",
+    }
+    if staff_only:
+        headers["Vary"] = "Cookie"
+    if _not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = ENCODED_TYPES.get(encoding, content_type) or "application/octet-stream"
+
+    sendfile_header = getattr(settings, "MEDIA_SENDFILE_HEADER", "")
+    if sendfile_header:
+        response = HttpResponse(content_type=content_type)
+        if sendfile_header == "X-Accel-Redirect":
+            prefix = getattr(settings, "MEDIA_SENDFILE_PREFIX", "/protected-media/")
+            response[sendfile_header] = quote(prefix.rstrip("/") + "/" + path.lstrip("/"))
+        else:
+            response[sendfile_header] = full_path
+    else:
+        byte_range = _byte_range(request, stat.st_size, etag, stat.st_mtime)
+        if byte_range == "unsatisfiable":
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+        file = open(full_path, "rb")
+        if byte_range is None:
+            response = FileResponse(file, content_type=content_type)
+        else:
+            start, end = byte_range
+            file.seek(start)
+            response = FileResponse(_RangeFile(file, end - start + 1), status=206, content_type=content_type)
+            response["Content-Length"] = str(end - start + 1)
+            response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    response["Accept-Ranges"] = "bytes"
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -0,0 +1,160 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination that seeks on the ordering columns instead of using OFFSET.
+
+    Subclasses set ``ordering`` to a unique ordering, e.g. ``("-time", "id")``.
+    Every page is a ``WHERE (ordering) > (last row) LIMIT n`` lookup, so the
+    cost of a page does not depend on how deep it is. The total count is only
+    computed when the client asks for it with ``?with_count=1``.
+    """
+
+    page_size = 5
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "with_count"
+    ordering = ("id",)
+    invalid_cursor_message = "Invalid cursor"
+
+    @classmethod
+    def is_requested(cls, request) -> bool:
+        # Cursor mode is opt-in: an empty ``?cursor=`` starts at the first page
+        return cls.cursor_query_param in request.query_params
+
+    @classmethod
+    def ordering_fields(cls) -> list:
+        """Columns every row must carry so the next cursor can be built."""
+        return [name.lstrip("-") for name in cls.ordering]
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, "").lower() in ("1", "true", "yes"):
+            self.count = queryset.count()
+
+        ordering = self._reversed(self.ordering) if reverse else tuple(self.ordering)
+        page_queryset = queryset.order_by(*ordering)
+        if position is not None:
+            page_queryset = page_queryset.filter(self._seek_filter(ordering, position))
+
+        # Fetch one extra row to learn whether another page exists in this direction
+        rows = list(page_queryset[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = self._position_for(rows[-1]) if rows and has_next else None
+        self.previous_position = self._position_for(rows[0]) if rows and has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        payload = {}
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["next"] = self.get_next_link()
+        payload["previous"] = self.get_previous_link()
+        payload["results"] = data
+        return Response(payload)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self._link(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self._link(self.previous_position, reverse=True)
+
+    def encode_cursor(self, position, reverse: bool) -> str:
+        raw = json.dumps({"p": position, "r": int(reverse)}, default=self._encode_value, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param, "")
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+            values = data["p"]
+            reverse = bool(data.get("r"))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                model._meta.get_field(name.lstrip("-")).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def _link(self, position, reverse: bool) -> str:
+        url = replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(position, reverse))
+        # A page number has no meaning in cursor mode
+        return remove_query_param(url, "page")
+
+    def _position_for(self, item):
+        names = self.ordering_fields()
+        if isinstance(item, dict):
+            return [item[name] for name in names]
+        return [getattr(item, name) for name in names]
+
+    @staticmethod
+    def _encode_value(value):
+        # Keep full microsecond precision; a truncated timestamp would skip tied rows
+        if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+            return value.isoformat()
+        if isinstance(value, decimal.Decimal):
+            return str(value)
+        raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+    @staticmethod
+    def _reversed(ordering):
+        return tuple(name[1:] if name.startswith("-") else f"-{name}" for name in ordering)
+
+    @staticmethod
+    def _seek_filter(ordering, position) -> Q:
+        # Lexicographic "row after position" for mixed sort directions:
+        # (a > x) OR (a = x AND b > y) OR ...
+        predicate = Q()
+        for index, name in enumerate(ordering):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            clause = Q(**{f"{field}__{lookup}": position[index]})
+            for previous_name, previous_value in zip(ordering[:index], position[:index]):
+                clause &= Q(**{previous_name.lstrip("-"): previous_value})
+            predicate |= clause
+        return predicate
@@ -0,0 +1,59 @@
+import re
+from dataclasses import dataclass, field
+
+from django.db import connection as default_connection
+
+
+# "SCAN rides_ride" with no index behind it reads every row of the table
+_SCAN = re.compile(r"^SCAN (?P<table>\w+)(?: AS \w+)?(?P<rest>.*)$")
+_COUNT_ONLY = re.compile(r"^SELECT COUNT\(\*\) AS \"__count\" FROM \"\w+\"$")
+
+
+@dataclass
+class PlannedQuery:
+    sql: str
+    plan: list = field(default_factory=list)
+
+    def full_scans(self, tables) -> list:
+        """Tables from ``tables`` that this statement reads end to end.
+
+        A scan that walks an index is fine, and so is an unindexed scan
+        that can stop early: the statement has a LIMIT, no WHERE clause and
+        SQLite did not need a temporary b-tree to sort, so the first rows
+        off the scan are the answer. With a filter the scan runs until
+        enough rows match, which for rare matches is the whole table.
+        Counting a whole table without a WHERE clause is what page-number
+        pagination asks for and is allowed as well.
+        """
+        if _COUNT_ONLY.match(self.sql):
+            return []
+        sorts = any(line.startswith("USE TEMP B-TREE FOR ORDER BY") for line in self.plan)
+        stops_early = " LIMIT " in self.sql and " WHERE " not in self.sql and not sorts
+        scanned = []
+        for line in self.plan:
+            match = _SCAN.match(line)
+            if not match or match["table"] not in tables:
+                continue
+            if "INDEX" in match["rest"] or stops_early:
+                continue
+            scanned.append(match["table"])
+        return scanned
+
+
+def explain(captured_queries, connection=None) -> list:
+    """Run ``EXPLAIN QUERY PLAN`` for every SELECT in ``captured_queries``.
+
+    ``captured_queries`` is ``CaptureQueriesContext.captured_queries``; the
+    SQL there has its parameters inlined, so it can be explained as is.
+    Only SQLite's plan format is understood.
+    """
+    connection = connection or default_connection
+    planned = []
+    with connection.cursor() as cursor:
+        for query in captured_queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith("SELECT"):
+                continue
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            planned.append(PlannedQuery(sql=sql, plan=[row[-1].strip() for row in cursor.fetchall()]))
+    return planned
@@ -0,0 +1,186 @@
+import hashlib
+import math
+import time
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from system.models import RateLimitCounter
+
+
+# Every this many recorded hits, a process deletes counters that have expired
+PURGE_EVERY = 500
+
+# (limit, window seconds); override any of them with settings.LOGIN_RATE_LIMITS
+DEFAULT_LOGIN_LIMITS = {
+    # Every attempt from one client address
+    "ip": (30, 5 * 60),
+    # Failed attempts on one account, whichever address they come from
+    "account": (5, 15 * 60),
+    # Every attempt on the whole deployment; caps the PBKDF2 work an attacker can
+    # buy. Only attempts the per-address and per-account limits let through are
+    # counted, so one client can use no more than its own share of it; a flood
+    # spread over many addresses can still fill it and hold off every login
+    # until the window passes, which is the price of the cap
+    "global": (600, 60),
+}
+
+
+@dataclass(frozen=True)
+class Limit:
+    name: str
+    limit: int
+    window: int  # seconds
+
+    def key(self, identity) -> str:
+        # Fixed length whatever the identity, and no raw phone numbers at rest
+        return f"{self.name}:{hashlib.sha256(str(identity).encode()).hexdigest()[:40]}"
+
+
+class SlidingWindowLimiter:
+    """Sliding-window counters kept in the database, so every worker shares them.
+
+    Each limit counts hits in fixed windows; a request is judged on the
+    current window plus the previous one weighted by how much of it still
+    overlaps the sliding window, which smooths the burst a plain fixed
+    window allows at its boundary. Hits are recorded with conditional
+    ``UPDATE ... SET count = count + 1``, so concurrent workers never lose
+    a hit the way a cache read-modify-write can.
+    """
+
+    def __init__(self, timer=time.time):
+        self._timer = timer
+        self._writes = 0
+
+    def _rows(self, targets) -> dict:
+        condition = reduce(or_, (Q(key=key, window__in=windows) for key, windows in targets.items()))
+        return {
+            (key, window): count
+            for key, window, count in RateLimitCounter.objects.filter(condition).values_list("key", "window", "count")
+        }
+
+    def retry_after(self, checks, counted: bool = False) -> int:
+        """Seconds until every ``(Limit, identity)`` in ``checks`` has room again; 0 if it has now.
+
+        ``counted`` says the caller's own hit is already recorded and should
+        not count against it. One SELECT, whatever the number of limits.
+        """
+        now = self._timer()
+        keyed = [(limit, limit.key(identity), int(now // limit.window)) for limit, identity in checks]
+        counts = self._rows({key: [current - 1, current] for _, key, current in keyed})
+        wait = 0.0
+        for limit, key, current in keyed:
+            elapsed = now - current * limit.window
+            previous_hits = counts.get((key, current - 1), 0)
+            current_hits = counts.get((key, current), 0) - int(counted)
+            if previous_hits * (1 - elapsed / limit.window) + current_hits < limit.limit:
+                continue
+            if current_hits >= limit.limit:
+                # This window alone is full: wait for it to end and for its weight to fade
+                needed = limit.window - elapsed + (current_hits - limit.limit) * limit.window / current_hits
+            else:
+                needed = (previous_hits + current_hits - limit.limit) * limit.window / previous_hits - elapsed
+            # At least a second: on the exact boundary the estimate equals the limit
+            wait = max(wait, needed, 1)
+        return math.ceil(wait)
+
+    def hit(self, checks):
+        """Count one hit against every ``(Limit, identity)`` in ``checks``."""
+        now = self._timer()
+        targets = {}
+        for limit, identity in checks:
+            current = int(now // limit.window)
+            # The window still weighs on decisions until the next one ends
+            targets[limit.key(identity)] = (current, (current + 2) * limit.window)
+        condition = reduce(or_, (Q(key=key, window=window) for key, (window, _) in targets.items()))
+        manager = RateLimitCounter.objects
+        if manager.filter(condition).update(count=F("count") + 1) < len(targets):
+            existing = set(manager.filter(condition).values_list("key", flat=True))
+            for key, (window, expires_at) in targets.items():
+                if key in existing:
+                    continue
+                try:
+                    with transaction.atomic():
+                        manager.create(key=key, window=window, count=1, expires_at=expires_at)
+                except IntegrityError:
+                    manager.filter(key=key, window=window).update(count=F("count") + 1)
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            self.purge(now)
+
+    def acquire(self, checks) -> int:
+        """Count a hit against every ``(Limit, identity)`` in ``checks`` if all have room.
+
+        Returns ``retry_after()``; when it is non-zero nothing was counted.
+        The hit is recorded first and judged with itself included, in one
+        transaction, so concurrent requests queue on the counter rows and a
+        burst cannot all pass a check before any of them is counted.
+        """
+        with transaction.atomic():
+            self.hit(checks)
+            wait = self.retry_after(checks, counted=True)
+            if wait:
+                transaction.set_rollback(True)
+        return wait
+
+    def reset(self, limit: Limit, identity):
+        RateLimitCounter.objects.filter(key=limit.key(identity)).delete()
+
+    def purge(self, now=None) -> int:
+        """Delete counters that no longer affect any decision; returns how many."""
+        now = self._timer() if now is None else now
+        deleted, _ = RateLimitCounter.objects.filter(expires_at__lt=now).delete()
+        return deleted
+
+
+rate_limiter = SlidingWindowLimiter()
+
+
+def client_ip(request) -> str:
+    """The address of whoever connected to the last trusted proxy.
+
+    Proxies append to X-Forwarded-For, so with ``TRUSTED_PROXY_COUNT``
+    proxies in front the client is that many entries from the right; the
+    entries left of it are whatever the client chose to send.
+    """
+    trusted = getattr(settings, "TRUSTED_PROXY_COUNT", 1)
+    forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+    if forwarded_for and trusted > 0:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        if hops:
+            return hops[-min(trusted, len(hops))]
+    return request.META.get("REMOTE_ADDR") or "unknown"
+
+
+class LoginThrottle:
+    """The limits that apply to one login attempt on ``account``.
+
+    Call ``acquire()`` and refuse when it is non-zero, before
+    ``authenticate()`` spends its PBKDF2 rounds. The attempt is counted as
+    a failure of the account up front, so parallel guesses take a slot
+    each; ``succeeded()`` clears the account's count again. ``scope`` keeps
+    accounts of different login endpoints apart.
+    """
+
+    def __init__(self, request, account: str, scope: str, limiter=None):
+        limits = {**DEFAULT_LOGIN_LIMITS, **getattr(settings, "LOGIN_RATE_LIMITS", {})}
+        self.limiter = limiter or rate_limiter
+        self.account = (Limit(f"login:{scope}", *limits["account"]), account.strip().lower())
+        self.client = [(Limit("login:ip", *limits["ip"]), client_ip(request)), self.account]
+        self.overall = [(Limit("login:global", *limits["global"]), "all")]
+
+    def acquire(self) -> int:
+        """Seconds to wait before trying again, or 0 once this attempt is counted."""
+        with transaction.atomic():
+            # The global budget is only spent on attempts this client may make
+            wait = self.limiter.acquire(self.client) or self.limiter.acquire(self.overall)
+            if wait:
+                transaction.set_rollback(True)
+        return wait
+
+    def succeeded(self):
+        self.limiter.reset(*self.account)
@@ -0,0 +1,217 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import versions as change_versions
+from .dates import day_bounds
+
+
+UNASSIGNED = "unassigned"
+
+
+def _decimal(value) -> Decimal:
+    return Decimal(str(value or 0))
+
+
+class DailyRollup:
+    """Per-day, per-status, per-vehicle-type counts and money sums for a model.
+
+    ``rollup_model`` has ``day``, ``status``, ``vehicle_type``, ``count`` and
+    an ``amount_field`` column, unique on the first three. Source rows are
+    described as ``(time, status, amount, vehicle_type)`` tuples, read through
+    ``vehicle_path`` (the driver's current vehicle type; ``rekey()`` moves a
+    driver's rows when it changes or the driver is deleted).
+    """
+
+    def __init__(self, rollup_model, source_model, amount_field: str, source_amount: str,
+                 vehicle_path: str = "driver__vehicle_type"):
+        self.rollup_model = rollup_model
+        self.source_model = source_model
+        self.amount_field = amount_field
+        self.source_amount = source_amount
+        self.vehicle_path = vehicle_path
+
+    # -- incremental maintenance ---------------------------------------
+
+    def stored_row(self, pk, using=None):
+        return (
+            self.source_model.objects.using(using)
+            .filter(pk=pk)
+            .values_list("time", "status", self.source_amount, self.vehicle_path)
+            .first()
+        )
+
+    def stored_rows(self, pks, using=None) -> dict:
+        """``stored_row()`` for many rows at once, by primary key."""
+        return self.rows_matching(using=using, pk__in=pks)
+
+    def rows_matching(self, using=None, **filters) -> dict:
+        """``stored_row()`` for every source row matching ``filters``, by primary key."""
+        return {
+            pk: tuple(row)
+            for pk, *row in self.source_model.objects.using(using)
+            .filter(**filters)
+            .values_list("pk", "time", "status", self.source_amount, self.vehicle_path)
+        }
+
+    def rekey(self, old_rows, using=None):
+        """Move rows read earlier by ``rows_matching()`` to the buckets they key to now.
+
+        For changes made outside the source rows, such as a driver's vehicle
+        type or a deleted driver, that send no signal for the rows themselves.
+        """
+        if not old_rows:
+            return
+        new_rows = self.stored_rows(list(old_rows), using=using)
+        with transaction.atomic(using=using):
+            self.apply_changes(((row, new_rows.get(pk)) for pk, row in old_rows.items()), using=using)
+            change_versions.bump(self.rollup_model, using=using)
+
+    def _key(self, row):
+        time, status, _, vehicle_type = row
+        return {"day": timezone.localdate(time), "status": status, "vehicle_type": vehicle_type or ""}
+
+    def apply_change(self, old_row, new_row, using=None):
+        """Move one source row out of its old bucket and into its new one."""
+        if old_row is not None and new_row is not None and old_row == new_row:
+            return
+        if old_row is not None:
+            self._bump(self._key(old_row), -1, -_decimal(old_row[2]), using)
+        if new_row is not None:
+            self._bump(self._key(new_row), 1, _decimal(new_row[2]), using)
+
+    def apply_changes(self, changes, using=None):
+        """``apply_change()`` for many ``(old_row, new_row)`` pairs, one write per bucket."""
+        deltas = defaultdict(lambda: [0, Decimal("0")])
+        for old_row, new_row in changes:
+            if old_row == new_row:
+                continue
+            for row, sign in ((old_row, -1), (new_row, 1)):
+                if row is not None:
+                    delta = deltas[tuple(self._key(row).items())]
+                    delta[0] += sign
+                    delta[1] += sign * _decimal(row[2])
+        for key, (count, amount) in deltas.items():
+            if count or amount:
+                self._bump(dict(key), count, amount, using)
+
+    def _bump(self, key, count, amount, using):
+        manager = self.rollup_model.objects.using(using)
+        changes = {"count": F("count") + count, self.amount_field: F(self.amount_field) + amount}
+        if manager.filter(**key).update(**changes):
+            return
+        try:
+            with transaction.atomic(using=using):
+                manager.create(**key, count=count, **{self.amount_field: amount})
+        except IntegrityError:
+            # Another writer created the bucket between our UPDATE and INSERT
+            manager.filter(**key).update(**changes)
+
+    # -- backfill ------------------------------------------------------
+
+    def backfill(self, start_day, end_day, using=None) -> int:
+        """Rebuild the buckets for ``[start_day, end_day]`` from the source table."""
+        start, _ = day_bounds(start_day)
+        _, end = day_bounds(end_day)
+        rows = (
+            self.source_model.objects.using(using)
+            .filter(time__gte=start, time__lt=end)
+            .annotate(day=TruncDate("time", tzinfo=timezone.get_current_timezone()))
+            .values("day", "status", vehicle=F(self.vehicle_path))
+            .annotate(total=Count("id"), amount=Sum(self.source_amount))
+            .order_by()
+        )
+        buckets = [
+            self.rollup_model(
+                day=row["day"],
+                status=row["status"],
+                vehicle_type=row["vehicle"] or "",
+                count=row["total"],
+                **{self.amount_field: row["amount"] or 0},
+            )
+            for row in rows
+        ]
+        with transaction.atomic(using=using):
+            self.rollup_model.objects.using(using).filter(day__gte=start_day, day__lte=end_day).delete()
+            self.rollup_model.objects.using(using).bulk_create(buckets, batch_size=1000)
+            change_versions.bump(self.rollup_model, using=using)
+        return len(buckets)
+
+    # -- reads ---------------------------------------------------------
+
+    def _live_rows(self, day, using=None):
+        start, end = day_bounds(day)
+        return (
+            self.source_model.objects.using(using)
+            .filter(time__gte=start, time__lt=end)
+            .values("status", vehicle=F(self.vehicle_path))
+            .annotate(total=Count("id"), amount=Sum(self.source_amount))
+            .order_by()
+        )
+
+    def count_between(self, start_day, end_day, using=None) -> int:
+        """Row count for ``[start_day, end_day]``: rollups, with today read live."""
+        return self.summarize(start_day, end_day, using=using)["total"]["count"]
+
+    def summarize(self, start_day, end_day, using=None) -> dict:
+        """Totals and a daily series for ``[start_day, end_day]``.
+
+        Closed days come from the rollup table. Today is always aggregated
+        live from the source rows with an indexed time range, so the answer
+        stays exact even if a write skipped the model signals.
+        """
+        today = timezone.localdate()
+        days = defaultdict(lambda: {"count": 0, "amount": Decimal("0"), "by_status": defaultdict(int)})
+        by_status = defaultdict(int)
+        by_vehicle = defaultdict(int)
+
+        def add(day, status, vehicle_type, count, amount):
+            if not count:
+                return
+            bucket = days[day]
+            bucket["count"] += count
+            bucket["amount"] += _decimal(amount)
+            bucket["by_status"][status] += count
+            by_status[status] += count
+            by_vehicle[vehicle_type or UNASSIGNED] += count
+
+        rollups = (
+            self.rollup_model.objects.using(using)
+            .filter(day__gte=start_day, day__lte=end_day)
+            .exclude(day=today)
+            .values_list("day", "status", "vehicle_type", "count", self.amount_field)
+        )
+        for row in rollups:
+            add(*row)
+        if start_day <= today <= end_day:
+            for row in self._live_rows(today, using=using):
+                add(today, row["status"], row["vehicle"], row["total"], row["amount"])
+
+        series = []
+        day = start_day
+        while day <= end_day:
+            bucket = days.get(day)
+            series.append({
+                "date": day.isoformat(),
+                "count": bucket["count"] if bucket else 0,
+                self.amount_field: float(bucket["amount"]) if bucket else 0.0,
+                "by_status": dict(bucket["by_status"]) if bucket else {},
+            })
+            day += timedelta(days=1)
+
+        return {
+            "start": start_day.isoformat(),
+            "end": end_day.isoformat(),
+            "total": {
+                "count": sum(item["count"] for item in series),
+                self.amount_field: float(sum((bucket["amount"] for bucket in days.values()), Decimal("0"))),
+                "by_status": dict(by_status),
+                "by_vehicle_type": dict(by_vehicle),
+            },
+            "days": series,
+        }
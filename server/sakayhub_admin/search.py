@@ -0,0 +1,113 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import connections, router
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# A single word with a digit in it reads as part of a phone, plate or
+# license number; those are found by any part, and the index only matches
+# word prefixes
+IDENTIFIER_RE = re.compile(r"^\S*\d\S*$")
+
+
+class SearchIndex:
+    """SQLite FTS5 side table that mirrors a few text columns of a model.
+
+    The table is keyed by the model's primary key (the FTS ``rowid``). Each
+    index column is filled from an ORM path in ``sources`` (defaulting to the
+    column name), so a document may pull text through foreign keys. Rows are
+    kept in sync from post_save/post_delete receivers and rebuilt in bulk with
+    ``rebuild()``. On databases other than SQLite the index is inert and
+    ``filter()`` falls back to the ``icontains`` lookups it replaces, as it
+    does for single-word queries with digits in them.
+    """
+
+    def __init__(self, model, table: str, columns, sources=None, fallback_fields=None, ranked: bool = True):
+        self.model = model
+        self.table = table
+        self.columns = tuple(columns)
+        self.sources = {column: (sources or {}).get(column, column) for column in self.columns}
+        self.fallback_fields = tuple(fallback_fields or self.sources.values())
+        self.ranked = ranked
+
+    def _connection(self, using=None):
+        return connections[using or router.db_for_write(self.model)]
+
+    def is_supported(self, connection) -> bool:
+        return connection.vendor == "sqlite"
+
+    def refresh(self, queryset, using=None):
+        """Re-index every row of ``queryset`` with a single INSERT ... SELECT."""
+        connection = self._connection(using)
+        if not self.is_supported(connection):
+            return
+        rows = queryset.order_by().values_list("pk", *(self.sources[column] for column in self.columns))
+        select_sql, params = rows.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT OR REPLACE INTO {self.table} (rowid, {', '.join(self.columns)}) {select_sql}",
+                params,
+            )
+
+    def update(self, instance, using=None):
+        self.refresh(self.model._default_manager.using(using).filter(pk=instance.pk), using=using)
+
+    def delete(self, pk, using=None):
+        connection = self._connection(using)
+        if not self.is_supported(connection):
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [pk])
+
+    def rebuild(self, using=None) -> int:
+        """Repopulate the whole index from the model table."""
+        connection = self._connection(using)
+        if not self.is_supported(connection):
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+        self.refresh(self.model._default_manager.using(using).all(), using=using)
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+            cursor.execute(f"SELECT COUNT(*) FROM {self.table}")
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def match_expression(query: str):
+        # Every term must match as a word prefix: "jo do" -> "jo"* AND "do"*
+        tokens = TOKEN_RE.findall(query)
+        if not tokens:
+            return None
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def filter(self, queryset, query: str):
+        """Restrict ``queryset`` to rows matching ``query``.
+
+        Ranked indexes order the result best match first; unranked ones keep
+        the ordering of ``queryset``. A single word with a digit is matched
+        as a substring, so "9171234567" still finds "+639171234567".
+        """
+        expression = self.match_expression(query)
+        if (expression is None or IDENTIFIER_RE.match(query.strip())
+                or not self.is_supported(connections[queryset.db])):
+            return queryset.filter(
+                reduce(or_, (Q(**{f"{field}__icontains": query}) for field in self.fallback_fields))
+            )
+
+        matches = RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [expression])
+        queryset = queryset.filter(pk__in=matches)
+        if not self.ranked:
+            return queryset
+
+        opts = self.model._meta
+        outer_pk = f'"{opts.db_table}"."{opts.pk.column}"'
+        rank = RawSQL(
+            f"SELECT rank FROM {self.table} WHERE {self.table} MATCH %s AND rowid = {outer_pk}",
+            [expression],
+            output_field=FloatField(),
+        )
+        return queryset.annotate(search_rank=rank).order_by("search_rank", "pk")
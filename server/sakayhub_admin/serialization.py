@@ -0,0 +1,273 @@
+import decimal
+from datetime import timezone as dt_timezone
+
+from django.core.files.storage import FileSystemStorage
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
+from rest_framework import fields as drf_fields
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+
+# Distinct ?fields= selections kept compiled per serializer
+MAX_CACHED_PROJECTIONS = 32
+
+
+def _split_names(value):
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def requested_fields(request, available):
+    """Field names picked by ``?fields=`` and ``?exclude=``, in ``available`` order.
+
+    Returns ``None`` when neither parameter is present. Unknown names are a
+    400 rather than being silently ignored, so typos surface in the client.
+    """
+    fields = _split_names(request.query_params.get("fields"))
+    exclude = _split_names(request.query_params.get("exclude"))
+    if fields is None and exclude is None:
+        return None
+    unknown = [name for name in (fields or []) + (exclude or []) if name not in available]
+    if unknown:
+        raise ValidationError({"fields": f"Unknown field(s): {', '.join(unknown)}"})
+    return [
+        name for name in available
+        if (fields is None or name in fields) and (exclude is None or name not in exclude)
+    ]
+
+
+class SparseFieldsMixin:
+    """Lets a serializer be built with ``fields=[...]`` to render only those fields."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ValuesSerializer:
+    """Read-only twin of a ``ModelSerializer`` that works from ``values()`` rows.
+
+    The serializer's fields are inspected once and turned into a generated
+    ``render(rows)`` function with a precomputed converter per field, so a
+    list page is rendered with one dict per row and no model instances,
+    bound fields or per-row ``try/except``. Output matches the
+    ``ModelSerializer`` it mirrors.
+
+    ``related`` maps ``SerializerMethodField`` names to ``(lookup, default)``
+    pairs, e.g. ``{"driver": ("driver__name", "Unassigned")}``; ``default``
+    stands in for NULL. A lookup through a foreign key is selected as a
+    correlated subquery rather than a join, so pagination's ``count()`` can
+    drop it and stay on an index.
+
+    ``fields`` restricts the output to a subset of the serializer's fields;
+    see ``project()`` and ``for_request()``.
+    """
+
+    def __init__(self, serializer_class, related=None, fields=None):
+        self.serializer_class = serializer_class
+        self.related = related or {}
+        self.fields = tuple(fields) if fields is not None else None
+        self._fields = None
+        # Renderers that do not depend on the request, by active timezone
+        self._renderers = {}
+        self._projections = {}
+
+    @property
+    def model(self):
+        return self.serializer_class.Meta.model
+
+    def _compile(self):
+        # Built lazily: instantiating the serializer needs a ready app registry
+        if self._fields is None:
+            compiled = []
+            for name, field in self.serializer_class().fields.items():
+                if field.write_only or (self.fields is not None and name not in self.fields):
+                    continue
+                if name in self.related:
+                    lookup, default = self.related[name]
+                    compiled.append((name, lookup.replace("__", "_"), None, default))
+                elif isinstance(field, drf_fields.SerializerMethodField):
+                    raise TypeError(f"{self.serializer_class.__name__}.{name} needs an entry in 'related'")
+                else:
+                    compiled.append((name, field.source, field, None))
+            self._fields = compiled
+        return self._fields
+
+    @property
+    def field_names(self) -> list:
+        return [name for name, _, _, _ in self._compile()]
+
+    def project(self, names) -> "ValuesSerializer":
+        """This serializer restricted to ``names``; only their columns are selected."""
+        key = tuple(names)
+        projected = self._projections.get(key)
+        if projected is None:
+            related = {name: pair for name, pair in self.related.items() if name in key}
+            projected = ValuesSerializer(self.serializer_class, related=related, fields=key)
+            if len(self._projections) < MAX_CACHED_PROJECTIONS:
+                self._projections[key] = projected
+        return projected
+
+    def for_request(self, request) -> "ValuesSerializer":
+        """Apply the request's ``?fields=`` / ``?exclude=`` selection, if any."""
+        names = requested_fields(request, self.field_names)
+        return self if names is None else self.project(names)
+
+    def lookups(self) -> list:
+        related = {lookup.replace("__", "_") for lookup, _ in self.related.values()}
+        return [lookup for _, lookup, _, _ in self._compile() if lookup not in related]
+
+    def _related_expressions(self) -> dict:
+        expressions = {}
+        for lookup, _ in self.related.values():
+            relation, _, remote = lookup.partition("__")
+            foreign_key = self.model._meta.get_field(relation)
+            expressions[lookup.replace("__", "_")] = Subquery(
+                foreign_key.related_model.objects.filter(pk=OuterRef(foreign_key.attname)).values(remote)[:1]
+            )
+        return expressions
+
+    def values(self, queryset, include=()):
+        """``queryset`` narrowed to the columns this serializer reads.
+
+        ``include`` adds columns that are needed but not rendered, such as the
+        keyset pagination ordering.
+        """
+        # Several fields may read the same column
+        lookups = list(dict.fromkeys(self.lookups()))
+        lookups += [name for name in include if name not in lookups]
+        return queryset.values(*lookups, **self._related_expressions())
+
+    def _converter(self, field, request):
+        """Plain function equivalent to ``field.to_representation`` for non-NULL values."""
+        if field is None:
+            return None
+        if hasattr(field, "values_converter"):
+            # Custom fields that render a raw column value themselves
+            return field.values_converter(request)
+        if isinstance(field, drf_fields.DateTimeField):
+            if getattr(field, "format", api_settings.DATETIME_FORMAT) != drf_fields.ISO_8601:
+                return field.to_representation
+            tz = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+            return _datetime_converter(tz)
+        if isinstance(field, drf_fields.DateField):
+            if getattr(field, "format", api_settings.DATE_FORMAT) != drf_fields.ISO_8601:
+                return field.to_representation
+            return _iso_date
+        if isinstance(field, drf_fields.DecimalField):
+            return _decimal_converter(field)
+        if isinstance(field, drf_fields.FileField):
+            if not getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL):
+                return _empty_to_none
+            return _file_converter(self.model._meta.get_field(field.source).storage, request)
+        if isinstance(field, (drf_fields.CharField, drf_fields.IntegerField, drf_fields.FloatField,
+                              drf_fields.BooleanField, drf_fields.ChoiceField, drf_fields.JSONField)):
+            # Database values already have the representation type
+            return None
+        return field.to_representation
+
+    def _render_function(self, request):
+        """Generate ``render(rows)`` with one dict display per row.
+
+        Looping over accessors costs more per row than the conversions
+        themselves, so the row dict is spelled out as source once per call.
+        """
+        namespace = {}
+        entries = []
+        for index, (name, lookup, field, default) in enumerate(self._compile()):
+            convert = self._converter(field, request)
+            value = f"row[{lookup!r}]"
+            if convert is not None:
+                namespace[f"convert_{index}"] = convert
+                value = f"None if (value := {value}) is None else convert_{index}(value)"
+            elif default is not None:
+                namespace[f"default_{index}"] = default
+                value = f"default_{index} if (value := {value}) is None else value"
+            entries.append(f"{name!r}: {value}")
+        source = "def render(rows):\n    return [{%s} for row in rows]\n" % ", ".join(entries)
+        exec(compile(source, f"<{self.serializer_class.__name__} values renderer>", "exec"), namespace)
+        return namespace["render"]
+
+    def to_representation(self, rows, request=None) -> list:
+        if request is not None:
+            return self._render_function(request)(rows)
+        key = timezone.get_current_timezone_name()
+        render = self._renderers.get(key)
+        if render is None:
+            render = self._renderers[key] = self._render_function(None)
+        return render(rows)
+
+
+def _datetime_converter(tz):
+    def convert(value):
+        if tz is not None:
+            value = value.astimezone(tz) if timezone.is_aware(value) else timezone.make_aware(value, tz)
+        text = value.isoformat()
+        if text.endswith("+00:00"):
+            text = text[:-6] + "Z"
+        return text
+
+    if tz is None or getattr(tz, "key", None) != "UTC":
+        return convert
+
+    def convert_utc(value):
+        # The database hands back UTC datetimes already; skip the zoneinfo round trip
+        if value.tzinfo is dt_timezone.utc:
+            return value.isoformat()[:-6] + "Z"
+        return convert(value)
+
+    return convert_utc
+
+
+def _iso_date(value):
+    return value.isoformat()
+
+
+def _empty_to_none(value):
+    return value or None
+
+
+def _decimal_converter(field):
+    coerce_to_string = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or field.normalize_output or field.localize or not coerce_to_string:
+        return field.to_representation
+    # DecimalField.quantize() rebuilds the exponent and context on every call
+    exponent = decimal.Decimal(".1") ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return f"{value.quantize(exponent, rounding=rounding, context=context):f}"
+
+    return convert
+
+
+def _file_converter(storage, request):
+    absolute = request.build_absolute_uri if request is not None else None
+    base_url = storage.base_url if isinstance(storage, FileSystemStorage) else None
+    if base_url is not None and not base_url.endswith("/"):
+        base_url = None
+
+    def convert(name):
+        # An empty FileField is stored as ''; the serializer reports it as None
+        if not name:
+            return None
+        url = filepath_to_uri(name).lstrip("/")
+        if base_url is not None and "//" not in url and "/." not in "/" + url:
+            # What FileSystemStorage.url() returns, minus a urljoin() per row;
+            # names with empty or dot segments still go through the storage
+            url = base_url + url
+        else:
+            url = storage.url(name)
+        return absolute(url) if absolute is not None else url
+
+    return convert
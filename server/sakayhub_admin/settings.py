@@ -154,6 +154,32 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Serve MEDIA_URL from Django (sakayhub_admin/media.py). With nginx in front,
+# set MEDIA_SENDFILE_HEADER=X-Accel-Redirect and map MEDIA_SENDFILE_PREFIX to
+# an internal location aliasing MEDIA_ROOT; Apache/lighttpd use X-Sendfile.
+# Identity documents and delivery proofs are only served to logged-in staff
+SERVE_MEDIA = os.getenv("SERVE_MEDIA", "true").lower() == "true"
+MEDIA_SENDFILE_HEADER = os.getenv("MEDIA_SENDFILE_HEADER", "")
+MEDIA_SENDFILE_PREFIX = os.getenv("MEDIA_SENDFILE_PREFIX", "/protected-media/")
+
+# Uploads above this size are spooled to a temporary file while the request
+# is parsed instead of being held in memory; with FILE_UPLOAD_TEMP_DIR on the
+# same filesystem as MEDIA_ROOT, storing them is a rename rather than a copy
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+FILE_UPLOAD_TEMP_DIR = os.getenv("FILE_UPLOAD_TEMP_DIR") or None
+
+# Threads that check and normalize driver application documents after the
+# submit request returns; 0 processes them inline (see drivers/documents.py)
+DRIVER_DOCUMENT_WORKERS = int(os.getenv("DRIVER_DOCUMENT_WORKERS", "2"))
+
+# Threads that render photo thumbnails after a driver is saved; 0 renders
+# them inline (see sakayhub_admin/thumbnails.py)
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+
+# Threads that hash passwords for the async login and signup views; 0 means
+# one per CPU (see sakayhub_admin/hashing.py)
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", "0"))
+
 # Allow frontend dev origin for CSRF when using Vite proxy
 CSRF_TRUSTED_ORIGINS = [
     'http://localhost:8080',
@@ -172,11 +198,21 @@ CSRF_COOKIE_SECURE = not DEBUG
 # Honor X-Forwarded-* headers from Render's proxy
 USE_X_FORWARDED_HOST = True
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+# Proxies that append to X-Forwarded-For; rate limits key on the client they saw
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "1"))
 
-# Minimal cache backend for rate limiting (use Redis/Memcached in prod)
+# Per-process cache for change versions and other short-lived lookups; login
+# rate limits are kept in the database instead (sakayhub_admin/ratelimit.py)
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'auth-rate-limit',
-    }
+    },
+    # Seen by every worker on the host; token authentication (auth/authentication.py)
+    # relies on it so a logout or deactivation reaches all of them. Deployments
+    # spread over several hosts should point this at memcached instead
+    'shared': {
+        'BACKEND': os.getenv("SHARED_CACHE_BACKEND", 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv("SHARED_CACHE_LOCATION") or os.path.join(BASE_DIR, 'cache'),
+    },
 }
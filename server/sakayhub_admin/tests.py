@@ -0,0 +1,574 @@
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from auth.models import MobileProfile
+from deliveries.dispatch import delivery_dispatch
+from deliveries.models import Delivery
+from deliveries.serializers import DeliverySerializer, delivery_list_serializer
+from drivers.models import Driver, DriverApplication
+from drivers.search import application_search_index, driver_search_index
+from drivers.serializers import DriverSerializer, driver_list_serializer
+from rides.dispatch import ride_dispatch
+from rides.models import Ride
+from rides.search import ride_search_index
+from rides.serializers import RideSerializer, ride_list_serializer
+from system.models import RateLimitCounter
+from users.models import User
+from users.search import user_search_index
+from users.serializers import UserSerializer, user_list_serializer
+
+from .memo import TTLCache
+from .ratelimit import Limit, LoginThrottle, SlidingWindowLimiter, client_ip
+from .query_plans import explain
+
+
+USERS = 2000
+DRIVERS = 500
+RIDES = 6000
+DELIVERIES = 6000
+APPLICATIONS = 3000
+MOBILE_ACCOUNTS = 500
+
+
+# Token lookups stay out of the development cache directory
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "plan-tests"},
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "plan-tests-shared"},
+})
+class QueryPlanRegressionTests(APITestCase):
+    """Every hot read endpoint must reach its rows through an index.
+
+    The tables are seeded to a realistic size, each endpoint is called, and
+    every SELECT it issues is run through ``EXPLAIN QUERY PLAN``. A full
+    scan of one of the seeded tables fails the test, and so does a list
+    endpoint whose query count grows with the page size.
+    """
+
+    LARGE_TABLES = {
+        model._meta.db_table
+        for model in (User, Driver, Ride, Delivery, DriverApplication, MobileProfile, Token, get_user_model())
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        today = now.date()
+        vehicle_types = [choice for choice, _ in Driver.VEHICLE_CHOICES]
+
+        User.objects.bulk_create(
+            User(
+                name=f"Rider {index}",
+                email=f"rider{index}@example.com",
+                phone=f"+63 917 {index:07d}",
+                status="active" if index % 10 else "suspended",
+                kyc_status="verified",
+                join_date=today,
+                last_active=now,
+            )
+            for index in range(USERS)
+        )
+        Driver.objects.bulk_create(
+            Driver(
+                name=f"Driver {index}",
+                email=f"driver{index}@example.com",
+                phone=f"+63 918 {index:07d}",
+                status="active",
+                vehicle_type=vehicle_types[index % len(vehicle_types)],
+                license_status="verified" if index % 3 else "pending",
+                online=index % 2 == 0,
+                rating=4.5,
+                join_date=today,
+                last_active=now,
+            )
+            for index in range(DRIVERS)
+        )
+        customer_ids = list(User.objects.values_list("id", flat=True))
+        driver_ids = list(Driver.objects.values_list("id", flat=True))
+
+        ride_statuses = ["completed", "completed", "cancelled", "ongoing"]
+        Ride.objects.bulk_create(
+            (
+                Ride(
+                    customer_id=customer_ids[index % USERS],
+                    driver_id=driver_ids[index % DRIVERS],
+                    pickup=f"Pickup {index}",
+                    destination=f"Destination {index}",
+                    status=ride_statuses[index % len(ride_statuses)],
+                    fare=Decimal("120.00"),
+                    time=now - timedelta(minutes=index * 7),
+                )
+                for index in range(RIDES)
+            ),
+            batch_size=1000,
+        )
+        Delivery.objects.bulk_create(
+            (
+                Delivery(
+                    sender=f"Sender {index}",
+                    receiver=f"Receiver {index}",
+                    driver_id=driver_ids[index % DRIVERS],
+                    package="Parcel",
+                    pickup=f"Pickup {index}",
+                    destination=f"Destination {index}",
+                    status="shipping" if index % 5 == 0 else "delivered",
+                    fee=Decimal("80.00"),
+                    time=now - timedelta(minutes=index * 7),
+                )
+                for index in range(DELIVERIES)
+            ),
+            batch_size=1000,
+        )
+        application_statuses = ["approved", "approved", "rejected", "pending", "under_review"]
+        DriverApplication.objects.bulk_create(
+            (
+                DriverApplication(
+                    reference_number=f"PLAN-{index:06d}",
+                    first_name="Plan",
+                    last_name=str(index),
+                    name=f"Plan {index}",
+                    email=f"plan{index}@example.com",
+                    phone=f"+63 919 {index:07d}",
+                    status=application_statuses[index % len(application_statuses)],
+                    vehicle_type="sedan" if index % 4 == 0 else "motorcycle",
+                )
+                for index in range(APPLICATIONS)
+            ),
+            batch_size=1000,
+        )
+
+        AuthUser = get_user_model()
+        AuthUser.objects.bulk_create(
+            AuthUser(username=f"+63 920 {index:07d}", password="!") for index in range(MOBILE_ACCOUNTS)
+        )
+        MobileProfile.objects.bulk_create(
+            MobileProfile(user=user, role=MobileProfile.ROLE_USER, name=user.username, phone=user.username)
+            for user in AuthUser.objects.filter(username__startswith="+63 920")
+        )
+        rider = AuthUser.objects.create_user(username="+63 921 0000001", password="riderpass123")
+        MobileProfile.objects.create(
+            user=rider, role=MobileProfile.ROLE_USER, name="Plan Rider", phone="+63 921 0000001",
+            is_phone_verified=True,
+        )
+        cls.rider_token = Token.objects.create(user=rider)
+        cls.admin_user = AuthUser.objects.create_user(
+            username="admin@example.com", email="admin@example.com", password="adminpass123", is_staff=True,
+        )
+
+        # bulk_create skips the signals that keep the full-text indexes current
+        for index in (user_search_index, driver_search_index, ride_search_index, application_search_index):
+            index.rebuild()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+
+    def _capture(self, method: str, url: str, data=None, client=None):
+        client = client or self.client
+        if method == "get":
+            # Warm the change-version cache so only the view's own queries are measured
+            getattr(client, method)(url, data or {})
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(url, data or {})
+        self.assertLess(response.status_code, 400, f"{url} -> {response.status_code}")
+        return queries
+
+    def assertIndexed(self, method: str, url: str, data=None, client=None):
+        queries = self._capture(method, url, data, client)
+        for planned in explain(queries.captured_queries):
+            scanned = planned.full_scans(self.LARGE_TABLES)
+            if scanned:
+                self.fail(
+                    f"{url} scans {', '.join(scanned)}:\n  {planned.sql}\n  "
+                    + "\n  ".join(planned.plan)
+                )
+        return len(queries)
+
+    def assertFlatQueryCount(self, url: str, data=None, budget: int = None):
+        """Same number of queries for a page of 5 rows and a page of 100."""
+        data = data or {}
+        small = self.assertIndexed("get", url, {**data, "page_size": 5})
+        large = self.assertIndexed("get", url, {**data, "page_size": 100})
+        self.assertEqual(small, large, f"{url} issues more queries for a larger page")
+        if budget is not None:
+            self.assertLessEqual(large, budget, f"{url} exceeds its query budget")
+
+    def test_user_endpoints(self):
+        self.assertFlatQueryCount("/api/users/list/", budget=2)
+        self.assertFlatQueryCount("/api/users/list/", {"cursor": ""}, budget=1)
+        self.assertFlatQueryCount("/api/users/list/", {"search": "rider 42"}, budget=2)
+
+    def test_driver_endpoints(self):
+        self.assertFlatQueryCount("/api/drivers/list/", budget=2)
+        self.assertFlatQueryCount("/api/drivers/list/", {"cursor": ""}, budget=1)
+        self.assertFlatQueryCount("/api/drivers/list/", {"search": "driver 7"}, budget=2)
+        self.assertFlatQueryCount("/api/drivers/applications/", budget=3)
+        today = timezone.localdate().isoformat()
+        for filters in ({"status": "pending"}, {"vehicle_type": "sedan"}, {"start": today, "end": today},
+                        {"status": "approved", "start": today}, {"search": "plan 42"}):
+            self.assertFlatQueryCount("/api/drivers/applications/", filters, budget=3)
+        self.assertLessEqual(self.assertIndexed("get", "/api/drivers/stats/"), 1)
+        self.assertLessEqual(self.assertIndexed("get", "/api/drivers/applications/stats/"), 1)
+
+    def test_ride_endpoints(self):
+        self.assertFlatQueryCount("/api/rides/list/", budget=2)
+        self.assertFlatQueryCount("/api/rides/list/", {"cursor": ""}, budget=1)
+        self.assertFlatQueryCount("/api/rides/list/", {"search": "pickup 12"}, budget=2)
+        self.assertLessEqual(self.assertIndexed("get", "/api/rides/stats/"), 3)
+        self.assertIndexed("get", "/api/rides/stats/range/")
+
+    def test_delivery_endpoints(self):
+        # Delivery search is a plain icontains and is deliberately not covered here
+        self.assertFlatQueryCount("/api/deliveries/list/", budget=2)
+        self.assertFlatQueryCount("/api/deliveries/list/", {"cursor": ""}, budget=1)
+        self.assertLessEqual(self.assertIndexed("get", "/api/deliveries/stats/"), 3)
+        self.assertIndexed("get", "/api/deliveries/stats/range/")
+
+    def test_mobile_auth_endpoints(self):
+        anonymous = APIClient()
+        self.assertIndexed(
+            "post", "/api/auth/users/login/", {"phone": "+63 921 0000001", "password": "riderpass123"},
+            client=anonymous,
+        )
+
+        rider = APIClient()
+        rider.credentials(HTTP_AUTHORIZATION=f"Token {self.rider_token.key}")
+        self.assertLessEqual(self.assertIndexed("get", "/api/auth/users/me/", client=rider), 3)
+
+    def test_status_filtered_counts_use_composite_indexes(self):
+        for queryset, index_name in (
+            (Ride.objects.filter(status="ongoing"), "rides_ride_status_time_idx"),
+            (Delivery.objects.filter(status="shipping"), "deliveries_status_time_idx"),
+            (DriverApplication.objects.filter(status="pending"), "drivers_app_status_applied_idx"),
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                queryset.count()
+            plan = " ".join(explain(queries.captured_queries)[0].plan)
+            self.assertIn(index_name, plan)
+
+    def test_dispatch_reads_waiting_requests_from_partial_indexes(self):
+        for queue, index_name in (
+            (ride_dispatch, "rides_ride_waiting_idx"),
+            (delivery_dispatch, "deliveries_waiting_idx"),
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                queue.waiting()
+            plan = " ".join(explain(queries.captured_queries)[0].plan)
+            self.assertIn(index_name, plan)
+
+
+class ValuesSerializerParityTests(APITestCase):
+    """The values()-backed list serializers render exactly what the ModelSerializers do."""
+
+    def setUp(self):
+        now = timezone.now()
+        self.customer = User.objects.create(
+            name="Parity Rider",
+            email="parity@example.com",
+            phone="+63 917 300 0001",
+            password="hashed",
+            favorite_locations=["Home", "Office"],
+            status="active",
+            kyc_status="verified",
+            total_spent=Decimal("1250.50"),
+            join_date=now.date(),
+            last_active=now,
+        )
+        self.driver = Driver.objects.create(
+            name="Parity Driver",
+            email="parity.driver@example.com",
+            phone="+63 918 300 0001",
+            status="active",
+            vehicle_type="sedan",
+            license_status="verified",
+            rating=4.75,
+            earnings=Decimal("999.99"),
+            online=True,
+            license_photo="drivers/license_photos/parity.jpg",
+            license_expiry=now.date() + timedelta(days=365),
+            join_date=now.date(),
+            last_active=now,
+        )
+        Ride.objects.create(
+            customer=self.customer, driver=self.driver, pickup="A", destination="B",
+            status="completed", fare=Decimal("120.00"), time=now,
+        )
+        Ride.objects.create(
+            customer=self.customer, driver=None, pickup="C", destination="D",
+            status="cancelled", fare=Decimal("0.00"), time=now - timedelta(hours=3),
+        )
+        Delivery.objects.create(
+            sender="S", receiver="R", driver=self.driver, package="Box", pickup="A", destination="B",
+            status="delivered", fee=Decimal("80.00"), time=now, proof_photo="proofs/photos/p.jpg",
+        )
+        Delivery.objects.create(
+            sender="S2", receiver="R2", driver=None, package="Box", pickup="C", destination="D",
+            status="shipping", fee=Decimal("45.25"), time=now - timedelta(days=1),
+        )
+
+    def test_fast_path_matches_model_serializers(self):
+
+        for model, serializer_class, fast in (
+            (User, UserSerializer, user_list_serializer),
+            (Driver, DriverSerializer, driver_list_serializer),
+            (Ride, RideSerializer, ride_list_serializer),
+            (Delivery, DeliverySerializer, delivery_list_serializer),
+        ):
+            queryset = model.objects.order_by("id")
+            expected = serializer_class(queryset, many=True).data
+            self.assertEqual(fast.to_representation(fast.values(queryset)), [dict(row) for row in expected])
+
+    def test_list_endpoint_payload_is_unchanged(self):
+        admin = get_user_model().objects.create_user(username="admin@example.com", password="adminpass123")
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        response = client.get("/api/rides/list/")
+        expected = RideSerializer(Ride.objects.order_by("-time", "id"), many=True).data
+        self.assertEqual(response.json()["results"], [dict(row) for row in expected])
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin_user = get_user_model().objects.create_user(
+            username="admin@example.com", email="admin@example.com", password="adminpass123", is_staff=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+        now = timezone.now()
+        self.driver = Driver.objects.create(
+            name="Etag Driver",
+            email="etag@example.com",
+            phone="+63 918 400 0001",
+            status="active",
+            vehicle_type="sedan",
+            license_status="verified",
+            join_date=now.date(),
+            last_active=now,
+        )
+
+    def _create_delivery(self):
+        return Delivery.objects.create(
+            sender="S", receiver="R", driver=self.driver, package="Box", pickup="A", destination="B",
+            status="shipping", fee=Decimal("50.00"), time=timezone.now(),
+        )
+
+    def test_unchanged_stats_are_answered_without_queries(self):
+        self._create_delivery()
+        first = self.client.get("/api/deliveries/stats/")
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("Last-Modified", first)
+
+        with self.assertNumQueries(0):
+            again = self.client.get("/api/deliveries/stats/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        self._create_delivery()
+        changed = self.client.get("/api/deliveries/stats/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()["active_deliveries"], 2)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+    def test_related_writes_and_bulk_updates_invalidate_lists(self):
+        self._create_delivery()
+        etag = self.client.get("/api/deliveries/list/")["ETag"]
+        self.assertNotEqual(self.client.get("/api/deliveries/list/?page_size=10")["ETag"], etag)
+
+        # The delivery list shows driver names, so a driver save changes it
+        self.driver.name = "Renamed Driver"
+        self.driver.save()
+        response = self.client.get("/api/deliveries/list/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        driver_etag = self.client.get("/api/drivers/list/")["ETag"]
+        self.client.post("/api/drivers/bulk/status/", {"ids": [self.driver.id], "status": "suspended"}, format="json")
+        self.assertEqual(self.client.get("/api/drivers/list/", HTTP_IF_NONE_MATCH=driver_etag).status_code, 200)
+        self.assertEqual(self.client.get("/api/deliveries/list/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_not_modified_requires_authentication(self):
+        etag = self.client.get("/api/drivers/stats/")["ETag"]
+        anonymous = APIClient()
+        response = anonymous.get("/api/drivers/stats/", HTTP_IF_NONE_MATCH=etag)
+        self.assertIn(response.status_code, (401, 403))
+
+
+class FullScanDetectionTests(TestCase):
+    def _full_scans(self, queryset):
+        with CaptureQueriesContext(connection) as queries:
+            list(queryset)
+        return explain(queries.captured_queries)[0].full_scans({"rides_ride"})
+
+    def test_only_unfiltered_limited_scans_stop_early(self):
+        # The first five rows in table order are the answer
+        self.assertEqual(self._full_scans(Ride.objects.order_by("id")[:5]), [])
+        # Rare matches keep the scan going to the end of the table, LIMIT or not
+        self.assertEqual(
+            self._full_scans(Ride.objects.filter(pickup__icontains="airport").order_by("id")[:5]), ["rides_ride"]
+        )
+
+
+class TTLCacheTests(SimpleTestCase):
+    def test_entries_expire_and_least_recent_is_evicted(self):
+        now = [0.0]
+        memo = TTLCache(maxsize=2, ttl=10, timer=lambda: now[0])
+        memo.set("a", 1)
+        memo.set("b", 2)
+        self.assertEqual(memo.get("a"), 1)
+        memo.set("c", 3)  # "b" is now the least recently used
+        self.assertIsNone(memo.get("b"))
+        self.assertEqual(memo.get("c"), 3)
+
+        now[0] = 10.5
+        self.assertIsNone(memo.get("a"))
+        self.assertEqual(memo.stats(), {"size": 1, "hits": 2, "misses": 2})
+
+
+class SlidingWindowLimiterTests(APITestCase):
+    def test_previous_window_fades_out(self):
+        now = [6000.0]
+        limiter = SlidingWindowLimiter(timer=lambda: now[0])
+        limit = Limit("test", limit=10, window=60)
+        checks = [(limit, "+63 917 000 0001")]
+        for _ in range(10):
+            self.assertEqual(limiter.retry_after(checks), 0)
+            limiter.hit(checks)
+        # The window is full: wait for it to end
+        self.assertEqual(limiter.retry_after(checks), 60)
+        self.assertEqual(limiter.retry_after([(limit, "someone else")]), 0)
+
+        # A quarter into the next window the old hits still count for three quarters
+        now[0] += 75
+        self.assertEqual(limiter.retry_after(checks), 0)
+        for _ in range(3):
+            limiter.hit(checks)
+        self.assertEqual(limiter.retry_after(checks), 3)
+        now[0] += 3.5
+        self.assertEqual(limiter.retry_after(checks), 0)
+
+        now[0] += 1000
+        self.assertEqual(limiter.purge(), 2)
+
+    def test_a_burst_cannot_pass_the_check_before_it_is_counted(self):
+        limiter = SlidingWindowLimiter(timer=lambda: 6000.0)
+        limit = Limit("test", limit=3, window=60)
+        checks = [(limit, "+63 917 000 0002")]
+        # Three attempts in flight at once, none of them finished yet
+        self.assertEqual([limiter.acquire(checks) for _ in range(3)], [0, 0, 0])
+        self.assertGreater(limiter.acquire(checks), 0)
+        # Refusals take no slot
+        self.assertEqual(RateLimitCounter.objects.get().count, 3)
+
+    @override_settings(LOGIN_RATE_LIMITS={"ip": (2, 300), "account": (10, 900), "global": (3, 60)})
+    def test_one_client_cannot_spend_the_global_budget(self):
+        flood = RequestFactory().post("/", REMOTE_ADDR="203.0.113.1")
+        for index in range(5):
+            LoginThrottle(flood, f"victim{index}", scope="test").acquire()
+        # The flood got two attempts in; everyone else still has room
+        other = RequestFactory().post("/", REMOTE_ADDR="203.0.113.2")
+        self.assertEqual(LoginThrottle(other, "someone", scope="test").acquire(), 0)
+
+    def test_client_ip_trusts_only_the_proxy_hops(self):
+        request = APIClient().get("/").wsgi_request
+        request.META.update(REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="1.1.1.1, 203.0.113.7")
+        self.assertEqual(client_ip(request), "203.0.113.7")
+        with override_settings(TRUSTED_PROXY_COUNT=0):
+            self.assertEqual(client_ip(request), "10.0.0.1")
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        # Delivery proofs are staff only
+        self.client.force_login(get_user_model().objects.create_user(
+            username="admin@example.com", password="adminpass123", is_staff=True,
+        ))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        settings_override = override_settings(MEDIA_ROOT=self.root, MEDIA_SENDFILE_HEADER="")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        os.makedirs(os.path.join(self.root, "proofs", "photos"))
+        self.body = bytes(range(100))
+        with open(os.path.join(self.root, "proofs", "photos", "proof.jpg"), "wb") as handle:
+            handle.write(self.body)
+
+    def _get(self, path="proofs/photos/proof.jpg", **headers):
+        return self.client.get(f"/media/{path}", headers=headers)
+
+    def test_whole_file_and_revalidation(self):
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.body)
+        self.assertEqual(
+            (response["Content-Type"], response["Content-Length"], response["Accept-Ranges"]),
+            ("image/jpeg", "100", "bytes"),
+        )
+        self.assertNotIn("immutable", response["Cache-Control"])
+
+        cached = self._get(**{"If-None-Match": response["ETag"]})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached["ETag"], response["ETag"])
+        self.assertEqual(self._get("../settings.py").status_code, 404)
+        self.assertEqual(self._get("proofs/photos/").status_code, 404)
+
+    def test_byte_ranges(self):
+        for header, start, end in (("bytes=10-19", 10, 19), ("bytes=90-", 90, 99), ("bytes=-5", 95, 99),
+                                   ("bytes=95-500", 95, 99)):
+            response = self._get(Range=header)
+            self.assertEqual(response.status_code, 206, header)
+            self.assertEqual(b"".join(response.streaming_content), self.body[start:end + 1])
+            self.assertEqual(response["Content-Range"], f"bytes {start}-{end}/100")
+            self.assertEqual(response["Content-Length"], str(end - start + 1))
+
+        self.assertEqual(self._get(Range="bytes=100-").status_code, 416)
+        # A range for an older copy of the file gets the whole current file
+        stale = self._get(Range="bytes=0-9", **{"If-Range": '"stale"'})
+        self.assertEqual((stale.status_code, len(b"".join(stale.streaming_content))), (200, 100))
+
+    def test_hashed_names_are_immutable(self):
+        name = f"drivers/profile_photos/thumbnails/ab/{'ab' * 32}-160.webp"
+        os.makedirs(os.path.join(self.root, "drivers", "profile_photos", "thumbnails", "ab"))
+        with open(os.path.join(self.root, name), "wb") as handle:
+            handle.write(b"RIFF")
+        response = self._get(name)
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        response.close()
+
+    def test_identity_documents_and_proofs_are_staff_only(self):
+        response = self._get()
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertIn("Cookie", response["Vary"])
+        response.close()
+
+        self.client.logout()
+        self.assertEqual(self._get().status_code, 404)
+        self.assertEqual(self._get("drivers/../proofs/photos/proof.jpg").status_code, 404)
+
+        os.makedirs(os.path.join(self.root, "drivers", "profile_photos"))
+        with open(os.path.join(self.root, "drivers", "profile_photos", "face.jpg"), "wb") as handle:
+            handle.write(self.body)
+        response = self._get("drivers/profile_photos/face.jpg")
+        self.assertEqual((response.status_code, response["Cache-Control"]), (200, "private, max-age=3600"))
+        response.close()
+
+    def test_fronting_server_sends_the_bytes(self):
+        with override_settings(MEDIA_SENDFILE_HEADER="X-Accel-Redirect", MEDIA_SENDFILE_PREFIX="/protected-media/"):
+            response = self._get()
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/proofs/photos/proof.jpg")
+        self.assertEqual(response.content, b"")
+
+        with override_settings(MEDIA_SENDFILE_HEADER="X-Sendfile"):
+            response = self._get()
+        self.assertEqual(response["X-Sendfile"], os.path.join(self.root, "proofs", "photos", "proof.jpg"))
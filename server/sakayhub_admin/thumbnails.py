@@ -0,0 +1,205 @@
+import hashlib
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+from rest_framework import serializers
+
+from . import versions as change_versions
+from .serialization import _file_converter
+
+
+# (name, longest side in pixels), largest first
+SIZES = (("medium", 640), ("small", 160))
+# Directory, beside each source file, holding its thumbnails; a copy of an
+# identity document must stay as private as the document (see
+# sakayhub_admin.media.STAFF_ONLY_PREFIXES)
+PREFIX = "thumbnails"
+# Pillow builds without libwebp still get thumbnails, as JPEG
+FORMAT, EXTENSION = ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+QUALITY = 80
+HASH_CHUNK = 1024 * 1024
+
+
+def _open(field_file):
+    # Through the storage, not the FieldFile: a just-saved upload cannot be reopened
+    return field_file.storage.open(field_file.name, "rb")
+
+
+def content_hash(field_file) -> str:
+    digest = hashlib.sha256()
+    with _open(field_file) as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def thumbnail_dir(source_name: str) -> str:
+    return posixpath.join(posixpath.dirname(source_name), PREFIX)
+
+
+def thumbnail_name(source_name: str, digest: str, pixels: int) -> str:
+    return f"{thumbnail_dir(source_name)}/{digest[:2]}/{digest}-{pixels}.{EXTENSION}"
+
+
+def _encode(image, pixels: int) -> bytes:
+    image = image.copy()
+    image.thumbnail((pixels, pixels), Image.LANCZOS)
+    if FORMAT == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, format=FORMAT, quality=QUALITY)
+    return buffer.getvalue()
+
+
+def render_thumbnails(field_file, storage=default_storage) -> dict:
+    """``{"source": name, size: thumbnail name, ...}`` for one stored image.
+
+    Thumbnails are named after the source's SHA-256 and kept in the
+    source's directory, so identical uploads there share one set, an
+    existing set is reused without decoding anything, and a thumbnail is
+    served to whoever may see its source.
+    Sources that are not readable images (PDF documents, missing files)
+    get an entry with no sizes, which renders as ``None``.
+    """
+    entry = {"source": field_file.name}
+    try:
+        digest = content_hash(field_file)
+        names = {size: thumbnail_name(field_file.name, digest, pixels) for size, pixels in SIZES}
+        missing = [(size, pixels) for size, pixels in SIZES if not storage.exists(names[size])]
+        if missing:
+            with _open(field_file) as handle, Image.open(handle) as image:
+                # Let the JPEG decoder downscale while decoding instead of afterwards
+                image.draft("RGB", (missing[0][1], missing[0][1]))
+                image = ImageOps.exif_transpose(image)
+                for size, pixels in missing:
+                    names[size] = storage.save(names[size], ContentFile(_encode(image, pixels)))
+    except (OSError, SyntaxError, UnidentifiedImageError, Image.DecompressionBombError):
+        return entry
+    entry.update(names)
+    return entry
+
+
+def _is_current(entry, source_name) -> bool:
+    if entry.get("source") != source_name:
+        return False
+    # Sets written before thumbnails moved beside their source are rebuilt
+    directory = thumbnail_dir(source_name) + "/" if source_name else ""
+    return all(entry[size].startswith(directory) for size, _ in SIZES if size in entry)
+
+
+def stale_fields(instance, fields) -> list:
+    """Image fields of ``instance`` whose stored thumbnails were made from another file, or live elsewhere."""
+    thumbnails = instance.thumbnails or {}
+    return [
+        field for field in fields
+        if not _is_current(thumbnails.get(field) or {}, getattr(instance, field).name or None)
+    ]
+
+
+def update_thumbnails(instance, fields, force: bool = False, bump: bool = True, using=None) -> bool:
+    """Bring ``instance.thumbnails`` up to date for ``fields``; returns whether it changed.
+
+    The column is written with ``update()``, so saving it does not re-enter
+    the model's ``post_save`` handlers; the change version is bumped instead,
+    unless a batch caller passes ``bump=False`` and bumps once itself.
+    """
+    stale = list(fields) if force else stale_fields(instance, fields)
+    if not stale:
+        return False
+    thumbnails = dict(instance.thumbnails or {})
+    for field in stale:
+        field_file = getattr(instance, field)
+        if field_file:
+            thumbnails[field] = render_thumbnails(field_file)
+        else:
+            thumbnails.pop(field, None)
+    if thumbnails == instance.thumbnails:
+        return False
+    model = type(instance)
+    model.objects.using(using).filter(pk=instance.pk).update(thumbnails=thumbnails)
+    instance.thumbnails = thumbnails
+    if bump:
+        change_versions.bump(model, using=using)
+    return True
+
+
+class ThumbnailPool:
+    """Runs ``update_thumbnails()`` for saved rows on a small process-wide thread pool.
+
+    ``THUMBNAIL_WORKERS`` sizes the pool; ``0`` renders inline, which is
+    what tests and one-off scripts want. The row is read again in the
+    worker, so it sees the committed files. Thumbnails lost with the
+    process are rebuilt by ``manage.py generate_thumbnails``.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _render(self, model, pk, fields, using):
+        instance = model.objects.using(using).filter(pk=pk).only("thumbnails", *fields).first()
+        if instance is not None:
+            return update_thumbnails(instance, fields, using=using)
+        return False
+
+    def _run(self, model, pk, fields, using):
+        try:
+            return self._render(model, pk, fields, using)
+        finally:
+            # Pool threads outlive the request cycle that would normally close these
+            connections.close_all()
+
+    def submit(self, instance, fields, using=None):
+        model, fields = type(instance), list(fields)
+        workers = getattr(settings, "THUMBNAIL_WORKERS", 2)
+        if workers <= 0:
+            return self._render(model, instance.pk, fields, using)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnails")
+            return self._executor.submit(self._run, model, instance.pk, fields, using)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+thumbnail_pool = ThumbnailPool()
+
+
+class ThumbnailsField(serializers.Field):
+    """Read-only ``{size: url}`` for one image field, from the model's ``thumbnails`` column.
+
+    ``None`` until thumbnails exist, and for files that are not images.
+    ``values_converter()`` lets ``ValuesSerializer`` render the raw column.
+    """
+
+    def __init__(self, image_field: str, **kwargs):
+        kwargs.setdefault("source", "thumbnails")
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+        self.image_field = image_field
+
+    def values_converter(self, request):
+        url = _file_converter(default_storage, request)
+        image_field = self.image_field
+
+        def convert(thumbnails):
+            entry = thumbnails.get(image_field)
+            if not entry or len(entry) == 1:
+                return None
+            return {size: url(entry[size]) for size, _ in SIZES if size in entry}
+
+        return convert
+
+    def to_representation(self, value):
+        return self.values_converter(self.context.get("request"))(value)
@@ -14,12 +14,14 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 
 from drivers import views as driver_views
+from .media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -35,5 +37,10 @@ urlpatterns = [
     path('api/auth/', include('auth.urls')),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Uploaded media, with range requests and long-lived caching; leave it to the
+# fronting server entirely by pointing MEDIA_URL at it, or set
+# MEDIA_SENDFILE_HEADER so it only sends the bytes
+if settings.SERVE_MEDIA and "://" not in settings.MEDIA_URL:
+    urlpatterns.append(
+        re_path(r"^%s(?P<path>.*)$" % re.escape(settings.MEDIA_URL.lstrip("/")), serve_media, name="media")
+    )
@@ -0,0 +1,119 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from system.models import ChangeVersion
+from .dates import local_midnight
+
+
+CACHE_PREFIX = "change_version:"
+# With a per-process cache (the default LocMemCache) other workers see a
+# bump once their copy expires; a shared cache makes bumps visible at once
+CACHE_SECONDS = 5
+
+
+def _label(model) -> str:
+    return model._meta.label_lower
+
+
+def bump(*models, using=None):
+    """Record that rows of ``models`` changed, invalidating their ETags."""
+    now = timezone.now()
+    labels = [_label(model) for model in models]
+    for label in labels:
+        manager = ChangeVersion.objects.using(using)
+        changes = {"version": F("version") + 1, "changed_at": now}
+        if manager.filter(label=label).update(**changes):
+            continue
+        try:
+            with transaction.atomic(using=using):
+                manager.create(label=label, version=1, changed_at=now)
+        except IntegrityError:
+            manager.filter(label=label).update(**changes)
+
+    keys = [CACHE_PREFIX + label for label in labels]
+    cache.delete_many(keys)
+    # A reader between this write and the commit may have cached the old
+    # value; drop it again once the new one is visible
+    transaction.on_commit(lambda: cache.delete_many(keys), using=using)
+
+
+def read(*models) -> dict:
+    """``{label: (version, changed_at)}``; usually answered from the cache alone."""
+    keys = {CACHE_PREFIX + _label(model): _label(model) for model in models}
+    cached = cache.get_many(list(keys))
+    versions = {keys[key]: value for key, value in cached.items()}
+    missing = [label for label in keys.values() if label not in versions]
+    if missing:
+        stored = {
+            label: (version, changed_at)
+            for label, version, changed_at in ChangeVersion.objects.filter(label__in=missing)
+            .values_list("label", "version", "changed_at")
+        }
+        fresh = {label: stored.get(label, (0, None)) for label in missing}
+        cache.set_many({CACHE_PREFIX + label: value for label, value in fresh.items()}, CACHE_SECONDS)
+        versions.update(fresh)
+    return versions
+
+
+# Per model: fields whose saves do not change anything the tracked views show
+_ignored_fields = {}
+
+
+def _bump_instance(sender, using=None, update_fields=None, **kwargs):
+    ignored = _ignored_fields.get(sender)
+    if update_fields and ignored and set(update_fields) <= ignored:
+        return
+    bump(sender, using=using)
+
+
+def track(*models, ignore_fields=()):
+    """Bump a model's version from its ``post_save`` and ``post_delete`` signals.
+
+    Queryset ``update()``/``bulk_create()`` send no signals; code that uses
+    them calls ``bump()`` itself. Saves whose ``update_fields`` all fall in
+    ``ignore_fields`` are skipped.
+    """
+    for model in models:
+        if ignore_fields:
+            _ignored_fields[model] = set(ignore_fields)
+        uid = f"change_version:{_label(model)}"
+        post_save.connect(_bump_instance, sender=model, dispatch_uid=uid, weak=False)
+        post_delete.connect(_bump_instance, sender=model, dispatch_uid=uid, weak=False)
+
+
+def conditional(*models, daily: bool = False):
+    """``condition()`` for a GET view whose output only depends on ``models``.
+
+    The ETag hashes the models' versions with the full request path, so an
+    unchanged page is answered with 304 before the view runs a query.
+    ``daily`` views also roll over at local midnight, since "today" and
+    "this week" move without any write.
+    """
+
+    def _versions(request):
+        # condition() asks for the ETag and Last-Modified separately
+        if not hasattr(request, "_change_versions"):
+            request._change_versions = read(*models)
+        return request._change_versions
+
+    def etag(request, *args, **kwargs):
+        versions = _versions(request)
+        parts = [f"{label}:{versions[label][0]}" for label in sorted(versions)]
+        parts.append(request.get_full_path())
+        if daily:
+            parts.append(timezone.localdate().isoformat())
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        stamps = [changed_at for _, changed_at in _versions(request).values() if changed_at is not None]
+        if daily:
+            stamps.append(local_midnight(timezone.localdate()))
+        return max(stamps) if stamps else None
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,89 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from sakayhub_admin.geo import haversine_many
+from sakayhub_admin.memo import TTLCache
+
+from .geozones import zone_index
+
+
+# Straight-line distance times this approximates the road distance in town
+DETOUR_FACTOR = 1.3
+# Coordinates are rounded to 4 places (about 11 m) before quoting, so pans
+# of the map that barely move a pin reuse the same quote
+COORDINATE_PLACES = 4
+MEMO_SIZE = 10_000
+MEMO_SECONDS = 60
+
+CENT = Decimal("0.01")
+
+# (flag-down, per road km, minimum) in pesos, by driver vehicle type
+RATES = {
+    "motorcycle": (Decimal("40.00"), Decimal("10.00"), Decimal("50.00")),
+    "sedan": (Decimal("45.00"), Decimal("15.00"), Decimal("80.00")),
+    "suv": (Decimal("55.00"), Decimal("18.00"), Decimal("100.00")),
+    "van": (Decimal("65.00"), Decimal("20.00"), Decimal("120.00")),
+}
+
+_quotes = TTLCache(MEMO_SIZE, MEMO_SECONDS)
+
+
+def _key(pickup, destination) -> tuple:
+    return tuple(round(float(value), COORDINATE_PLACES) for value in (*pickup, *destination))
+
+
+def _price(road_km: float, multiplier: Decimal) -> dict:
+    distance = Decimal(str(road_km))
+    return {
+        vehicle_type: (max(minimum, base + per_km * distance) * multiplier).quantize(CENT, ROUND_HALF_UP)
+        for vehicle_type, (base, per_km, minimum) in RATES.items()
+    }
+
+
+def estimate_fares(pairs) -> list:
+    """Quotes for ``((pickup_lat, pickup_lng), (destination_lat, destination_lng))`` pairs.
+
+    Each quote has the estimated road distance, the pickup's GeoZone and
+    multiplier, and a fare per vehicle type. Quotes are memoised per rounded
+    pair for ``MEMO_SECONDS``; a GeoZone edit makes them stale at once,
+    since each memo entry remembers the zone index it was priced with.
+    Distances for all unmemoised pairs are computed in one pass.
+    """
+    zones = zone_index.get()
+    keys = [_key(pickup, destination) for pickup, destination in pairs]
+    quotes = {}
+    missing = []
+    for key in keys:
+        if key in quotes:
+            continue
+        memo = _quotes.get(key)
+        if memo is not None and memo[0] is zones:
+            quotes[key] = memo[1]
+        else:
+            quotes[key] = None
+            missing.append(key)
+
+    for key, straight_km in zip(missing, haversine_many(missing)):
+        road_km = round(straight_km * DETOUR_FACTOR, 2)
+        zone = zones.lookup(key[0], key[1])
+        multiplier = zone.multiplier if zone is not None else Decimal("1.00")
+        quote = {
+            "distance_km": road_km,
+            "zone": {"id": zone.id, "name": zone.name, "type": zone.type} if zone is not None else None,
+            "multiplier": multiplier,
+            "fares": _price(road_km, multiplier),
+        }
+        quotes[key] = quote
+        _quotes.set(key, (zones, quote))
+    return [quotes[key] for key in keys]
+
+
+def estimate_fare(pickup, destination) -> dict:
+    return estimate_fares([(pickup, destination)])[0]
+
+
+def memo_stats() -> dict:
+    return _quotes.stats()
+
+
+def clear_memo():
+    _quotes.clear()
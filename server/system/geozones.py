@@ -0,0 +1,237 @@
+import math
+import threading
+import time
+from decimal import Decimal
+
+from sakayhub_admin import versions as change_versions
+
+from .models import GeoZone
+
+
+DEFAULT_MULTIPLIER = Decimal("1.00")
+# Entries per tree node; wide nodes keep the tree shallow, which matters more
+# than tight boxes when every step of the descent is interpreted Python
+NODE_CAPACITY = 16
+# How often a lookup checks GeoZone's change version for edits
+RECHECK_SECONDS = 1.0
+# Lookup cells are this fraction of the typical zone's extent
+CELL_FRACTION = 0.125
+# Filled lookup cells kept per index; beyond this new cells are not memoised
+MAX_CACHED_CELLS = 250_000
+
+
+def parse_polygon(boundary) -> list:
+    """Rings of ``(lng, lat)`` tuples from a GeoJSON Polygon, outer ring first.
+
+    Raises ``ValueError`` for anything that is not a usable polygon.
+    """
+    if not isinstance(boundary, dict) or boundary.get("type") != "Polygon":
+        raise ValueError('Boundary must be a GeoJSON object with "type": "Polygon".')
+    rings = boundary.get("coordinates")
+    if not isinstance(rings, list) or not rings:
+        raise ValueError("Polygon needs at least one ring of coordinates.")
+    parsed = []
+    for ring in rings:
+        try:
+            points = [(float(lng), float(lat)) for lng, lat in ring]
+        except (TypeError, ValueError):
+            raise ValueError("Polygon coordinates must be [longitude, latitude] pairs.") from None
+        if points and points[0] == points[-1]:
+            points.pop()
+        if len(points) < 3:
+            raise ValueError("Each polygon ring needs at least three distinct points.")
+        if any(not (-180 <= lng <= 180 and -90 <= lat <= 90) for lng, lat in points):
+            raise ValueError("Polygon coordinates are out of range.")
+        parsed.append(points)
+    return parsed
+
+
+class ZoneMatch:
+    __slots__ = ("id", "name", "type", "multiplier", "area", "bbox", "edges")
+
+    def __init__(self, id, name, type, multiplier, rings):
+        self.id = id
+        self.name = name
+        self.type = type
+        self.multiplier = multiplier
+        outer = rings[0]
+        self.area = abs(sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(outer, outer[1:] + outer[:1]))) / 2
+        xs = [x for x, _ in outer]
+        ys = [y for _, y in outer]
+        self.bbox = (min(xs), min(ys), max(xs), max(ys))
+        # (y1, y2, x1, dx/dy) for every non-horizontal edge of every ring
+        self.edges = tuple(
+            (y1, y2, x1, (x2 - x1) / (y2 - y1))
+            for ring in rings
+            for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1])
+            if y1 != y2
+        )
+
+    def contains(self, x: float, y: float) -> bool:
+        """Even-odd ray cast, so holes (inner rings) are excluded."""
+        inside = False
+        for y1, y2, x1, slope in self.edges:
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * slope:
+                inside = not inside
+        return inside
+
+    def covers(self, min_x, min_y, max_x, max_y) -> bool:
+        """Whether the whole rectangle is inside; ``False`` when unsure."""
+        for y1, y2, x1, slope in self.edges:
+            x2 = x1 + (y2 - y1) * slope
+            if min(x1, x2) <= max_x and max(x1, x2) >= min_x and min(y1, y2) <= max_y and max(y1, y2) >= min_y:
+                return False
+        # No boundary passes through it, so one corner decides for the whole rectangle
+        return self.contains(min_x, min_y)
+
+
+def _pack(items, capacity):
+    """One level of Sort-Tile-Recursive packing: ``(bbox, child)`` groups of ``capacity``."""
+    count = len(items)
+    node_count = math.ceil(count / capacity)
+    slice_size = math.ceil(math.sqrt(node_count)) * capacity
+    by_x = sorted(items, key=lambda item: item[0][0] + item[0][2])
+    nodes = []
+    for start in range(0, count, slice_size):
+        column = sorted(by_x[start:start + slice_size], key=lambda item: item[0][1] + item[0][3])
+        for offset in range(0, len(column), capacity):
+            children = column[offset:offset + capacity]
+            bbox = (
+                min(child[0][0] for child in children),
+                min(child[0][1] for child in children),
+                max(child[0][2] for child in children),
+                max(child[0][3] for child in children),
+            )
+            nodes.append((bbox, children))
+    return nodes
+
+
+class ZoneIndex:
+    """Static STR-packed R-tree over the active zones' bounding boxes.
+
+    The tree is bulk-loaded once and replaced wholesale when zones change, so
+    it never needs the insert/split logic of a dynamic R-tree. A point that
+    falls in several zones resolves to the smallest one, so a terminal inside
+    an airport zone inside a city zone gets the terminal's multiplier.
+
+    Point lookups go through a grid of small cells filled from the tree on
+    first use: each cell keeps the zones whose boxes reach it, smallest
+    first, flagged when the zone covers the whole cell. Most lookups are
+    then a dict hit and at most a ray cast or two, instead of a descent
+    that tests every overlapping box.
+    """
+
+    def __init__(self, zones=(), capacity: int = NODE_CAPACITY):
+        self.zones = list(zones)
+        self._root = None
+        self._cells = {}
+        self.cell_size = 1.0
+        if self.zones:
+            level = [(zone.bbox, zone) for zone in self.zones]
+            level = _pack(level, capacity)
+            while len(level) > 1:
+                level = _pack(level, capacity)
+            self._root = level[0]
+            extents = sorted(min(zone.bbox[2] - zone.bbox[0], zone.bbox[3] - zone.bbox[1]) for zone in self.zones)
+            self.cell_size = max(extents[len(extents) // 2] * CELL_FRACTION, 1e-4)
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    @classmethod
+    def from_queryset(cls, queryset) -> "ZoneIndex":
+        zones = []
+        for pk, name, zone_type, multiplier, boundary in queryset.values_list(
+            "id", "name", "type", "multiplier", "boundary"
+        ):
+            try:
+                rings = parse_polygon(boundary)
+            except ValueError:
+                continue  # Zones without a drawn boundary cannot match a point
+            zones.append(ZoneMatch(pk, name, zone_type, multiplier, rings))
+        return cls(zones)
+
+    def intersecting(self, min_x, min_y, max_x, max_y) -> list:
+        """Zones whose bounding box meets the rectangle (longitude/latitude degrees)."""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            _, children = stack.pop()
+            for bbox, child in children:
+                if bbox[0] <= max_x and bbox[2] >= min_x and bbox[1] <= max_y and bbox[3] >= min_y:
+                    if type(child) is ZoneMatch:
+                        found.append(child)
+                    else:
+                        stack.append((bbox, child))
+        return found
+
+    def _fill(self, cell) -> tuple:
+        size = self.cell_size
+        box = (cell[0] * size, cell[1] * size, (cell[0] + 1) * size, (cell[1] + 1) * size)
+        candidates = tuple(
+            (zone, zone.covers(*box))
+            for zone in sorted(self.intersecting(*box), key=lambda zone: (zone.area, zone.id))
+        )
+        if len(self._cells) < MAX_CACHED_CELLS:
+            self._cells[cell] = candidates
+        return candidates
+
+    def lookup(self, latitude: float, longitude: float):
+        """The smallest active zone containing the point, or ``None``."""
+        if self._root is None:
+            return None
+        cell = (math.floor(longitude / self.cell_size), math.floor(latitude / self.cell_size))
+        candidates = self._cells.get(cell)
+        if candidates is None:
+            candidates = self._fill(cell)
+        for zone, covers in candidates:
+            if covers or zone.contains(longitude, latitude):
+                return zone
+        return None
+
+    def multiplier(self, latitude: float, longitude: float) -> Decimal:
+        zone = self.lookup(latitude, longitude)
+        return zone.multiplier if zone is not None else DEFAULT_MULTIPLIER
+
+
+class _ZoneIndexCache:
+    """Process-wide ``ZoneIndex`` rebuilt after GeoZone's change version moves.
+
+    Edits are picked up within ``RECHECK_SECONDS`` plus the change version's
+    own cache lifetime; between checks a lookup costs no I/O at all.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> ZoneIndex:
+        if self._index is not None and time.monotonic() - self._checked_at < RECHECK_SECONDS:
+            return self._index
+        with self._lock:
+            version = change_versions.read(GeoZone)[GeoZone._meta.label_lower][0]
+            if self._index is None or version != self._version:
+                self._index = ZoneIndex.from_queryset(GeoZone.objects.filter(status="active"))
+                self._version = version
+            self._checked_at = time.monotonic()
+            return self._index
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+
+
+zone_index = _ZoneIndexCache()
+
+
+def find_zone(latitude: float, longitude: float):
+    """The active GeoZone match for a point, or ``None``; see ``ZoneIndex.lookup()``."""
+    return zone_index.get().lookup(latitude, longitude)
+
+
+def zone_multiplier(latitude: float, longitude: float) -> Decimal:
+    return zone_index.get().multiplier(latitude, longitude)
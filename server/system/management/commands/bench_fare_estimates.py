@@ -0,0 +1,88 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from system.fares import clear_memo, estimate_fare, estimate_fares, memo_stats
+from system.geozones import zone_index
+from system.management.commands.bench_zone_lookup import LAT_RANGE, LNG_RANGE, random_polygon
+from system.models import GeoZone
+from system.views import fare_estimate
+
+
+class Command(BaseCommand):
+    help = "Benchmark fare quotes over seeded GeoZones (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--zones", type=int, default=2_000)
+        parser.add_argument("--quotes", type=int, default=20_000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(5)
+        count = options["quotes"]
+        with transaction.atomic():
+            GeoZone.objects.bulk_create(
+                GeoZone(
+                    name=f"Bench Zone {index}",
+                    type="Surge Zone",
+                    multiplier=Decimal("1.25"),
+                    status="active",
+                    boundary={"type": "Polygon", "coordinates": [[
+                        [lng, lat] for lng, lat in random_polygon(
+                            rng, rng.uniform(*LNG_RANGE), rng.uniform(*LAT_RANGE), rng.uniform(0.002, 0.02), 12
+                        )
+                    ]]},
+                )
+                for index in range(options["zones"])
+            )
+            zone_index.invalidate()
+            zone_index.get()
+            try:
+                self._run(rng, count)
+            finally:
+                zone_index.invalidate()
+                clear_memo()
+                transaction.set_rollback(True)
+
+    def _point(self, rng):
+        return (rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE))
+
+    def _run(self, rng, count: int):
+        distinct = [(self._point(rng), self._point(rng)) for _ in range(count)]
+        hubs = [self._point(rng) for _ in range(8)]
+        hub_pairs = [(rng.choice(hubs), rng.choice(hubs)) for _ in range(count)]
+
+        # First touches of a zone lookup cell are slower; warm them so both runs compare like for like
+        estimate_fares(distinct)
+        clear_memo()
+        self._report("distinct pairs, one by one", count, lambda: [estimate_fare(*pair) for pair in distinct])
+        clear_memo()
+        self._report(
+            "distinct pairs, batches of 50", count,
+            lambda: [estimate_fares(distinct[start:start + 50]) for start in range(0, count, 50)],
+        )
+        clear_memo()
+        self._report("hub pairs (memoised)", count, lambda: [estimate_fare(*pair) for pair in hub_pairs])
+        self.stdout.write(f"memo after hub pairs: {memo_stats()}")
+
+        factory = APIRequestFactory()
+        user = get_user_model()(username="bench", is_active=True)
+        requests = []
+        for pickup, destination in hub_pairs[:2000]:
+            request = factory.get("/api/system/fares/estimate/", {
+                "pickup_lat": pickup[0], "pickup_lng": pickup[1],
+                "destination_lat": destination[0], "destination_lng": destination[1],
+            })
+            force_authenticate(request, user=user)
+            requests.append(request)
+        self._report("GET view, hub pairs", len(requests), lambda: [fare_estimate(request) for request in requests])
+
+    def _report(self, label: str, count: int, func):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:>32}: {elapsed / count * 1e6:8.1f} µs per quote")
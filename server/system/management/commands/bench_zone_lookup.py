@@ -0,0 +1,76 @@
+import math
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from system.geozones import ZoneIndex, ZoneMatch
+
+
+# Roughly Metro Manila
+LAT_RANGE = (14.35, 14.80)
+LNG_RANGE = (120.90, 121.15)
+
+
+def random_polygon(rng, center_lng, center_lat, radius_deg, vertices):
+    angles = sorted(rng.uniform(0, 2 * math.pi) for _ in range(vertices))
+    return [
+        (center_lng + math.cos(angle) * radius_deg * rng.uniform(0.6, 1.0),
+         center_lat + math.sin(angle) * radius_deg * rng.uniform(0.6, 1.0))
+        for angle in angles
+    ]
+
+
+class Command(BaseCommand):
+    help = "Benchmark point-in-zone lookups over synthetic zones (no database access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--zones", type=int, default=3_000)
+        parser.add_argument("--lookups", type=int, default=100_000)
+        parser.add_argument("--vertices", type=int, default=12, help="Vertices per zone polygon")
+
+    def handle(self, *args, **options):
+        rng = random.Random(11)
+        zones = [
+            ZoneMatch(
+                zone_id,
+                f"Zone {zone_id}",
+                "Surge Zone",
+                Decimal("1.50"),
+                [random_polygon(rng, rng.uniform(*LNG_RANGE), rng.uniform(*LAT_RANGE),
+                                rng.uniform(0.002, 0.02), options["vertices"])],
+            )
+            for zone_id in range(1, options["zones"] + 1)
+        ]
+        points = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(options["lookups"])]
+
+        started = time.perf_counter()
+        index = ZoneIndex(zones)
+        self.stdout.write(f"Packed {len(index)} zones in {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+        lookup = index.lookup
+        # The first pass also fills the lookup cells it touches
+        for label in ("cold", "warm"):
+            started = time.perf_counter()
+            matches = [lookup(latitude, longitude) for latitude, longitude in points]
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Index ({label}): {len(points) / elapsed:,.0f} lookups/s "
+                f"({elapsed / len(points) * 1e6:.2f} µs each)"
+            )
+        hits = sum(match is not None for match in matches)
+        self.stdout.write(f"{hits / len(points):.0%} of points fall inside a zone")
+
+        # The linear scan is slow; time it on a sample and check the answers agree
+        sample = points[: max(1, len(points) // 50)]
+        ordered = sorted(zones, key=lambda zone: (zone.area, zone.id))
+        started = time.perf_counter()
+        scanned = [
+            next((zone for zone in ordered if zone.contains(longitude, latitude)), None)
+            for latitude, longitude in sample
+        ]
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Linear scan: {len(sample) / elapsed:,.0f} lookups/s")
+        if scanned != matches[: len(sample)]:
+            self.stderr.write(self.style.ERROR("Index and linear scan disagree"))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:43
+
+import re
+
+import django.core.validators
+from decimal import Decimal, InvalidOperation
+from django.db import migrations, models
+
+
+def parse_multiplier_text(apps, schema_editor):
+    # Multipliers were free text such as "1.8x"; keep the number, default to 1
+    GeoZone = apps.get_model('system', 'GeoZone')
+    for pk, text in GeoZone.objects.values_list('id', 'multiplier'):
+        match = re.search(r'\d+(?:\.\d+)?', text or '')
+        try:
+            value = Decimal(match.group()).quantize(Decimal('0.01')) if match else Decimal('1.00')
+        except InvalidOperation:
+            value = Decimal('1.00')
+        if value >= 100:
+            value = Decimal('1.00')
+        GeoZone.objects.filter(pk=pk).update(multiplier=str(value))
+
+
+def format_multiplier_text(apps, schema_editor):
+    GeoZone = apps.get_model('system', 'GeoZone')
+    for pk, value in GeoZone.objects.values_list('id', 'multiplier'):
+        text = str(value)
+        if '.' in text:
+            text = text.rstrip('0').rstrip('.')
+        GeoZone.objects.filter(pk=pk).update(multiplier=f'{text}x')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0002_change_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(parse_multiplier_text, format_multiplier_text),
+        migrations.AddField(
+            model_name='geozone',
+            name='boundary',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='geozone',
+            name='multiplier',
+            field=models.DecimalField(decimal_places=2, default=Decimal('1.00'), max_digits=4, validators=[django.core.validators.MinValueValidator(Decimal('0'))]),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0003_geozone_boundary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100)),
+                ('window', models.PositiveBigIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('expires_at', models.PositiveBigIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='system_ratelimit_expires_idx')],
+                'constraints': [models.UniqueConstraint(fields=('key', 'window'), name='system_ratelimit_key_window_uniq')],
+            },
+        ),
+    ]
@@ -1,3 +1,7 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 from django.db import models
 
 class PromoCode(models.Model):
@@ -37,5 +41,53 @@ class GeoZone(models.Model):
     ]
     name = models.CharField(max_length=100)
     type = models.CharField(max_length=50)
-    multiplier = models.CharField(max_length=10)
-    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
\ No newline at end of file
+    multiplier = models.DecimalField(
+        max_digits=4, decimal_places=2, default=Decimal("1.00"), validators=[MinValueValidator(Decimal("0"))]
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    # GeoJSON Polygon: {"type": "Polygon", "coordinates": [[[lng, lat], ...], ...holes]}
+    boundary = models.JSONField(default=dict, blank=True)
+
+    def clean(self):
+        if self.boundary:
+            from .geozones import parse_polygon
+
+            try:
+                parse_polygon(self.boundary)
+            except ValueError as exc:
+                raise ValidationError({"boundary": str(exc)})
+
+    def save(self, *args, **kwargs):
+        self.full_clean()
+        return super().save(*args, **kwargs)
+
+class ChangeVersion(models.Model):
+    """Write counter per tracked model; see ``sakayhub_admin.versions``."""
+
+    label = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.label} v{self.version}"
+
+
+class RateLimitCounter(models.Model):
+    """Hits in one fixed window of one rate limit; see ``sakayhub_admin.ratelimit``."""
+
+    key = models.CharField(max_length=100)
+    window = models.PositiveBigIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    # Epoch seconds after which the row no longer affects any decision
+    expires_at = models.PositiveBigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["key", "window"], name="system_ratelimit_key_window_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="system_ratelimit_expires_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.key} @{self.window}: {self.count}"
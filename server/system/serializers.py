@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+from .fares import RATES
+
+
+class ZoneLookupQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+
+
+MAX_FARE_PAIRS = 50
+
+
+class FarePairSerializer(serializers.Serializer):
+    pickup_lat = serializers.FloatField(min_value=-90, max_value=90)
+    pickup_lng = serializers.FloatField(min_value=-180, max_value=180)
+    destination_lat = serializers.FloatField(min_value=-90, max_value=90)
+    destination_lng = serializers.FloatField(min_value=-180, max_value=180)
+
+
+class FareEstimateQuerySerializer(FarePairSerializer):
+    vehicle_type = serializers.ChoiceField(choices=sorted(RATES), required=False)
+
+
+class FareEstimateBatchSerializer(serializers.Serializer):
+    pairs = FarePairSerializer(many=True, allow_empty=False, max_length=MAX_FARE_PAIRS)
+    vehicle_type = serializers.ChoiceField(choices=sorted(RATES), required=False)
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from sakayhub_admin import versions as change_versions
+from .geozones import zone_index
+from .models import GeoZone
+
+
+change_versions.track(GeoZone)
+
+
+@receiver(post_save, sender=GeoZone)
+@receiver(post_delete, sender=GeoZone)
+def reload_zone_index(sender, **kwargs):
+    # Other workers notice the version bump; this one rebuilds on its next lookup
+    zone_index.invalidate()
@@ -1,3 +1,176 @@
-from django.test import TestCase
+import random
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from sakayhub_admin.geo import haversine_km
+from .fares import DETOUR_FACTOR, clear_memo, estimate_fare, memo_stats
+from .geozones import ZoneIndex, ZoneMatch, parse_polygon, zone_index
+from .models import GeoZone
+
+
+def square(min_lng, min_lat, size):
+    return {
+        "type": "Polygon",
+        "coordinates": [[
+            [min_lng, min_lat],
+            [min_lng + size, min_lat],
+            [min_lng + size, min_lat + size],
+            [min_lng, min_lat + size],
+            [min_lng, min_lat],
+        ]],
+    }
+
+
+class GeoZoneLookupTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin_user = User.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        zone_index.invalidate()
+        self.addCleanup(zone_index.invalidate)
+
+    def _lookup(self, lat, lng):
+        response = self.client.get("/api/system/zones/lookup/", {"lat": lat, "lng": lng})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_smallest_active_zone_wins(self):
+        city = GeoZone.objects.create(
+            name="Makati", type="Surge Zone", multiplier="1.20", status="active", boundary=square(121.0, 14.5, 0.1)
+        )
+        airport = GeoZone.objects.create(
+            name="Airport Area", type="Special Zone", multiplier="2.20", status="active",
+            boundary=square(121.01, 14.51, 0.02),
+        )
+        GeoZone.objects.create(
+            name="Closed Pier", type="Limited Zone", multiplier="0.50", status="inactive",
+            boundary=square(121.015, 14.515, 0.005),
+        )
+
+        self.assertEqual(
+            self._lookup(14.517, 121.017),
+            {"zone": {"id": airport.id, "name": "Airport Area", "type": "Special Zone"}, "multiplier": "2.20"},
+        )
+        self.assertEqual(self._lookup(14.58, 121.08)["zone"]["id"], city.id)
+        self.assertEqual(self._lookup(15.0, 121.0), {"zone": None, "multiplier": "1.00"})
+
+        airport.status = "inactive"
+        airport.save()
+        self.assertEqual(self._lookup(14.517, 121.017)["multiplier"], "1.20")
+
+    def test_holes_are_excluded(self):
+        boundary = square(121.0, 14.5, 0.1)
+        boundary["coordinates"].append(square(121.04, 14.54, 0.02)["coordinates"][0])
+        GeoZone.objects.create(name="Ring", type="Surge Zone", multiplier="1.50", status="active", boundary=boundary)
+
+        self.assertEqual(self._lookup(14.51, 121.01)["multiplier"], "1.50")
+        self.assertIsNone(self._lookup(14.55, 121.05)["zone"])
+
+    def test_boundary_is_validated(self):
+        zone = GeoZone(name="Bad", type="Surge Zone", multiplier="1.00", status="active",
+                       boundary={"type": "Polygon", "coordinates": [[[121.0, 14.5], [121.1, 14.5]]]})
+        with self.assertRaises(ValidationError):
+            zone.save()
+        with self.assertRaises(ValueError):
+            parse_polygon({"type": "Point", "coordinates": [121.0, 14.5]})
+
+    def test_index_matches_a_linear_scan(self):
+        rng = random.Random(5)
+        zones = []
+        for zone_id in range(1, 301):
+            lng, lat, size = rng.uniform(120.9, 121.1), rng.uniform(14.4, 14.7), rng.uniform(0.005, 0.05)
+            rings = parse_polygon({"type": "Polygon", "coordinates": [[
+                [lng, lat], [lng + size, lat + size / 3], [lng + size / 2, lat + size],
+            ]]})
+            zones.append(ZoneMatch(zone_id, f"Zone {zone_id}", "Surge Zone", Decimal("1.10"), rings))
+        index = ZoneIndex(zones)
+        ordered = sorted(zones, key=lambda zone: (zone.area, zone.id))
+
+        for _ in range(2000):
+            lat, lng = rng.uniform(14.38, 14.77), rng.uniform(120.88, 121.17)
+            expected = next((zone for zone in ordered if zone.contains(lng, lat)), None)
+            self.assertIs(index.lookup(lat, lng), expected)
+
+
+class FareEstimateTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin_user = User.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        zone_index.invalidate()
+        clear_memo()
+        self.addCleanup(zone_index.invalidate)
+        self.addCleanup(clear_memo)
+
+    def _estimate(self, pickup, destination, **extra):
+        response = self.client.get("/api/system/fares/estimate/", {
+            "pickup_lat": pickup[0], "pickup_lng": pickup[1],
+            "destination_lat": destination[0], "destination_lng": destination[1],
+            **extra,
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_quote_prices_road_distance_and_pickup_zone(self):
+        pickup, destination = (14.55, 121.0), (14.55, 121.03)
+        road_km = round(haversine_km(*pickup, *destination) * DETOUR_FACTOR, 2)
+        response = self._estimate(pickup, destination)
+        quote = response.json()
+        self.assertEqual((quote["distance_km"], road_km), (4.2, 4.2))
+        self.assertIsNone(quote["zone"])
+        # Flag-down plus per-km rate, above each vehicle type's minimum
+        self.assertEqual(quote["fares"]["motorcycle"], "82.00")
+        self.assertEqual(quote["fares"]["sedan"], "108.00")
+        self.assertIn("max-age=60", response["Cache-Control"])
+
+        GeoZone.objects.create(
+            name="Downtown Core", type="Surge Zone", multiplier="1.80", status="active",
+            boundary=square(120.99, 14.54, 0.02),
+        )
+        quote = self._estimate(pickup, destination, vehicle_type="sedan").json()
+        self.assertEqual(quote["multiplier"], "1.80")
+        self.assertEqual(quote["fares"], {"sedan": "194.40"})
+        # Only the pickup decides the surge
+        self.assertEqual(self._estimate(destination, pickup).json()["multiplier"], "1.00")
+
+    def test_minimum_fare_and_batch_order(self):
+        near, far = ((14.55, 121.0), (14.551, 121.0)), ((14.55, 121.0), (14.65, 121.0))
+        pair = lambda points: {
+            "pickup_lat": points[0][0], "pickup_lng": points[0][1],
+            "destination_lat": points[1][0], "destination_lng": points[1][1],
+        }
+        response = self.client.post(
+            "/api/system/fares/estimate/",
+            {"pairs": [pair(far), pair(near), pair(far)], "vehicle_type": "van"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual(results[1]["fares"], {"van": "120.00"})
+        self.assertEqual(results[0], results[2])
+        self.assertGreater(Decimal(results[0]["fares"]["van"]), Decimal("120.00"))
+
+        response = self.client.post("/api/system/fares/estimate/", {"pairs": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_repeated_pairs_are_memoised(self):
+        pickup, destination = (14.5547, 121.0244), (14.5176, 121.0509)
+        estimate_fare(pickup, destination)
+        estimate_fare((14.55471, 121.02441), destination)
+        self.assertEqual(memo_stats(), {"size": 1, "hits": 1, "misses": 1})
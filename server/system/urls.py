@@ -1,5 +1,7 @@
 from django.urls import path
+from . import views
 
 urlpatterns = [
-    # You can add your API endpoints here later
-]
\ No newline at end of file
+    path('zones/lookup/', views.lookup_geo_zone, name='geo-zones-lookup'),
+    path('fares/estimate/', views.fare_estimate, name='fares-estimate'),
+]
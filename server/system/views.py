@@ -1,3 +1,66 @@
-from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from auth.authentication import CachedTokenAuthentication
+
+from .fares import MEMO_SECONDS, estimate_fares
+from .geozones import DEFAULT_MULTIPLIER, find_zone
+from .serializers import FareEstimateBatchSerializer, FareEstimateQuerySerializer, ZoneLookupQuerySerializer
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def lookup_geo_zone(request):
+    serializer = ZoneLookupQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    zone = find_zone(serializer.validated_data["lat"], serializer.validated_data["lng"])
+    if zone is None:
+        return Response({"zone": None, "multiplier": str(DEFAULT_MULTIPLIER)})
+    return Response({
+        "zone": {"id": zone.id, "name": zone.name, "type": zone.type},
+        "multiplier": str(zone.multiplier),
+    })
+
+
+def _render_quote(quote, vehicle_type=None):
+    fares = quote["fares"]
+    if vehicle_type is not None:
+        fares = {vehicle_type: fares[vehicle_type]}
+    return {
+        "distance_km": quote["distance_km"],
+        "zone": quote["zone"],
+        "multiplier": str(quote["multiplier"]),
+        "fares": {name: str(amount) for name, amount in fares.items()},
+    }
+
+
+@api_view(["GET", "POST"])
+@authentication_classes([CachedTokenAuthentication, SessionAuthentication])
+@permission_classes([IsAuthenticated])
+def fare_estimate(request):
+    """GET quotes one pickup/destination pair; POST ``{"pairs": [...]}`` quotes up to 50 at once."""
+    if request.method == "GET":
+        serializer = FareEstimateQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        pairs = [serializer.validated_data]
+    else:
+        serializer = FareEstimateBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pairs = serializer.validated_data["pairs"]
+
+    vehicle_type = serializer.validated_data.get("vehicle_type")
+    quotes = estimate_fares(
+        ((pair["pickup_lat"], pair["pickup_lng"]), (pair["destination_lat"], pair["destination_lng"]))
+        for pair in pairs
+    )
+    rendered = [_render_quote(quote, vehicle_type) for quote in quotes]
+    if request.method == "POST":
+        return Response({"results": rendered})
+    response = Response(rendered[0])
+    # The app may reuse a quote while the map only jitters around the same pins
+    patch_cache_control(response, private=True, max_age=MEMO_SECONDS)
+    return response
 
-# Create your views here.
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.search import user_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index used by the users list endpoint"
+
+    def handle(self, *args, **options):
+        indexed = user_search_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} users."))
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends keep using icontains lookups
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS users_user_search USING fts5("
+        "name, email, phone, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO users_user_search (rowid, name, email, phone) "
+        "SELECT id, name, email, phone FROM users_user"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS users_user_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_merge_20251024_2204'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
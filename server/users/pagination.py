@@ -1,5 +1,7 @@
 from rest_framework.pagination import PageNumberPagination
 
+from sakayhub_admin.pagination import KeysetPagination
+
 
 class UserPagination(PageNumberPagination):
     page_size = 5
@@ -7,3 +9,8 @@ class UserPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class UserCursorPagination(KeysetPagination):
+    page_size = 5
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("id",)
@@ -0,0 +1,10 @@
+from sakayhub_admin.search import SearchIndex
+
+from .models import User
+
+
+user_search_index = SearchIndex(
+    User,
+    table="users_user_search",
+    columns=("name", "email", "phone"),
+)
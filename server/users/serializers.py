@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from sakayhub_admin.bulk import BulkStatusSerializer
+from sakayhub_admin.serialization import ValuesSerializer
 from .models import User
 
 
@@ -36,6 +38,10 @@ class UserSerializer(serializers.ModelSerializer):
         return value
 
 
+# values()-backed twin of UserSerializer for list pages
+user_list_serializer = ValuesSerializer(UserSerializer)
+
+
 class UserStatusUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -52,3 +58,12 @@ class UserStatusUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Invalid status value.")
         return value
 
+
+class UserBulkFilterSerializer(serializers.Serializer):
+    search = serializers.CharField(required=False, allow_blank=True, default="")
+    status = serializers.ChoiceField(choices=User.STATUS_CHOICES, required=False)
+
+
+class UserBulkStatusSerializer(BulkStatusSerializer):
+    status = serializers.ChoiceField(choices=User.STATUS_CHOICES)
+    filter = UserBulkFilterSerializer(required=False)
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from sakayhub_admin import versions as change_versions
+from .models import User
+from .search import user_search_index
+
+
+change_versions.track(User)
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, update_fields=None, using=None, **kwargs):
+    # Status-only saves (suspend/unsuspend) do not touch indexed columns
+    if update_fields and not set(update_fields) & set(user_search_index.columns):
+        return
+    user_search_index.update(instance, using=using)
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, using=None, **kwargs):
+    user_search_index.delete(instance.pk, using=using)
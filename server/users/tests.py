@@ -1,3 +1,148 @@
-from django.test import TestCase
+import json
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from .models import User
+from .search import user_search_index
+
+
+class UserSearchIndexTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        AuthUser = get_user_model()
+        self.admin_user = AuthUser.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+    def _create_user(self, name, email, phone):
+        now = timezone.now()
+        return User.objects.create(
+            name=name,
+            email=email,
+            phone=phone,
+            status="active",
+            kyc_status="verified",
+            join_date=now.date(),
+            last_active=now,
+        )
+
+    def _search(self, term):
+        response = self.client.get("/api/users/list/", {"search": term, "page_size": 50})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["name"] for row in response.json()["results"]]
+
+    def test_search_matches_word_prefixes_across_columns(self):
+        self._create_user("Maria Santos", "maria@example.com", "+63 917 555 0101")
+        self._create_user("Pedro Reyes", "pedro@mail.com", "+63 918 555 0202")
+
+        self.assertEqual(self._search("mar"), ["Maria Santos"])
+        self.assertEqual(self._search("mail.com"), ["Pedro Reyes"])
+        self.assertEqual(self._search("918"), ["Pedro Reyes"])
+        self.assertEqual(sorted(self._search("555")), ["Maria Santos", "Pedro Reyes"])
+
+    def test_phone_digits_match_anywhere(self):
+        self._create_user("Lito Lapid", "lito@example.com", "+639171234567")
+        self._create_user("Nora Aunor", "nora@example.com", "+639189876543")
+
+        self.assertEqual(self._search("9171234567"), ["Lito Lapid"])
+        self.assertEqual(self._search("1234"), ["Lito Lapid"])
+        self.assertEqual(self._search("+639189876543"), ["Nora Aunor"])
+
+    def test_index_follows_saves_and_deletes(self):
+        user = self._create_user("Ana Cruz", "acruz@example.com", "+63 917 555 0303")
+        self.assertEqual(self._search("ana"), ["Ana Cruz"])
+
+        user.name = "Bea Cruz"
+        user.save()
+        self.assertEqual(self._search("ana"), [])
+        self.assertEqual(self._search("bea"), ["Bea Cruz"])
+
+        user.delete()
+        self.assertEqual(self._search("bea"), [])
+
+    def test_rebuild_command_restores_missing_rows(self):
+        self._create_user("Luis Tan", "luis@example.com", "+63 917 555 0404")
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {user_search_index.table}")
+        self.assertEqual(self._search("luis"), [])
+
+        call_command("rebuild_user_search_index", stdout=StringIO())
+        self.assertEqual(self._search("luis"), ["Luis Tan"])
+
+
+class UserExportTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        AuthUser = get_user_model()
+        self.admin_user = AuthUser.objects.create_user(
+            username="admin@example.com",
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        now = timezone.now()
+        for index, name in enumerate(["Maria Santos", "Pedro Reyes", "Maria Lopez"]):
+            User.objects.create(
+                name=name,
+                email=f"user{index}@example.com",
+                phone=f"+63 917 555 010{index}",
+                password="not-exported",
+                status="active",
+                kyc_status="verified",
+                join_date=now.date(),
+                last_active=now,
+            )
+
+    def _body(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_csv_export_streams_filtered_rows(self):
+        response = self.client.get("/api/users/export/", {"search": "maria"})
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        self.assertIn('filename="users.csv"', response["Content-Disposition"])
+
+        lines = self._body(response).splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["id", "name", "email"])
+        self.assertEqual(len(lines), 3)
+        self.assertNotIn("not-exported", "\n".join(lines))
+
+    def test_ndjson_export(self):
+        response = self.client.get("/api/users/export/", {"format": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+
+        rows = [json.loads(line) for line in self._body(response).splitlines()]
+        self.assertEqual([row["name"] for row in rows], ["Maria Santos", "Pedro Reyes", "Maria Lopez"])
+        self.assertNotIn("password", rows[0])
+
+    def test_export_requires_authentication(self):
+        response = APIClient().get("/api/users/export/")
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+
+@override_settings(LOGIN_RATE_LIMITS={"account": (2, 900)})
+class AdminLoginRateLimitTests(APITestCase):
+    def test_failures_lock_the_username_across_addresses(self):
+        get_user_model().objects.create_user(username="admin@example.com", password="adminpass123", is_staff=True)
+        client = Client()
+        for address in ("10.0.0.1", "10.0.0.2"):
+            response = client.post("/api/users/login/", {"username": "admin@example.com", "password": "nope"},
+                                   REMOTE_ADDR=address)
+            self.assertEqual(response.status_code, 401)
+        response = client.post("/api/users/login/", {"username": "admin@example.com", "password": "adminpass123"},
+                               REMOTE_ADDR="10.0.0.3")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
@@ -7,6 +7,8 @@ urlpatterns = [
     path('logout/', views.logout, name='logout'),
     path('me/', views.me, name='me'),
     path('list/', views.list_users, name='users-list'),
+    path('export/', views.export_users, name='users-export'),
+    path('bulk/status/', views.bulk_update_user_status, name='users-bulk-status'),
     path('<int:user_id>/status/', views.update_user_status, name='user-update-status'),
     path('<int:user_id>/suspend/', views.suspend_user, name='user-suspend'),
     path('<int:user_id>/unsuspend/', views.unsuspend_user, name='user-unsuspend'),
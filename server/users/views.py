@@ -2,28 +2,20 @@ from django.contrib.auth import authenticate, login as django_login, logout as d
 from django.http import JsonResponse
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_protect
 from django.views.decorators.http import require_POST, require_GET
-from django.core.cache import cache
 from django.middleware.csrf import rotate_token, get_token
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status as drf_status
 
 from .models import User
-from .serializers import UserSerializer, UserStatusUpdateSerializer
-from .pagination import UserPagination
-from django.db.models import Q
-
-
-MAX_FAILED_LOGINS = 5
-BLOCK_MINUTES = 15
-
-
-def _get_client_ip(request):
-    forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-    if forwarded_for:
-        return forwarded_for.split(",")[0].strip()
-    return request.META.get("REMOTE_ADDR") or "unknown"
+from .serializers import UserSerializer, UserStatusUpdateSerializer, UserBulkStatusSerializer, user_list_serializer
+from .pagination import UserPagination, UserCursorPagination
+from .search import user_search_index
+from sakayhub_admin.bulk import bulk_update_status, resolve_filter_ids
+from sakayhub_admin.export import EXPORT_RENDERERS, export_response
+from sakayhub_admin.ratelimit import LoginThrottle
+from sakayhub_admin.versions import conditional
 
 
 @ensure_csrf_cookie
@@ -43,20 +35,18 @@ def login(request):
     if not username or not password:
         return JsonResponse({"detail": "Invalid credentials"}, status=400)
 
-    # Rate limiting per IP+username
-    ip = _get_client_ip(request)
-    cache_key = f"login_fail:{ip}:{username}"
-    failures = cache.get(cache_key, 0)
-    if failures >= MAX_FAILED_LOGINS:
-        return JsonResponse({"detail": "Too many attempts. Try again later."}, status=429)
+    # Limits per client IP, per username and overall, shared by all workers;
+    # checked before authenticate() spends its hashing rounds
+    throttle = LoginThrottle(request, username, scope="admin")
+    retry_after = throttle.acquire()
+    if retry_after:
+        response = JsonResponse({"detail": "Too many attempts. Try again later."}, status=429)
+        response["Retry-After"] = str(retry_after)
+        return response
 
+    # A failure is already counted against the username until succeeded()
     user = authenticate(request, username=username, password=password)
-    if user is None:
-        cache.set(cache_key, failures + 1, BLOCK_MINUTES * 60)
-        return JsonResponse({"detail": "Invalid credentials"}, status=401)
-
-    if not user.is_active:
-        cache.set(cache_key, failures + 1, BLOCK_MINUTES * 60)
+    if user is None or not user.is_active:
         return JsonResponse({"detail": "Invalid credentials"}, status=401)
 
     # Restrict to staff/admin accounts for CRM
@@ -64,7 +54,7 @@ def login(request):
         return JsonResponse({"detail": "Unauthorized"}, status=403)
 
     # Successful auth: clear failure counter and rotate CSRF token
-    cache.delete(cache_key)
+    throttle.succeeded()
     django_login(request, user)
     rotate_token(request)
     return JsonResponse({
@@ -99,23 +89,51 @@ def me(request):
     })
 
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def list_users(request):
+EXPORT_COLUMNS = [
+    ("id", "id"),
+    ("name", "name"),
+    ("email", "email"),
+    ("phone", "phone"),
+    ("status", "status"),
+    ("kyc_status", "kyc_status"),
+    ("total_rides", "total_rides"),
+    ("total_spent", "total_spent"),
+    ("join_date", "join_date"),
+    ("last_active", "last_active"),
+]
+
+
+def _filtered_users(search: str):
     # CRM users are separate from auth users; list business users from our User model
     queryset = User.objects.all().order_by("id")
-    # Server-side search across the full dataset then paginate
-    search = request.GET.get("search", "").strip()
+    # Server-side search through the full-text index, best matches first
     if search:
-        queryset = queryset.filter(
-            Q(name__icontains=search)
-            | Q(email__icontains=search)
-            | Q(phone__icontains=search)
-        )
-    paginator = UserPagination()
+        queryset = user_search_index.filter(queryset, search)
+    return queryset
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@conditional(User)
+def list_users(request):
+    # ?fields= / ?exclude= narrow both the payload and the SELECT
+    serializer = user_list_serializer.for_request(request)
+    # The cursor columns are fetched even when they are not rendered
+    queryset = serializer.values(_filtered_users(request.GET.get("search", "").strip()), include=UserCursorPagination.ordering_fields())
+    if UserCursorPagination.is_requested(request):
+        paginator = UserCursorPagination()
+    else:
+        paginator = UserPagination()
     page = paginator.paginate_queryset(queryset, request)
-    serializer = UserSerializer(page, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    return paginator.get_paginated_response(serializer.to_representation(page))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@renderer_classes(EXPORT_RENDERERS)
+def export_users(request):
+    queryset = _filtered_users(request.GET.get("search", "").strip())
+    return export_response(request, queryset, EXPORT_COLUMNS, "users")
 
 
 @api_view(["PATCH"])
@@ -158,3 +176,31 @@ def unsuspend_user(request, user_id: int):
     user.status = "active"
     user.save(update_fields=["status"])
     return Response(UserSerializer(user).data, status=drf_status.HTTP_200_OK)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def bulk_update_user_status(request):
+    serializer = UserBulkStatusSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    if "ids" in data:
+        ids = data["ids"]
+    else:
+        criteria = data["filter"]
+        queryset = _filtered_users(criteria["search"].strip())
+        if criteria.get("status"):
+            queryset = queryset.filter(status=criteria["status"])
+        ids = resolve_filter_ids(queryset)
+
+    results, updated_ids = bulk_update_status(User, ids, data["status"])
+    payload = {
+        "status": data["status"],
+        "updated": len(updated_ids),
+        "results": results,
+    }
+    if data["include_rows"]:
+        rows = User.objects.filter(pk__in=updated_ids).order_by("id")
+        payload["rows"] = UserSerializer(rows, many=True).data
+    return Response(payload)